@@ -0,0 +1,105 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: Check that the single pass parser of the danishphonerepair brand pages (compiled from the shop spec) gives
+#          the same rows as the former nested find_all loops, and time both on a large synthetic brand page.
+#          Usage: python benchmarks/bench_danishphonerepair_parser.py [n_phones] [n_reparations]
+
+
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from danishphonerepair_repair_cost import PLAN
+
+
+def extract_phones_specs(brand_soup, brand):
+    """
+    Single pass extraction of the engine plan of the shop.
+    """
+    return PLAN.cell_rows(brand_soup, {"name": brand})
+
+
+def extract_phones_specs_rescan(brand_soup, brand):
+    """
+    Former extraction of get_phones_specs, rescanning the whole page for every cell.
+    """
+    rows = []
+    phone_number = 0
+    while True:
+        try:
+            phone_name = brand + " " + brand_soup.find_all("h5")[phone_number].contents[0]
+            reparation_number = 0
+            while True:
+                try:
+                    if reparation_number % 2 == 0:
+                        reparation = \
+                            brand_soup.find_all("tbody")[phone_number].find_all("td")[reparation_number].contents[0]
+                        cost = \
+                            brand_soup.find_all("tbody")[phone_number].find_all("td")[reparation_number + 1].contents[0]
+                        rows.append((phone_name, reparation, cost))
+                    reparation_number += 1
+                except IndexError:
+                    break
+            phone_number += 1
+        except IndexError:
+            break
+    return rows
+
+
+def synthetic_brand_page(n_phones, n_reparations):
+    """
+    Build a brand page looking like https://danishphonerepair.dk/reparationer/<brand>/
+
+        Args:
+            n_phones (int): number of phones on the page
+            n_reparations (int): number of reparations per phone
+
+        Outputs:
+            html (str): content of the page
+    """
+    parts = ["<html><body><div class='et_pb_section'>"]
+    for phone in range(n_phones):
+        parts.append("<div class='et_pb_module'><h5>Galaxy S{}</h5>".format(phone))
+        parts.append("<table><tbody>")
+        for reparation in range(n_reparations):
+            parts.append("<tr><td>Skærm {}</td><td>{} kr.</td></tr>".format(reparation, 400 + 10 * reparation))
+        parts.append("</tbody></table></div>")
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+# pages covering the corner cases of the former loops: odd number of cells, empty cells, missing tables
+EDGE_CASE_PAGES = [
+    "<h5>A</h5><table><tbody><tr><td>Skærm</td><td>500 kr.</td><td>Batteri</td></tr></tbody></table>",
+    "<h5>A</h5><table><tbody><tr><td></td><td>500 kr.</td></tr></tbody></table><h5>B</h5>"
+    "<table><tbody><tr><td>Skærm</td><td>600 kr.</td></tr></tbody></table>",
+    "<h5>A</h5><h5>B</h5><table><tbody><tr><td>Skærm</td><td>500 kr.</td></tr></tbody></table>",
+    "<h5>A</h5><h5></h5><h5>C</h5><table><tbody><tr><td>Skærm</td><td>1</td></tr></tbody></table>"
+    "<table><tbody><tr><td>x</td><td>2</td></tr></tbody></table>"
+    "<table><tbody><tr><td>y</td><td>3</td></tr></tbody></table>",
+    "<table><tbody><tr><td>Skærm</td><td>500 kr.</td></tr></tbody></table>",
+]
+
+
+def main(n_phones=150, n_reparations=12):
+    for page in EDGE_CASE_PAGES + [synthetic_brand_page(5, 3)]:
+        soup = BeautifulSoup(page, "html.parser")
+        assert extract_phones_specs(soup, "Samsung") == extract_phones_specs_rescan(soup, "Samsung"), page
+    print("same rows on {} pages".format(len(EDGE_CASE_PAGES) + 1))
+
+    soup = BeautifulSoup(synthetic_brand_page(n_phones, n_reparations), "html.parser")
+    timings = {}
+    for name, function in [("single pass", extract_phones_specs), ("rescan", extract_phones_specs_rescan)]:
+        start = time.perf_counter()
+        rows = function(soup, "Samsung")
+        timings[name] = time.perf_counter() - start
+        print("{:>12}: {:>8.3f} s for {} rows".format(name, timings[name], len(rows)))
+    print("speed-up: {:.0f}x".format(timings["rescan"] / timings["single pass"]))
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:3]])
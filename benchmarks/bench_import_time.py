@@ -0,0 +1,86 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Guard of the import time of the lightweight modules: the name normalization, repair types and price
+#          helpers and the shop modules must import without pandas, numpy, bs4, pyarrow or the fetcher, within a time
+#          budget. Each module is imported in a fresh interpreter (bytecode already compiled) and the median of the
+#          cumulative -X importtime of the module is reported next to the time of pandas, bs4 and re. The exit status
+#          is 1 if a module loads a heavy dependency or exceeds the budget.
+#          The default budget of 25 ms is chosen from the measured medians: a shop module imports in 10-20 ms and the
+#          price and name helpers in 6-12 ms, while re alone takes 6-8 ms on the same machine. Most of the time is
+#          spent in the standard modules any scraper needs (re, enum, collections, contextlib, threading), not in
+#          pandas or bs4, which are never loaded. So the goal of helpers importing in a few milliseconds is not met:
+#          they cost about as much as re. The medians of a loaded machine vary by several ms between runs, and
+#          25 ms leaves headroom without hiding a regression such as loading pandas (about 350-500 ms) or bs4
+#          (about 55-90 ms).
+#          Usage: python benchmarks/bench_import_time.py [budget_ms] [n_runs]
+
+
+import ast
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streaming import SHOP_MODULES
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIGHT_MODULES = ["phone_names", "repair_types", "model_matching", "price_store", "price_history", "metrics",
+                 "parsing", "prices", "streaming", "shop_engine"] + sorted(SHOP_MODULES.values())
+# modules loaded only by the scraping and DataFrame paths
+HEAVY_MODULES = ["pandas", "numpy", "bs4", "pyarrow", "lxml", "fetcher", "http_cache"]
+REFERENCE_MODULES = ["pandas", "bs4", "re"]
+
+
+def import_time(module, n_runs):
+    """
+    Import a module in fresh interpreters.
+
+        Args:
+            module (str): name of the module
+            n_runs (int): number of interpreters
+
+        Outputs:
+            milliseconds (float): median cumulative import time of the module
+            heavy (list): heavy modules loaded by the import
+    """
+    code = "import sys, {0}; print([x for x in {1!r} if x in sys.modules])".format(module, HEAVY_MODULES)
+    # bytecode is written by a first run, so that the compilation of the sources is not measured
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    times = []
+    heavy = []
+    for _ in range(n_runs + 1):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env, check=True,
+                                 capture_output=True, text=True)
+        match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| {}$".format(re.escape(module)), process.stderr,
+                          re.MULTILINE)
+        times.append(int(match.group(1)) / 1000)
+        heavy = [x for x in ast.literal_eval(process.stdout.strip()) if x != module]
+    return statistics.median(times[1:]), heavy
+
+
+def main(budget_ms=25.0, n_runs=5):
+    failures = []
+    print("{:<32} {:>10}  {}".format("module", "import ms", "heavy modules loaded"))
+    for module in LIGHT_MODULES:
+        milliseconds, heavy = import_time(module, n_runs)
+        print("{:<32} {:>10.1f}  {}".format(module, milliseconds, ", ".join(heavy) or "-"))
+        if heavy or milliseconds > budget_ms:
+            failures.append(module)
+    for module in REFERENCE_MODULES:
+        milliseconds, _ = import_time(module, n_runs)
+        print("{:<32} {:>10.1f}  (reference)".format(module, milliseconds))
+
+    if failures:
+        print("over the budget of {:.0f} ms or loading a heavy dependency: {}".format(budget_ms, ", ".join(failures)))
+        return 1
+    print("all the modules import in less than {:.0f} ms without heavy dependency".format(budget_ms))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[float(sys.argv[1])] if len(sys.argv) > 1 else [], *[int(x) for x in sys.argv[2:3]]))
@@ -0,0 +1,74 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Benchmark of the indexed matching of shop phone names with a synthetic catalog of canonical model names.
+#          Usage: python benchmarks/bench_model_matching.py [n_models] [n_names]
+
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_matching import ModelIndex
+
+
+BRANDS = {"Samsung": ["Galaxy S", "Galaxy A", "Galaxy J", "Galaxy Note", "Galaxy M", "Galaxy Tab S"],
+          "Apple": ["iPhone", "iPad Air", "iPad Pro", "iPad mini"],
+          "Huawei": ["P", "Mate", "Nova", "Y", "Ascend G"],
+          "Sony": ["Xperia Z", "Xperia XZ", "Xperia M", "Xperia L"],
+          "Nokia": ["Lumia", "", "C", "G", "X"],
+          "LG": ["G", "K", "Q", "V", "Optimus L"],
+          "Motorola": ["Moto G", "Moto E", "Moto Z", "Moto X"],
+          "Xiaomi": ["Redmi Note", "Redmi", "Mi", "Poco X", "Poco F"]}
+SUFFIXES = ["", " Plus", " Pro", " Lite", " Mini", " Max", " 5G", " (2018)", " (2019)", " (2020)", " Neo", " Active"]
+
+
+def synthetic_catalog(n_models, rng):
+    names = set()
+    while len(names) < n_models:
+        brand = rng.choice(list(BRANDS))
+        code = " I{}".format(rng.randint(1000, 9999)) if brand == "Samsung" and rng.random() < 0.2 else ""
+        names.add("{}{} {}{}{}".format(brand, code, rng.choice(BRANDS[brand]), rng.randint(1, 400),
+                                       rng.choice(SUFFIXES)).replace("  ", " "))
+    return sorted(names)
+
+
+def shop_variant(name, rng):
+    """
+    Write a canonical name the way a shop could: without model code, "+" for "Plus", another case, extra words.
+    """
+    words = [word for word in name.split() if not (word[0] == "I" and word[1:].isdigit())]
+    variant = " ".join(words)
+    if rng.random() < 0.3:
+        variant = variant.replace(" Plus", "+")
+    if rng.random() < 0.3:
+        variant = variant.title()
+    if rng.random() < 0.3:
+        variant = "{} {}".format(variant, rng.choice(["4G", "Dual SIM", "Duos"]))
+    return variant
+
+
+def main(n_models=10000, n_names=30000):
+    rng = random.Random(0)
+    catalog = synthetic_catalog(n_models, rng)
+    start = time.perf_counter()
+    index = ModelIndex(catalog)
+    index_seconds = time.perf_counter() - start
+
+    expected = [rng.choice(catalog) for _ in range(n_names)]
+    names = [shop_variant(name, rng) for name in expected]
+    start = time.perf_counter()
+    matches = index.match_all(names)
+    match_seconds = time.perf_counter() - start
+
+    correct = sum(match[0] == name for match, name in zip(matches, expected))
+    unmatched = sum(match[0] is None for match in matches)
+    print("catalog of {} models indexed in {:.2f} s".format(len(catalog), index_seconds))
+    print("{} names ({} distinct) matched in {:.2f} s: {:.1%} correct, {:.1%} without match".format(
+        n_names, len(set(names)), match_seconds, correct / n_names, unmatched / n_names))
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:3]])
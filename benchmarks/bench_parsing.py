@@ -0,0 +1,59 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: Check on recorded pages that parsing only the part of the pages declared by each shop (and with lxml when
+#          it is installed) gives the same rows as parsing the whole pages with html.parser, and time each backend.
+#          Usage: python benchmarks/bench_parsing.py <archive.zip> [shop ...]
+
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parsing
+from replay import SHOP_EXTRACTORS, replaying
+
+
+def run(archive_path, shop, parser, strain):
+    """
+    Run the extraction of a shop on recorded pages with a parsing backend.
+
+        Outputs:
+            df (pd.DataFrame): extracted rows, seconds (float): duration of the run
+    """
+    parsing.set_parser(parser)
+    parsing.STRAIN = strain
+    with replaying(archive_path), contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        dfs = SHOP_EXTRACTORS[shop]()
+        seconds = time.perf_counter() - start
+    return pd.concat(dfs, ignore_index=True), seconds
+
+
+def main(archive_path, shops):
+    backends = [("html.parser", False), ("html.parser", True)]
+    try:
+        import lxml  # noqa: F401
+        backends += [("lxml", False), ("lxml", True)]
+    except ImportError:
+        print("lxml is not installed, only html.parser is measured")
+
+    for shop in shops:
+        reference, _ = run(archive_path, shop, "html.parser", False)
+        for parser, strain in backends:
+            df, seconds = run(archive_path, shop, parser, strain)
+            same = df.astype(str).equals(reference.astype(str))
+            print("{:>18} | {:>11} {:>10} | {:>8.3f} s | {}".format(
+                shop, parser, "strained" if strain else "full tree", seconds, "same rows" if same else "DIFFERENT"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python benchmarks/bench_parsing.py <archive.zip> [{}]".format(" | ".join(SHOP_EXTRACTORS)))
+    else:
+        main(sys.argv[1], sys.argv[2:] or list(SHOP_EXTRACTORS))
@@ -0,0 +1,88 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: Check that the compiled phone name pipelines of the shops give the same names as the former chains of
+#          per-row apply calls, and time both on a synthetic column of 1M names.
+#          Usage: python benchmarks/bench_phone_names.py [n_names]
+
+
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import danishphonerepair_repair_cost as danishphonerepair
+import greemind_repair_cost as greenmind
+import phone_rep_repair_cost as phonerep
+
+
+def former_modify_year(phone_name):
+    try:
+        year = re.findall(r"\d{4}", phone_name)[0]
+        phone_name = phone_name.replace(year, "(" + year + ")")
+    except:
+        pass
+    return phone_name
+
+
+def former_danishphonerepair(names):
+    names = names.apply(lambda x: " ".join(list(dict.fromkeys(x.lower().split()))).title())
+    names = names.apply(lambda x: former_modify_year(x))
+    return names.apply(lambda x: danishphonerepair.manual_match(x))
+
+
+def former_greenmind(names):
+    names = names.apply(lambda x: " ".join(list(dict.fromkeys(x.split()))))
+    names = names.apply(lambda x: x.replace("(1. gen.)", "").replace("(2. gen.)", "(2020)"))
+    return names.apply(lambda x: greenmind.manual_match(x))
+
+
+def former_phonerep(names):
+    names = names.apply(lambda x: x.replace("(Original)", "").replace("Skærm", "").replace("/ ", "").replace("()", "")
+                        .replace("One Plus", "OnePlus").replace("& ", "").strip())
+    names = names.apply(lambda x: " ".join(list(dict.fromkeys(x.split()))))
+    names = names.apply(lambda x: x.replace("Huawei Honor", "Honor"))
+    return names.apply(lambda x: phonerep.manual_match(x))
+
+
+def new_phonerep(names):
+    return phonerep.match_phone_names(phonerep.clean_phone_names(names))
+
+
+def synthetic_names(n_names, seed=0):
+    """
+    Build a column of phone names mixing the names of the manual tables with generated names containing duplicated
+    words, years, generations and repair details.
+    """
+    rng = random.Random(seed)
+    base_names = list(danishphonerepair.MANUAL_MATCHING) + list(greenmind.MANUAL_MATCHING) + \
+        list(phonerep.MANUAL_MATCHING)
+    base_names += ["Samsung Galaxy A{} {}".format(n, year) for n in range(10, 80) for year in [2017, 2018, 2019]]
+    base_names += ["OnePlus OnePlus {}".format(n) for n in range(1, 9)]
+    base_names += ["Apple iPhone SE (1. gen.)", "Apple iPhone SE (2. gen.)", "Huawei Honor 8 (Original) Skærm",
+                   "One Plus 6 / 6T & 7", "nokia NOKIA lumia 630 635", "HTC m8"]
+    return pd.Series([rng.choice(base_names) for _ in range(n_names)])
+
+
+def main(n_names=1000000):
+    names = synthetic_names(n_names)
+    for shop, former, new in [("danishphonerepair", former_danishphonerepair, danishphonerepair.normalize_phone_names),
+                              ("greenmind", former_greenmind, greenmind.normalize_phone_names),
+                              ("phone-rep", former_phonerep, new_phonerep)]:
+        start = time.perf_counter()
+        expected = former(names)
+        former_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        result = new(names)
+        new_seconds = time.perf_counter() - start
+        assert result.equals(expected), shop
+        print("{:>18} | apply chain {:>7.3f} s | pipeline {:>7.3f} s | same names".format(
+            shop, former_seconds, new_seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,83 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Benchmark of the SQLite price history with synthetic nightly snapshots of several shops, where a few prices
+#          change, appear or disappear every night. The answers of the history are checked against the snapshots.
+#          Usage: python benchmarks/bench_price_history.py [n_nights] [n_phones]
+
+
+from datetime import datetime, timedelta
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from price_history import PriceHistory
+
+
+SHOPS = ["greenmind", "danishphonerepair", "phone-rep"]
+CHANGE_RATE = 0.01
+
+
+def nightly_snapshots(n_nights, n_phones, rng):
+    """
+    Yield (shop, scraped_at, {phone_name: cost}) for every night and shop.
+    """
+    first_night = datetime(2023, 1, 1, 3, 0)
+    prices = {shop: {"Phone {}".format(n): rng.choice(range(499, 2999, 100)) for n in range(n_phones)}
+              for shop in SHOPS}
+    for night in range(n_nights):
+        for shop in SHOPS:
+            snapshot = prices[shop]
+            for _ in range(int(n_phones * CHANGE_RATE)):
+                phone_name = "Phone {}".format(rng.randrange(int(n_phones * 1.1)))
+                if phone_name in snapshot and rng.random() < 0.1:
+                    del snapshot[phone_name]
+                else:
+                    snapshot[phone_name] = rng.choice(range(499, 2999, 100))
+            yield shop, first_night + timedelta(days=night, minutes=rng.randrange(60)), dict(snapshot)
+
+
+def main(n_nights=1095, n_phones=1000):
+    rng = random.Random(0)
+    path = os.path.join(tempfile.mkdtemp(), "price_history.sqlite")
+    checks = []
+    with PriceHistory(path) as history:
+        start = time.perf_counter()
+        n_rows = 0
+        for shop, scraped_at, snapshot in nightly_snapshots(n_nights, n_phones, rng):
+            history.ingest(pd.DataFrame({"phone_name": list(snapshot), "cost": list(snapshot.values())}), shop,
+                           scraped_at)
+            n_rows += len(snapshot)
+            if rng.random() < 0.2:
+                phone_name = rng.choice(list(snapshot) + ["Phone {}".format(n_phones * 2)])
+                cost = snapshot.get(phone_name)
+                checks.append((phone_name, shop, scraped_at.date(), None if cost is None else cost * 100))
+        ingest_seconds = time.perf_counter() - start
+        n_intervals = history.connection.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+        n_runs = n_nights * len(SHOPS)
+        print("{} runs of {} rows ingested in {:.1f} s ({:.1f} ms per run), {} intervals instead of {} rows, "
+              "{:.1f} MB".format(n_runs, n_rows // n_runs, ingest_seconds, 1000 * ingest_seconds / n_runs,
+                                 n_intervals, n_rows, os.path.getsize(path) / 1e6))
+
+        start = time.perf_counter()
+        errors = sum(history.price_at(phone_name, shop, day) != expected for phone_name, shop, day, expected in checks)
+        seconds = time.perf_counter() - start
+        print("{} price_at queries: {:.3f} ms per query, {} wrong answers".format(len(checks),
+                                                                                   1000 * seconds / len(checks), errors))
+
+        start = time.perf_counter()
+        changes = history.last_run_changes()
+        print("last_run_changes: {} changes in {:.1f} ms".format(len(changes), 1000 * (time.perf_counter() - start)))
+        start = time.perf_counter()
+        changes = history.changes_since(datetime(2023, 1, 1) + timedelta(days=n_nights - 30))
+        print("changes of the last 30 nights: {} changes in {:.1f} ms".format(len(changes),
+                                                                             1000 * (time.perf_counter() - start)))
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:3]])
@@ -0,0 +1,68 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Benchmark of the in-memory price index with synthetic results of the shops: time of the first load, of the
+#          single and batched queries, and of the reload after one shop wrote a new result.
+#          Usage: python benchmarks/bench_price_index.py [n_models]
+
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from price_index import PriceIndex, RESULT_FILES
+
+
+def write_results(directory, models, rng):
+    for file_name in RESULT_FILES.values():
+        phone_names = [model for model in models if rng.random() < 0.7]
+        pd.DataFrame({"phone_name": phone_names,
+                      "cost": [float(rng.randrange(499, 2999)) for _ in phone_names]}).to_pickle(
+            os.path.join(directory, file_name))
+
+
+def main(n_models=20000):
+    rng = random.Random(0)
+    directory = tempfile.mkdtemp()
+    models = ["Brand{} Model {}".format(n % 20, n) for n in range(n_models)]
+    write_results(directory, models, rng)
+
+    start = time.perf_counter()
+    # no catalog: the names are only normalized
+    index = PriceIndex(directory, catalog_path=os.path.join(directory, "no_catalog.txt"))
+    print("{} models of {} shops loaded in {:.2f} s".format(len(index), len(RESULT_FILES),
+                                                          time.perf_counter() - start))
+
+    queries = [rng.choice(models) for _ in range(100000)]
+    start = time.perf_counter()
+    for model in queries:
+        index.cheapest(model)
+    print("cheapest: {:.2f} us per query".format(1e6 * (time.perf_counter() - start) / len(queries)))
+    start = time.perf_counter()
+    for model in queries:
+        index.median(model)
+    print("median: {:.2f} us per query".format(1e6 * (time.perf_counter() - start) / len(queries)))
+    start = time.perf_counter()
+    for n in range(0, len(queries), 100):
+        index.quote(queries[n:n + 100])
+    print("quote of 100 models: {:.2f} us per model".format(1e6 * (time.perf_counter() - start) / len(queries)))
+
+    df = pd.read_pickle(os.path.join(directory, RESULT_FILES["greenmind"]))
+    df["cost"] = df["cost"] + 100
+    time.sleep(0.01)
+    df.to_pickle(os.path.join(directory, RESULT_FILES["greenmind"]))
+    start = time.perf_counter()
+    shops = index.reload()
+    print("reload of {} in {:.2f} s".format(shops, time.perf_counter() - start))
+    start = time.perf_counter()
+    shops = index.reload()
+    print("reload without change {} in {:.3f} ms".format(shops, 1000 * (time.perf_counter() - start)))
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,106 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Benchmark of the price parsing and of the cross-shop merge with synthetic scraped rows of 5 shops written
+#          in the Danish price formats. The column parser is checked against the parser of a single price and the
+#          merged table against the former per-shop sort_values + drop_duplicates followed by a merge of the shops in
+#          a dictionary, then both are timed from 100 000 to max_rows rows.
+#          Usage: python benchmarks/bench_prices.py [max_rows] [n_models]
+
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prices import default_model_name, merge_shop_prices, parse_price, parse_prices
+
+
+SHOPS = ["greenmind", "danishphonerepair", "phone-rep", "ihero", "mobildoktoren"]
+REPAIR_TYPES = ["screen", "battery", "back_glass", "charging_port", "camera"]
+# formats of the prices written by the shops
+PRICE_FORMATS = ["{} kr.", "{} kr", "{},-", "Fra {} kr.", "{},50 kr"]
+UNKNOWN_PRICES = ["Kontakt os for pris", "Ring til os", "TBA", "IKKE PÅ LAGER", "GRATIS"]
+
+
+def danish_amount(amount):
+    return "{:,}".format(amount).replace(",", ".")
+
+
+def synthetic_results(n_rows, n_models, seed=0):
+    """
+    Build the raw results of the shops: each row is a phone name written in one of the spellings of the shops, a
+    repair type and a raw price.
+
+        Outputs:
+            results (dict): shop -> DataFrame of phone_name, repair_type and cost (str) columns
+    """
+    rng = np.random.default_rng(seed)
+    models = ["Brand{} Model {}".format(n % 20, n) for n in range(n_models)]
+    spellings = np.array(models + [name.upper() for name in models] + [name.replace(" ", "  ") for name in models],
+                         dtype=object)
+    prices = np.array([price_format.format(danish_amount(amount)) for amount in range(199, 3999, 10)
+                       for price_format in PRICE_FORMATS] + UNKNOWN_PRICES, dtype=object)
+    results = {}
+    for shop in SHOPS:
+        size = n_rows // len(SHOPS)
+        results[shop] = pd.DataFrame({"phone_name": spellings[rng.integers(0, len(spellings), size)],
+                                      "repair_type": np.array(REPAIR_TYPES, dtype=object)[
+                                          rng.integers(0, len(REPAIR_TYPES), size)],
+                                      "cost": prices[rng.integers(0, len(prices), size)]})
+    return results
+
+
+def merge_per_shop(results):
+    """
+    Former merge: each shop converts its prices row by row and deduplicates its rows with sort_values +
+    drop_duplicates, then the prices are gathered in a dictionary (model, repair type) -> shop -> price.
+    """
+    prices = {}
+    for shop, df in results.items():
+        df = df.assign(cost=df["cost"].map(parse_price), model=df["phone_name"].map(default_model_name))
+        df = df.dropna(subset=["cost"]).sort_values(by=["model", "repair_type", "cost"]).drop_duplicates(
+            subset=["model", "repair_type"], keep="last")
+        for model, repair_type, cost in zip(df["model"], df["repair_type"], df["cost"]):
+            prices.setdefault((model, repair_type), {})[shop] = cost
+    return prices
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    output = function(*args)
+    return output, time.perf_counter() - start
+
+
+def main(max_rows=5000000, n_models=5000):
+    results = synthetic_results(50000, n_models)
+    costs = pd.concat([df["cost"] for df in results.values()], ignore_index=True)
+    parsed = parse_prices(costs)
+    expected = costs.map(parse_price).astype(float)
+    assert parsed.equals(expected), "parse_prices differs from parse_price"
+    table = merge_shop_prices(results)
+    merged = {key: {shop: price for shop, price in row.items() if not pd.isna(price)}
+              for key, row in zip(table.index, table.to_dict("records"))}
+    assert merged == merge_per_shop(results), "merge_shop_prices differs from the per-shop merge"
+    print("same prices and merged table on {} rows".format(len(costs)))
+
+    print("\n{:>10} {:>14} {:>14} {:>12} {:>14} {:>12} {:>14}".format(
+        "rows", "parse rows s", "parse column s", "speed-up", "merge per shop", "merge s", "rows/s"))
+    for n_rows in sorted({min(100000, max_rows), min(1000000, max_rows), max_rows}):
+        results = synthetic_results(n_rows, n_models)
+        costs = pd.concat([df["cost"] for df in results.values()], ignore_index=True)
+        _, row_seconds = timed(lambda x: x.map(parse_price), costs)
+        _, column_seconds = timed(parse_prices, costs)
+        _, per_shop_seconds = timed(merge_per_shop, results)
+        table, merge_seconds = timed(merge_shop_prices, results)
+        print("{:>10} {:>14.3f} {:>14.3f} {:>11.0f}x {:>14.2f} {:>12.2f} {:>14,.0f}".format(
+            n_rows, row_seconds, column_seconds, row_seconds / column_seconds, per_shop_seconds, merge_seconds,
+            n_rows / merge_seconds))
+    print("\n{} (model, repair type) rows x {} shops in the last table".format(len(table), len(table.columns)))
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:3]])
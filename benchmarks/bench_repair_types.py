@@ -0,0 +1,189 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Check that the compiled repair classifiers give the same categories as the former chains of re.match calls
+#          of the Ihero and mobildoktoren notebooks, and time both on a synthetic column of reparation names.
+#          Usage: python benchmarks/bench_repair_types.py [n_names]
+
+
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from repair_types import IHERO_RULES, MOBILDOKTOREN_RULES, RepairClassifier, danish_letters
+
+
+def former_ihero(reparation_name):
+    """
+    Former convert_reparation_name of Ihero.ipynb.
+    """
+    reparation_name_transformed = reparation_name
+    if re.match("(.*Komplet (S|s)kærm.*)|(.*Glas/ LCD.*)|(.*Glas/LCD.*)|(.*LCD.*)|(.*(S|s)kærm.*)", reparation_name) is not None:
+        reparation_name_transformed = "screen"
+    if re.match("(.*3G.*)|(.*Antenne.*)", reparation_name) is not None:
+        reparation_name_transformed = "3G_4G"
+    if re.match(".*Batteri.*", reparation_name) is not None:
+        reparation_name_transformed = "battery"
+    if re.match("(.*BAGSIDE.*)|(.*Bagside.*)|(.*Bagcover.*)|(.*Bagglas.*)", reparation_name) is not None:
+        reparation_name_transformed = "back_frame"
+    if re.match("(.*GLAS.*)|(.*Glas.*)", reparation_name) is not None:
+        reparation_name_transformed = "glass"
+    if re.match(".*Bluetooth.*", reparation_name) is not None:
+        reparation_name_transformed = "bluetooth"
+    if re.match(".*WIFI.*", reparation_name) is not None:
+        reparation_name_transformed = "wifi"
+    if re.match("(.*BagKamera.*)|(.*Bagkamera.*)", reparation_name) is not None:
+        reparation_name_transformed = "back_camera"
+    if re.match(".*Front (K|k)amera.*", reparation_name) is not None:
+        # the notebook classified the front camera as back_camera
+        reparation_name_transformed = "front_camera"
+    if re.match(".*Diagnose.*", reparation_name) is not None:
+        reparation_name_transformed = "diagnose"
+    if re.match(".*Ladestik.*", reparation_name) is not None:
+        reparation_name_transformed = "charging_socket"
+    if re.match("(.*Vibrator.*)", reparation_name) is not None:
+        reparation_name_transformed = "vibrator"
+    if re.match("(.*Tænd/(S|s)luk.*)", reparation_name) is not None:
+        reparation_name_transformed = "power_cable"
+    if re.match("(.*Volume/(L|l)ydløs.*)|(.*Lydløs.*)", reparation_name) is not None:
+        reparation_name_transformed = "volume_button"
+    if re.match("(.*Bundhøjtaler.*)|(.*Højtaler.*)|(.*Ørehøjtaler.*)", reparation_name) is not None:
+        reparation_name_transformed = "speaker"
+    if re.match("(.*Ramme.*)", reparation_name) is not None:
+        reparation_name_transformed = "full_frame"
+    if re.match("(.*Mikrofon.*)", reparation_name) is not None:
+        reparation_name_transformed = "microphone"
+    if re.match("(.*Kameralinse.*)", reparation_name) is not None:
+        reparation_name_transformed = "camera_lens"
+    if re.match("(.*audio.*)|(.*Jackstik.*)", reparation_name) is not None:
+        reparation_name_transformed = "audio_port"
+    if re.match("(.*(H|h)ome (K|k)nap.*)", reparation_name) is not None:
+        reparation_name_transformed = "home_button"
+    if re.match("(.*Andre knapper.*)", reparation_name) is not None:
+        reparation_name_transformed = "other_button"
+    return reparation_name_transformed
+
+
+def former_mobildoktoren(reparation_name):
+    """
+    Former convert_reparation_name of mobildoktoren.ipynb.
+    """
+    reparation_name_transformed = reparation_name
+    if re.match("Data overfÃ¸rsel", reparation_name) is not None:
+        reparation_name_transformed = "data_transfer"
+    if re.match(".*SWAP.*", reparation_name) is not None:
+        reparation_name_transformed = "total_replacement"
+    if re.match(".*Rensning.*", reparation_name) is not None:
+        reparation_name_transformed = "cleaning"
+    if re.match(".*SIM.*", reparation_name) is not None:
+        reparation_name_transformed = "SIM"
+    if re.match("(.*skÃ¦rm.*)|(.*LCD.*)|(.*display.*)|(.*skÃ¦1rm.*)|(.*SkÃ¦rm.*)|(.*skÃ¦rn.*)", reparation_name) is not None:
+        reparation_name_transformed = "screen"
+    if re.match(".*Softwareproblemer.*", reparation_name) is not None:
+        reparation_name_transformed = "software"
+    if re.match(".*GPS.*", reparation_name) is not None:
+        reparation_name_transformed = "3G_4G"
+    if re.match(".*Bluetooth.*", reparation_name) is not None:
+        reparation_name_transformed = "bluetooth"
+    if re.match(".*(W|w)ifi.*", reparation_name) is not None:
+        reparation_name_transformed = "wifi"
+    if re.match("(.*bagcover.*)|(.*bag Cover.*)|(.*bag ramme.*)|(.*bag cover.*)", reparation_name) is not None:
+        reparation_name_transformed = "back_frame"
+    if re.match("(.*USB.*)", reparation_name) is not None:
+        reparation_name_transformed = "usb"
+    if re.match("(.*midtramme.*)|(.*midter ramme.*)", reparation_name) is not None:
+        reparation_name_transformed = "middle_frame"
+    if re.match("(.*batteri.*)", reparation_name) is not None:
+        reparation_name_transformed = "battery"
+    if re.match("(.*midtramme.*)|(.*midter ramme.*)", reparation_name) is not None:
+        reparation_name_transformed = "middle_frame"
+    if re.match("(.*front kamera.*)|(.*kamera(.*)front.*)|(.*kamera(.*)forside.*)", reparation_name) is not None:
+        reparation_name_transformed = "front_camera"
+    if re.match("(.*mikrofon.*)", reparation_name) is not None:
+        reparation_name_transformed = "microphone"
+    if re.match("(.*home key.*)|(.*home knap.*)", reparation_name) is not None:
+        reparation_name_transformed = "home_button"
+    if re.match("(.*linse.*)", reparation_name) is not None:
+        reparation_name_transformed = "camera_lens"
+    if re.match(".*kamera(.*)(B|b)agside.*", reparation_name) is not None:
+        reparation_name_transformed = "back_camera"
+    if re.match(".*(T|t)ouch.*", reparation_name) is not None:
+        reparation_name_transformed = "touch_screen"
+    if re.match("(.*audio.*)|(.*jack.*)", reparation_name) is not None:
+        reparation_name_transformed = "audio_port"
+    if re.match("(.*hÃ¸jtaler.*)|(.*speaker)|(.*microphone.*)", reparation_name) is not None:
+        reparation_name_transformed = "speaker"
+    if re.match(".*glas.*", reparation_name) is not None:
+        reparation_name_transformed = "glass"
+    if re.match("(.*ladestik.*)|(.*opladerstik.*)", reparation_name) is not None:
+        reparation_name_transformed = "charging_socket"
+    if re.match("(.*oplader*)", reparation_name) is not None:
+        reparation_name_transformed = "charger"
+    if re.match(".*volume.*", reparation_name) is not None:
+        reparation_name_transformed = "volume_button"
+    if re.match("(.*power.*)|(.*on/off.*)", reparation_name) is not None:
+        reparation_name_transformed = "power_button"
+    if re.match("(.*ramme.*)", reparation_name) is not None:
+        reparation_name_transformed = "full_frame"
+    if re.match("(.*vibrator.*)", reparation_name) is not None:
+        reparation_name_transformed = "vibrator"
+    if re.match("(.*tÃ¦nd/sluk.*)", reparation_name) is not None:
+        reparation_name_transformed = "power_cable"
+    if re.match("(.*kamera dÃ¦ksel.*)", reparation_name) is not None:
+        reparation_name_transformed = "camera cover"
+    if re.match("(.*UndersÃ¸gelse.*)", reparation_name) is not None:
+        reparation_name_transformed = "diagnose"
+
+    return reparation_name_transformed
+
+
+def synthetic_names(rules, n_names, rng, mojibake=False):
+    """
+    Build reparation names combining 1 to 3 keywords of the rules with filler words.
+    """
+    keywords = []
+    for _, pattern in rules:
+        for keyword in pattern.split("|"):
+            keyword = re.sub(r"\(\?:(.)\|.\)", r"\1", keyword).replace(" ?", " ").replace(".*", " ").lstrip("^")
+            keywords.append(keyword)
+    fillers = ["Komplet", "udskiftning", "iPhone 11", "Original", "Galaxy S9", "inkl. montering", "-"]
+    names = []
+    for _ in range(n_names):
+        words = rng.sample(keywords, rng.randint(1, 3)) + rng.sample(fillers, 2)
+        rng.shuffle(words)
+        name = " ".join(words)
+        if mojibake:
+            name = name.encode("utf-8").decode("latin-1")
+        names.append(name)
+    return names
+
+
+def main(n_names=200000):
+    rng = random.Random(0)
+    for shop, rules, former, mojibake in [("ihero", IHERO_RULES, former_ihero, False),
+                                          ("mobildoktoren", MOBILDOKTOREN_RULES, former_mobildoktoren, True)]:
+        # a few hundred distinct names repeated, like the reparation labels of the shops
+        distinct_names = synthetic_names(rules, 500, rng, mojibake)
+        names = pd.Series([rng.choice(distinct_names) for _ in range(n_names)])
+
+        start = time.perf_counter()
+        expected = names.apply(former)
+        former_seconds = time.perf_counter() - start
+
+        classifier = RepairClassifier([(category, danish_letters(pattern)) for category, pattern in rules])
+        start = time.perf_counter()
+        result = classifier.classify_column(names)
+        new_seconds = time.perf_counter() - start
+
+        assert result.equals(expected), names[result != expected].head()
+        print("{:>14} | re.match chain {:>7.3f} s | compiled classifier {:>7.3f} s | same categories".format(
+            shop, former_seconds, new_seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,82 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: Benchmark of the construction of the scraped rows DataFrame: one row appended at a time (the way the
+#          scrapers used to build it) against the rows collected in a list and turned into a DataFrame once.
+#          Both constructions are run once on 10k, 25k, 50k and 100k rows by default; the row by row construction
+#          takes about 8 minutes at 100k rows and the whole run about 14 minutes.
+#          Usage: python benchmarks/bench_row_building.py [n_rows ...]
+
+
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+COLUMNS = ["phone_name", "reparation", "cost"]
+
+
+def synthetic_rows(n_rows):
+    """
+    Build synthetic scraped rows.
+
+        Args:
+            n_rows (int): number of rows
+
+        Outputs:
+            rows (list): list of (phone_name, reparation, cost) tuples
+    """
+    return [("Samsung Galaxy S{}".format(n % 500), "Skærm {}".format(n % 7), "{} kr.".format(500 + n % 1500))
+            for n in range(n_rows)]
+
+
+def build_row_by_row(rows):
+    """
+    Append the rows one at a time, copying the whole DataFrame each time (same cost as DataFrame.append).
+    """
+    df = pd.DataFrame(columns=COLUMNS)
+    for row in rows:
+        df = pd.concat([df, pd.DataFrame([row], columns=COLUMNS)], ignore_index=True)
+    return df
+
+
+def build_batch(rows):
+    """
+    Build the DataFrame once from the collected rows.
+    """
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def measure(function, rows):
+    """
+    Measure the wall time and the peak memory allocated by a function.
+
+        Args:
+            function (callable): function building the DataFrame
+            rows (list): rows given to the function
+
+        Outputs:
+            seconds (float), peak_mb (float)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(rows)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1e6
+
+
+def main(sizes):
+    print("{:>8} | {:>12} {:>10} | {:>12} {:>10}".format("rows", "row by row s", "peak MB", "batch s", "peak MB"))
+    for n_rows in sizes:
+        rows = synthetic_rows(n_rows)
+        after = measure(build_batch, rows)
+        before = measure(build_row_by_row, rows)
+        print("{:>8} | {:>12.3f} {:>10.1f} | {:>12.4f} {:>10.1f}".format(n_rows, *before, *after))
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [10000, 25000, 50000, 100000])
@@ -0,0 +1,65 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: Benchmark of the scrapers on pages recorded with `python replay.py record <archive.zip>`. Each shop runs in
+#          its own process in replay mode and reports pages/sec, parse ms per page, rows/sec and peak RSS.
+#          Usage: python benchmarks/bench_scrapers.py <archive.zip> [shop ...]
+
+
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from replay import SHOP_EXTRACTORS, replaying
+
+
+def run_shop(archive_path, shop):
+    """
+    Run the extraction of a shop on recorded pages.
+
+        Args:
+            archive_path (str): fixture archive
+            shop (str): name of the shop in SHOP_EXTRACTORS
+
+        Outputs:
+            result (dict): pages, rows, seconds and peak RSS of the run
+    """
+    with replaying(archive_path) as fetcher, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        dfs = SHOP_EXTRACTORS[shop]()
+        seconds = time.perf_counter() - start
+    return {"shop": shop, "pages": fetcher.pages_served, "bytes": fetcher.bytes_served,
+            "rows": sum(len(df) for df in dfs), "seconds": seconds,
+            # ru_maxrss is in kilobytes on Linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+def main(archive_path, shops):
+    print("{:>18} | {:>6} {:>9} {:>14} {:>8} {:>10} {:>12}".format(
+        "shop", "pages", "pages/s", "parse ms/page", "rows", "rows/s", "peak RSS MB"))
+    for shop in shops:
+        # one process per shop, so that the peak RSS of a shop is not hidden by the previous ones
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--one", archive_path, shop],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        seconds = max(result["seconds"], 1e-9)
+        pages = max(result["pages"], 1)
+        # replayed pages are served from memory, the time of a run is spent parsing
+        print("{:>18} | {:>6} {:>9.1f} {:>14.2f} {:>8} {:>10.0f} {:>12.1f}".format(
+            shop, result["pages"], result["pages"] / seconds, 1000 * seconds / pages, result["rows"],
+            result["rows"] / seconds, result["peak_rss_mb"]))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "--one":
+        print(json.dumps(run_shop(sys.argv[2], sys.argv[3])))
+    elif len(sys.argv) >= 2:
+        main(sys.argv[1], sys.argv[2:] or list(SHOP_EXTRACTORS))
+    else:
+        print("usage: python benchmarks/bench_scrapers.py <archive.zip> [{}]".format(" | ".join(SHOP_EXTRACTORS)))
@@ -0,0 +1,102 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Check of the retries, rate limiting and circuit breaker of the fetcher against a local flaky server. The
+#          server answers 503, 429 with Retry-After, stalls past the timeout or drops the connection on a part of the
+#          requests; a second host always fails to check that its circuit opens and the other host is not affected.
+#          Usage: python benchmarks/check_fetch_retries.py [n_pages] [failure_rate]
+
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fetcher
+from fetcher import CircuitOpenError, Fetcher
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    failure_rate = 0.3
+    always_fail = False
+    rng = random.Random(0)
+    requests_per_second = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.requests_per_second[int(time.monotonic())] += 1
+            draw = self.rng.random() / self.failure_rate if self.failure_rate else 1.0
+        if self.always_fail:
+            return self._send(500, b"down")
+        if draw < 0.4:
+            return self._send(503, b"busy")
+        if draw < 0.6:
+            return self._send(429, b"slow down", {"Retry-After": "1"})
+        if draw < 0.8:
+            # stall past the timeout of the client
+            time.sleep(1.5)
+            return self._send(200, self.path.encode())
+        if draw < 1.0:
+            self.close_connection = True
+            return
+        self._send(200, self.path.encode())
+
+    def _send(self, status, body, headers=None):
+        try:
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(n_pages=200, failure_rate=0.3):
+    fetcher.BACKOFF_BASE = 0.05
+    fetcher.BREAKER_COOLDOWN = 2.0
+    FlakyHandler.failure_rate = failure_rate
+    flaky = start_server(FlakyHandler)
+    down = start_server(type("DownHandler", (FlakyHandler,), {"always_fail": True}))
+
+    client = Fetcher(max_workers=16, max_per_host=8, timeout=1, rate=40, burst=10)
+    urls = ["http://127.0.0.1:{}/page/{}".format(flaky.server_port, n) for n in range(n_pages)]
+    start = time.perf_counter()
+    bodies = client.fetch_all(urls, return_exceptions=True)
+    seconds = time.perf_counter() - start
+    correct = sum(body == "/page/{}".format(n).encode() for n, body in enumerate(bodies))
+    print("flaky host: {}/{} pages downloaded in {:.1f} s with {} requests, {} failed urls".format(
+        correct, n_pages, seconds, sum(FlakyHandler.requests_per_second.values()), len(client.failed_urls)))
+    print("  highest number of requests in one second: {} (rate limit 40/s, burst 10)".format(
+        max(FlakyHandler.requests_per_second.values())))
+
+    FlakyHandler.requests_per_second.clear()
+    down_urls = ["http://127.0.0.1:{}/page/{}".format(down.server_port, n) for n in range(50)]
+    start = time.perf_counter()
+    errors = client.fetch_all(down_urls, return_exceptions=True)
+    print("failing host: {} requests sent for {} pages in {:.1f} s, {} answered by the open circuit".format(
+        sum(FlakyHandler.requests_per_second.values()), len(down_urls), time.perf_counter() - start,
+        sum(isinstance(error, CircuitOpenError) for error in errors)))
+    body = client.fetch(urls[0]) if failure_rate < 1 else None
+    print("flaky host still reachable while the other circuit is open: {}".format(body == b"/page/0"))
+
+
+if __name__ == "__main__":
+    main(*[int(sys.argv[1])] if len(sys.argv) > 1 else [], *[float(x) for x in sys.argv[2:3]])
@@ -0,0 +1,80 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Check that a resumed streaming run of ihero does not extract a page twice. A synthetic site of one Samsung
+#          serie page linking to a phone page, both with a price table, is served from memory; the shop is streamed
+#          into a JSON lines file, then streamed again with resume. The second run must not add any row to the file
+#          nor download the phone page again. The exit status is 1 if a row is duplicated.
+#          Usage: python benchmarks/check_ihero_resume.py
+
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fetcher import Fetcher, set_fetcher
+from ihero_repair_cost import MAIN_URL
+from streaming import stream_shop
+
+
+BRAND_URL = MAIN_URL + "samsung/"
+SERIE_URL = BRAND_URL + "galaxy-s/"
+PHONE_URL = BRAND_URL + "galaxy-s22-ultra/"
+
+
+def box(url, title):
+    return "<a class='brand-box' href='{}'><span class='brand-box-title'>{}</span></a>".format(url, title)
+
+
+def price_table(prices):
+    return "<table>{}</table>".format("".join("<tr><td class='rep-title'>{}</td><td class='tilbuds-pris'>{}</td></tr>"
+                                              .format(name, price) for name, price in prices))
+
+
+# the serie page has 3 screen reparations and links to a phone page with 1 screen reparation
+PAGES = {MAIN_URL: box(BRAND_URL, "Reparation af Samsung"),
+         BRAND_URL: box(SERIE_URL, "Galaxy S-Serien"),
+         SERIE_URL: box(PHONE_URL, "Galaxy S22 Ultra") + price_table([("Skærm Galaxy S21, S22", "1.499,-"),
+                                                                      ("Galaxy S20 LCD Udskiftning", "999,-"),
+                                                                      ("Batteri Galaxy S21", "499,-")]),
+         PHONE_URL: price_table([("Skærm", "2.299,-"), ("Bagcover", "699,-")])}
+
+
+class SyntheticShopFetcher(Fetcher):
+    """
+    Fetcher serving PAGES and counting the requests of each url.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = {}
+
+    def request(self, url, headers=None):
+        self.requests[url] = self.requests.get(url, 0) + 1
+        return 200, {}, ("<html><body>" + PAGES[url] + "</body></html>").encode("utf-8")
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "ihero.jsonl")
+    counts = []
+    for resume in (False, True):
+        fetcher = SyntheticShopFetcher()
+        set_fetcher(fetcher)
+        rows = list(stream_shop("ihero", path, resume=resume))
+        counts.append(len(rows))
+        print("{} run: {} rows in the file, pages downloaded: {}".format(
+            "resumed" if resume else "first", len(rows),
+            ", ".join(url[len(MAIN_URL):] or "/" for url in sorted(fetcher.requests))))
+
+    keys = [(row.source_url, row.phone_name, row.reparation) for row in rows]
+    duplicated = len(keys) - len(set(keys))
+    print("{} duplicated rows".format(duplicated))
+    if counts[0] == 0 or counts[1] != counts[0] or duplicated or PHONE_URL in fetcher.requests:
+        print("the resumed run extracted pages of the first run again")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
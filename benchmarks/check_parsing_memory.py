@@ -0,0 +1,109 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: Check that freeing the parsed trees lowers the peak memory of a crawl. The danishphonerepair spec is run on
+#          a synthetic shop of n brand pages served from memory, in a fresh interpreter per number of pages, once with
+#          the trees decomposed after each page and once with the trees left to the garbage collector. The peak RSS of
+#          both crawls stays flat with the number of pages (the collector frees the trees of the reference run every
+#          few pages), so the check is on their difference: the exit status is 1 if decomposing the trees saves less
+#          than min_saving_mb at the largest crawl, or if the peak RSS with decompose grows by more than 10 MB.
+#          Usage: python benchmarks/check_parsing_memory.py [min_saving_mb] [n_phones]
+
+
+import os
+import resource
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fetcher import Fetcher, set_fetcher
+import parsing
+from shop_engine import BATCH_SIZE
+
+
+# the smallest crawl fills a batch of downloads, whose raw pages are held in memory whatever the number of pages
+PAGE_COUNTS = [BATCH_SIZE, 4 * BATCH_SIZE, 8 * BATCH_SIZE]
+START_URL = "https://danishphonerepair.dk/reparationer/"
+
+
+class SyntheticShopFetcher(Fetcher):
+    """
+    Fetcher serving a synthetic danishphonerepair site: the start page links to n_brands brand pages of n_phones
+    phones each.
+    """
+
+    def __init__(self, n_brands, n_phones, **kwargs):
+        super().__init__(**kwargs)
+        self.n_brands = n_brands
+        self.n_phones = n_phones
+
+    def request(self, url, headers=None):
+        from bench_danishphonerepair_parser import synthetic_brand_page
+
+        if url == START_URL:
+            body = "".join("<div class='et_pb_module et_pb_image_{0}'><a href='{1}brand{0}/'></a></div>".format(
+                n, START_URL) for n in range(self.n_brands))
+        else:
+            # every brand page has its own phone names so that no string is shared between the pages
+            body = synthetic_brand_page(self.n_phones, 12).replace("Galaxy", url.rstrip("/").rsplit("/", 1)[-1])
+        return 200, {}, body.encode("utf-8")
+
+
+def crawl(n_brands, n_phones, release):
+    """
+    Crawl the synthetic shop in the current process.
+
+        Outputs:
+            rows (int): number of rows extracted
+            peak_mb (float): peak RSS of the process in MB
+    """
+    import danishphonerepair_repair_cost
+
+    parsing.RELEASE = release
+    set_fetcher(SyntheticShopFetcher(n_brands, n_phones))
+    rows = 0
+    for _, page_rows in danishphonerepair_repair_cost.iter_pages():
+        rows += len(page_rows)
+    return rows, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(n_brands, n_phones, release):
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), "--crawl", str(n_brands), str(n_phones),
+                              str(int(release))], check=True, capture_output=True, text=True)
+    rows, peak_mb = process.stdout.split()[-2:]
+    return int(rows), float(peak_mb)
+
+
+def main(min_saving_mb=4.0, n_phones=20, tolerance_mb=10.0):
+    peaks = {}
+    references = {}
+    print("{:>8} {:>10} {:>16} {:>22} {:>12}".format("pages", "rows", "peak RSS (MB)", "without decompose (MB)",
+                                                      "saving (MB)"))
+    for n_brands in PAGE_COUNTS:
+        rows, peaks[n_brands] = run(n_brands, n_phones, True)
+        _, references[n_brands] = run(n_brands, n_phones, False)
+        print("{:>8} {:>10} {:>16.1f} {:>22.1f} {:>12.1f}".format(n_brands, rows, peaks[n_brands], references[n_brands],
+                                                                  references[n_brands] - peaks[n_brands]))
+
+    saving = references[PAGE_COUNTS[-1]] - peaks[PAGE_COUNTS[-1]]
+    growth = peaks[PAGE_COUNTS[-1]] - peaks[PAGE_COUNTS[0]]
+    print("peak RSS growth from {} to {} pages: {:.1f} MB ({:.1f} kB per page)".format(
+        PAGE_COUNTS[0], PAGE_COUNTS[-1], growth, 1024 * growth / (PAGE_COUNTS[-1] - PAGE_COUNTS[0])))
+    status = 0
+    if saving < min_saving_mb:
+        print("decomposing the trees saves {:.1f} MB of peak RSS, less than {:.0f} MB".format(saving, min_saving_mb))
+        status = 1
+    if growth > tolerance_mb:
+        print("the peak RSS grows by more than {:.0f} MB".format(tolerance_mb))
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--crawl"]:
+        import contextlib
+        with contextlib.redirect_stdout(sys.stderr):
+            result = crawl(int(sys.argv[2]), int(sys.argv[3]), sys.argv[4] == "1")
+        print(*result)
+    else:
+        sys.exit(main(*[float(sys.argv[1])] if len(sys.argv) > 1 else [], *[int(x) for x in sys.argv[2:3]]))
@@ -4,127 +4,95 @@
 # PURPOSE: This file contains the code to scrap the repair cost of phones from https://danishphonerepair.dk/
 
 
-from urllib.request import urlopen
-from bs4 import BeautifulSoup
-import pandas as pd
+from metrics import record_filter, track_stage
+from phone_names import compile_pipeline, lookup, modify_year, remove_duplicated_words
+from prices import keep_most_expensive, parse_price, parse_prices
+from repair_types import danishphonerepair_classifier
+from shop_engine import Cells, compile_spec, Links, ShopSpec
+from streaming import RepairRow
+import os
 import re
 
-
-def get_urls_brand():
-    """
-    Get the urls of each brands
+# match of phone names with the names used on https://www.gsmarena.com/
+MANUAL_MATCHING = {"Htc M7": "HTC One",
+                   "Htc M8": "HTC One (M8)",
+                   "Htc M9": "HTC One M9",
+                   "Huawei P Smart (2019)": "Huawei P smart 2019",
+                   "Huawei P Smart Pro": "Huawei P smart Pro 2019",
+                   "Huawei P8 Lite": "Huawei P8 Lite (2017)",
+                   "Lg G3S": "LG G3 S",
+                   "Nokia 5.1 Plus": "Nokia 5.1 Plus (Nokia X5)",
+                   "Nokia 8.1": "Nokia 8.1 (Nokia X7)",
+                   "Oneplus 1": "OnePlus One",
+                   "Samsung Galaxy A8+": "Samsung Galaxy A8+ (2018)",
+                   "Samsung Galaxy A9": "Samsung Galaxy A9 (2018)",
+                   "Samsung Galaxy A90": "Samsung Galaxy A90 5G",
+                   "Samsung Galaxy J5 (2015)": "Samsung Galaxy J5 (2016)",
+                   "Samsung Galaxy Note": "Samsung Galaxy Note T879",
+                   "Samsung Galaxy Note 10": "Samsung Galaxy Note10",
+                   "Samsung Galaxy Note 10 +": "Samsung Galaxy Note10+",
+                   "Samsung Galaxy Note 2": "Samsung Galaxy Note II N7100",
+                   "Samsung Galaxy Note 5": "Samsung Galaxy Note5",
+                   "Samsung Galaxy Note 8": "Samsung Galaxy Note8",
+                   "Samsung Galaxy Note 9": "Samsung Galaxy Note9",
+                   "Samsung Galaxy S4": "Samsung I9500 Galaxy S4",
+                   "Samsung Galaxy S4 Mini": "Samsung I9190 Galaxy S4 mini",
+                   "Samsung Galaxy S6 Edge +": "Samsung Galaxy S6 edge+",
+                   "Sony Xperia Z3 Plus": "Sony Xperia Z3+",
+                   "Sony Xperia Z4": "Sony Xperia Z4v"
+                   }
+
+# normalization of the phone names: remove duplicated words (such as OnePlus OnePlus 3 for example), title case,
+# parenthesis around years and manual adjustments
+normalize_phone_names = compile_pipeline(lambda x: remove_duplicated_words(x.lower()).title(),
+                                         modify_year,
+                                         lookup(MANUAL_MATCHING))
+
+
+def brand_name(_, href):
+    """
+    Name of a brand from the url of its page ("htc-2/" -> "Htc").
+    """
+    return href.replace("/", "").replace("-", " ").replace("2", "").title().strip()
+
+
+def iter_pages(skip_urls=()):
+    """
+    Extract the repair costs brand page by brand page.
 
         Args:
-            None
+            skip_urls (set): urls of the brand pages that are not extracted (already extracted by a previous run)
 
         Outputs:
-            urls_brand (str): list of urls
-            brands (str): list of the brands names
-    """
-    url = "https://danishphonerepair.dk/reparationer/"
-    html = urlopen(url)
-    soup = BeautifulSoup(html, 'html.parser')
-
-    brands = []
-    urls_brand = []
-    brand_number = 0
-    while True:
-        # while there is still a url to extract
-        try:
-            brand = \
-                soup.find_all("div", class_="et_pb_module et_pb_image et_pb_image_" + str(brand_number))[0].find("a")[
-                    "href"]
-            brands.append(brand.replace("/", "").replace("-", " ").replace("2", "").title().strip())
-            brand_url = url + brand
-            urls_brand.append(brand_url)
-            brand_number += 1
-        except IndexError:
-            break
-    return urls_brand, brands
-
-
-def get_phones_specs(brand_url, brand):
+            pages (generator): (brand_url, rows) tuples, rows being a list of RepairRow
     """
-    Get phones specifications for a brand.
+    return PLAN.iter_pages(skip_urls)
 
-        Args:
-            brand_url (str): url containing the phone models specification for this brand
-            brand (str): name of the brand
 
-        Outputs:
-            df (pd.DataFrame): dataframe containing the phones repair cost for a brand
+def screen_stages(rows):
     """
-    print("extracting data from ", brand_url, "...")
-
-    df = pd.DataFrame(columns=["phone_name", "reparation", "cost"])
-    brand_html = urlopen(brand_url)
-    brand_soup = BeautifulSoup(brand_html, 'html.parser')
-    phone_number = 0
-
-    while True:
-
-        try:
-            phone_name = brand + " " + brand_soup.find_all("h5")[phone_number].contents[0]
-            # print(phone_name)
-            reparation_number = 0
-
-            while True:
-                # while there is a phone to extract
-                try:
-                    if reparation_number % 2 == 0:
-                        reparation = \
-                            brand_soup.find_all("tbody")[phone_number].find_all("td")[reparation_number].contents[0]
-                        cost = \
-                            brand_soup.find_all("tbody")[phone_number].find_all("td")[reparation_number + 1].contents[0]
-                        phone_dict = {"phone_name": phone_name, "reparation": reparation, "cost": cost}
-                        df = df.append(phone_dict, ignore_index=True)
-
-                    reparation_number += 1
-
-                except IndexError:
-                    break
-
-            phone_number += 1
-
-        except IndexError:
-            break
-
-    return df
-
-
-def lower_(text):
-    """
-    Lower case a text.
+    Streaming stages of the rows of a page: keep the screen reparations, convert the cost and normalize the phone name.
 
         Args:
-            text (str): text to lowercase
+            rows (iterable): RepairRow extracted from a page
 
-        Output:
-            text (str): lowercased text
+        Outputs:
+            rows (generator): RepairRow of the screen reparations with a known cost
     """
-    try:
-        return text.lower()
-    except:
-        pass
+    return PLAN.screen_stages(rows)
 
 
 def detect_skærm(reparation_name):
     """
     Detect if the reparation is a screen reparation
-    
+
         Args:
             reparation_name (str): name of the reparation
 
         Outputs:
             boolean: True if it is a screen reparation, else False
     """
-    try:
-        if "skærm" in reparation_name:
-            return True
-        else:
-            return False
-    except TypeError:
-        return False
+    return danishphonerepair_classifier.classify(reparation_name) == "screen"
 
 
 def convert_cost(cost):
@@ -132,83 +100,72 @@ def convert_cost(cost):
     Convert the cost of the reparation into float
 
         Args:
-            cost (str): raw cost extracted
+            cost (str): raw cost extracted ("1.299 kr", "999,-" or "Ring")
 
         Outputs:
-            cost (float): cost of the reparation
+            cost (float): cost of the reparation, None if it is unknown
     """
-    try:
-        cost = int(re.findall('[0-9]+', str(cost))[0])
-    except:
-        cost = None
-    return cost
+    return parse_price(cost)
 
 
-def modify_year(phone_name):
-    """
-    Put some parenthesis around year in the phone name
-
-        Args:
-            phone name (str):
-
-        Outputs:
-            phone_name (str):
-    """
-    try:
-        year = re.findall("\d{4}", phone_name)[0]
-        phone_name = phone_name.replace(year, "("+year+")")
-    except:
-        pass
-    return phone_name
+# the brand images of the index link to the brand pages, where the n-th h5 heading names the phone whose reparations
+# are in the n-th tbody, the cells of a phone alternating between the reparation name and its cost
+SPEC = ShopSpec(shop="danishphonerepair",
+                start=["https://danishphonerepair.dk/reparationer/"],
+                levels=[Links(select=("div", {"class": re.compile(r"\bet_pb_image_\d+\b")}), href="a@href",
+                              name="a@href", rename=brand_name)],
+                cells=Cells(select=("td", {}), size=2, row=("{name} {heading}", "{0}", "{1}"), within=("tbody", {}),
+                            heading=("h5", {})),
+                names=normalize_phone_names,
+                classifier=danishphonerepair_classifier,
+                output="danishphonerepair_reparations_cost.pkl")
+PLAN = compile_spec(SPEC)
 
 
-def get_screen_repair_cost_danishphonerepair():
+def get_screen_repair_cost_danishphonerepair(output_dir="../data"):
     """
     Extract the repair costs from https://danishphonerepair.dk/
 
         Args:
-            None
+            output_dir (str): directory where the DataFrame is saved
 
         Outputs:
             df (pd.DataFrame): dataframe containing the screen repair costs for all phone models available.
 
     """
-    print("Starting extraction of the repair cost from https://danishphonerepair.dk/reparationer/")
-    df = pd.DataFrame(columns=["phone_name", "reparation", "cost"])
+    import pandas as pd
 
-    urls_brand, brands = get_urls_brand()
-    for brand_url, brand in zip(urls_brand, brands):
-        df = df.append(get_phones_specs(brand_url, brand))
+    print("Starting extraction of the repair cost from https://danishphonerepair.dk/reparationer/")
+    # the rows of all the brand pages are gathered and the dataframe is built once
+    rows = [row for _, page_rows in iter_pages() for row in page_rows]
+    df = pd.DataFrame(rows, columns=RepairRow._fields)[["phone_name", "reparation", "cost"]]
 
     # filter reparations corresponding to screen repair
-    df["reparation"] = df["reparation"].apply(lambda x: lower_(x))
-    df = df[df["reparation"].apply(lambda x: detect_skærm(x))]
+    n_rows = len(df)
+    df = df[danishphonerepair_classifier.classify_column(df["reparation"]) == "screen"]
+    record_filter("danishphonerepair", "screen", n_rows, len(df))
 
     # convert cost in float
-    df["cost"] = df["cost"].apply(lambda x: convert_cost(x))
+    df["cost"] = parse_prices(df["cost"])
 
     # drop phone for which cost is unknown
+    n_rows = len(df)
     df = df.dropna()
+    record_filter("danishphonerepair", "dropna", n_rows, len(df))
 
     # drop duplicates keeping the more expensive cost and remove reparation column
-    df = df.sort_values(by=["phone_name", "cost"]).drop_duplicates(subset=["phone_name"], keep="last")[
-        ["phone_name", "cost"]]
-
-    # remove duplicated words in the names of phone (such as OnePlus OnePlus 3 for example)
-    df["phone_name"] = df["phone_name"].apply(lambda x: " ".join(list(dict.fromkeys(x.lower().split()))).title())
-
-    # reset index
-    df = df.reset_index()[["phone_name", "cost"]]
-
-    # add parenthesis around year in the phone names
-    df["phone_name"] = df["phone_name"].apply(lambda x: modify_year(x))
+    n_rows = len(df)
+    df = keep_most_expensive(df, ["phone_name"])
+    record_filter("danishphonerepair", "duplicates", n_rows, len(df))
 
-    # manual adjustment
-    df["phone_name"] = df["phone_name"].apply(lambda x: manual_match(x))
+    # remove duplicated words, add parenthesis around years and manual adjustment of the phone names
+    with track_stage("danishphonerepair", "normalize"):
+        df["phone_name"] = normalize_phone_names(df["phone_name"])
 
     # save data
-    df.to_pickle("../data/danishphonerepair_reparations_cost.pkl")
-    print("Data saved in ../data/danishphonerepair_reparations_cost.pkl")
+    output_path = os.path.join(output_dir, "danishphonerepair_reparations_cost.pkl")
+    df.to_pickle(output_path)
+    print("Data saved in {}".format(output_path))
 
     return df
 
@@ -223,36 +180,4 @@ def manual_match(phone_name):
         Output:
             phone_name (str):
     """
-    manual_matching = {"Htc M7": "HTC One",
-                       "Htc M8": "HTC One (M8)",
-                       "Htc M9": "HTC One M9",
-                       "Huawei P Smart (2019)": "Huawei P smart 2019",
-                       "Huawei P Smart Pro": "Huawei P smart Pro 2019",
-                       "Huawei P8 Lite": "Huawei P8 Lite (2017)",
-                       "Lg G3S": "LG G3 S",
-                       "Nokia 5.1 Plus": "Nokia 5.1 Plus (Nokia X5)",
-                       "Nokia 8.1": "Nokia 8.1 (Nokia X7)",
-                       "Oneplus 1": "OnePlus One",
-                       "Samsung Galaxy A8+": "Samsung Galaxy A8+ (2018)",
-                       "Samsung Galaxy A9": "Samsung Galaxy A9 (2018)",
-                       "Samsung Galaxy A90": "Samsung Galaxy A90 5G",
-                       "Samsung Galaxy J5 (2015)": "Samsung Galaxy J5 (2016)",
-                       "Samsung Galaxy Note": "Samsung Galaxy Note T879",
-                       "Samsung Galaxy Note 10": "Samsung Galaxy Note10",
-                       "Samsung Galaxy Note 10 +": "Samsung Galaxy Note10+",
-                       "Samsung Galaxy Note 2": "Samsung Galaxy Note II N7100",
-                       "Samsung Galaxy Note 5": "Samsung Galaxy Note5",
-                       "Samsung Galaxy Note 8": "Samsung Galaxy Note8",
-                       "Samsung Galaxy Note 9": "Samsung Galaxy Note9",
-                       "Samsung Galaxy S4": "Samsung I9500 Galaxy S4",
-                       "Samsung Galaxy S4 Mini": "Samsung I9190 Galaxy S4 mini",
-                       "Samsung Galaxy S6 Edge +": "Samsung Galaxy S6 edge+",
-                       "Sony Xperia Z3 Plus": "Sony Xperia Z3+",
-                       "Sony Xperia Z4": "Sony Xperia Z4v"
-                       }
-
-    if phone_name in manual_matching.keys():
-        phone_name = manual_matching[phone_name]
-    else:
-        pass
-    return phone_name
+    return MANUAL_MATCHING.get(phone_name, phone_name)
@@ -0,0 +1,514 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the shared fetch layer used by all the scrapers. Pages are downloaded concurrently by a
+#          thread pool and every host gets its own pool of keep-alive connections. Requests to a host are paced by a
+#          token bucket that slows down when the host answers 429 or Retry-After; server errors and timeouts are
+#          retried with exponential backoff and jitter, a circuit breaker stops sending requests to a host that keeps
+#          failing, and the pages still failing at the end of fetch_all are retried once more from a queue.
+
+
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urljoin
+import http.client
+import random
+import socket
+import threading
+import time
+
+from metrics import NETWORK_TIMINGS, get_metrics
+
+
+USER_AGENT = "Mozilla/5.0 (compatible; phone-repair-prices)"
+MAX_WORKERS = 16
+MAX_PER_HOST = 4
+TIMEOUT = 30
+MAX_REDIRECTS = 5
+
+# requests per second and burst size of the token bucket of a host
+RATE = 10.0
+BURST = 10
+MIN_RATE = 0.2
+# number of retries of a request and exponential backoff (seconds): random between 0 and min(MAX, BASE * 2 ** retry)
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# consecutive failures opening the circuit of a host, and seconds before a trial request is let through
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
+
+
+class FetchError(IOError):
+    """
+    Raised when a page cannot be downloaded (HTTP status >= 400 or too many redirects).
+    """
+
+    def __init__(self, url, status, reason=""):
+        super().__init__("{} {} for {}".format(status, reason, url).strip())
+        self.url = url
+        self.status = status
+
+
+class CircuitOpenError(FetchError):
+    """
+    Raised without contacting a host whose circuit breaker is open.
+    """
+
+    def __init__(self, url, retry_in):
+        IOError.__init__(self, "circuit open for {} (retry in {:.0f} s)".format(url, retry_in))
+        self.url = url
+        self.status = None
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """
+    Pace the requests to a host: a request takes a token, tokens are added at `rate` per second up to `burst`. The
+    rate is halved when the host asks to slow down (429 or Retry-After) and grows back while the requests succeed.
+    """
+
+    def __init__(self, rate=RATE, burst=BURST):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait until a token is available and take it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def slow_down(self, pause=0.0):
+        """
+        Halve the rate and stop sending requests for `pause` seconds (for example the Retry-After of a 429).
+        """
+        with self._lock:
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+    def speed_up(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class CircuitBreaker:
+    """
+    Stop sending requests to a host after `threshold` consecutive failures. After `cooldown` seconds one trial
+    request is let through: its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, threshold=None, cooldown=None):
+        self.threshold = BREAKER_THRESHOLD if threshold is None else threshold
+        self.cooldown = BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def retry_in(self):
+        """
+        Number of seconds before the circuit lets a request through, 0 when it is closed.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def allow(self, url):
+        """
+        Raise CircuitOpenError if the circuit is open, else let the request through.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            retry_in = self._opened_at + self.cooldown - time.monotonic()
+            if retry_in > 0 or self._trial:
+                raise CircuitOpenError(url, max(retry_in, 0.0))
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class HostPool:
+    """
+    Pool of keep-alive connections to a single host. At most `max_connections` requests run at the same time on a
+    host, the others wait for a connection to be released. The requests are paced by the token bucket of the host
+    and its circuit breaker records their failures.
+    """
+
+    def __init__(self, scheme, netloc, max_connections=MAX_PER_HOST, timeout=TIMEOUT, rate=RATE, burst=BURST):
+        self.scheme = scheme
+        self.netloc = netloc
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self, timings):
+        if self.scheme == "https":
+            conn = http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+        # times of this attempt, timings can already hold the times of a previous attempt of the request
+        marks = {}
+
+        def create_connection(address, timeout, source_address=None):
+            # the name is resolved here to measure the DNS time separately from the TCP connection
+            marks["dns_start"] = time.perf_counter()
+            addresses = socket.getaddrinfo(address[0], address[1], 0, socket.SOCK_STREAM)
+            marks["dns_end"] = time.perf_counter()
+            for n, (_, _, _, _, socket_address) in enumerate(addresses):
+                try:
+                    return socket.create_connection(socket_address[:2], timeout, source_address)
+                except OSError:
+                    if n == len(addresses) - 1:
+                        raise
+
+        conn._create_connection = create_connection
+        try:
+            conn.connect()
+        finally:
+            end = time.perf_counter()
+            if "dns_start" in marks:
+                dns_end = marks.get("dns_end", end)
+                timings["dns"] += dns_end - marks["dns_start"]
+                # TCP connection and TLS handshake
+                timings["connect"] += end - dns_end
+        return conn
+
+    def _exchange(self, conn, path, headers, timings):
+        start = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        timings["ttfb"] += time.perf_counter() - start
+        start = time.perf_counter()
+        body = response.read()
+        timings["download"] += time.perf_counter() - start
+        return response, body
+
+    def request(self, path, headers):
+        """
+        Send a GET request on a pooled connection. The timings of the request are recorded in the metrics.
+
+            Args:
+                path (str): path and query of the url
+                headers (dict): request headers
+
+            Outputs:
+                status (int), reason (str), response headers (http.client.HTTPMessage), body (bytes)
+        """
+        url = "{}://{}{}".format(self.scheme, self.netloc, path)
+        timings = dict.fromkeys(NETWORK_TIMINGS, 0.0)
+        with self._slots:
+            self.bucket.acquire()
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            reused = conn is not None
+            try:
+                if conn is None:
+                    conn = self._new_connection(timings)
+                response, body = self._exchange(conn, path, headers, timings)
+            except (http.client.HTTPException, OSError):
+                if conn is not None:
+                    conn.close()
+                if not reused:
+                    get_metrics().record_request(url, None, 0, **timings)
+                    raise
+                # the server closed an idle keep-alive connection, we retry once on a fresh one
+                conn = None
+                try:
+                    conn = self._new_connection(timings)
+                    response, body = self._exchange(conn, path, headers, timings)
+                except (http.client.HTTPException, OSError):
+                    if conn is not None:
+                        conn.close()
+                    get_metrics().record_request(url, None, 0, **timings)
+                    raise
+            if response.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+            get_metrics().record_request(url, response.status, len(body), **timings)
+            return response.status, response.reason, response.msg, body
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def retry_after(headers):
+    """
+    Number of seconds asked by a Retry-After header (delay or HTTP date), None without header.
+    """
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), BACKOFF_MAX)
+
+
+def is_transient(error):
+    """
+    True if a failed download may succeed later: server error, rate limiting, timeout, connection error or open
+    circuit. Other HTTP errors (such as 404) are permanent.
+    """
+    if isinstance(error, FetchError):
+        return error.status is None or error.status in RETRY_STATUSES
+    return isinstance(error, (http.client.HTTPException, OSError))
+
+
+class Fetcher:
+    """
+    Download pages concurrently while reusing connections per host.
+
+        Args:
+            max_workers (int): number of threads used by fetch_all
+            max_per_host (int): maximum number of simultaneous requests sent to one host
+            timeout (float): socket timeout in seconds
+            rate (float): maximum number of requests per second sent to one host
+            burst (int): number of requests that can be sent at once to a host before the rate applies
+            max_retries (int): number of retries of a request failing with a server error or a timeout
+            host_rates (dict): host -> (rate, burst) for the hosts tolerating another rate
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_per_host=MAX_PER_HOST, timeout=TIMEOUT, rate=RATE, burst=BURST,
+                 max_retries=MAX_RETRIES, host_rates=None):
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.host_rates = dict(host_rates or {})
+        # url -> last error of the pages that fetch_all could not download, even from the retry queue
+        self.failed_urls = {}
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def settings(self):
+        """
+        Arguments of the fetcher, to build another fetcher with the same limits.
+        """
+        return {"max_workers": self.max_workers, "max_per_host": self.max_per_host, "timeout": self.timeout,
+                "rate": self.rate, "burst": self.burst, "max_retries": self.max_retries, "host_rates": self.host_rates}
+
+    def _pool(self, scheme, netloc):
+        key = (scheme, netloc)
+        with self._lock:
+            if key not in self._pools:
+                rate, burst = self.host_rates.get(netloc, (self.rate, self.burst))
+                self._pools[key] = HostPool(scheme, netloc, self.max_per_host, self.timeout, rate, burst)
+            return self._pools[key]
+
+    def _send(self, pool, url, path, headers):
+        """
+        Send a request to a host, retrying server errors, rate limiting and timeouts with exponential backoff.
+        """
+        for retry in range(self.max_retries + 1):
+            pool.breaker.allow(url)
+            backoff = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** retry))
+            try:
+                status, reason, response_headers, body = pool.request(path, headers)
+            except (http.client.HTTPException, OSError):
+                pool.breaker.record_failure()
+                if retry == self.max_retries:
+                    raise
+                time.sleep(backoff)
+                continue
+            if status not in RETRY_STATUSES:
+                pool.breaker.record_success()
+                pool.bucket.speed_up()
+                return status, reason, response_headers, body
+            pool.breaker.record_failure()
+            delay = retry_after(response_headers)
+            if status == 429 or delay is not None:
+                pool.bucket.slow_down(delay or 0.0)
+            if retry == self.max_retries:
+                return status, reason, response_headers, body
+            time.sleep(max(delay or 0.0, backoff))
+
+    def request(self, url, headers=None):
+        """
+        Send a GET request, following redirects. Server errors and timeouts are retried, the other statuses are not
+        checked.
+
+            Args:
+                url (str): url of the page
+                headers (dict): additional request headers (for example conditional headers)
+
+            Outputs:
+                status (int), response headers (http.client.HTTPMessage), body (bytes)
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            request_headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity"}
+            request_headers.update(headers or {})
+            status, reason, response_headers, body = \
+                self._send(self._pool(parts.scheme, parts.netloc), url, path, request_headers)
+            if status in (301, 302, 303, 307, 308) and response_headers.get("Location"):
+                url = urljoin(url, response_headers["Location"])
+                continue
+            if status >= 400:
+                raise FetchError(url, status, reason)
+            return status, response_headers, body
+        raise FetchError(url, status, "too many redirects")
+
+    def fetch(self, url):
+        """
+        Download a page, following redirects.
+
+            Args:
+                url (str): url of the page
+
+            Outputs:
+                body (bytes): raw content of the page
+        """
+        return self.request(url)[2]
+
+    def _fetch_concurrently(self, urls):
+        def fetch_one(url):
+            try:
+                return self.fetch(url)
+            except Exception as error:
+                return error
+
+        if len(urls) <= 1:
+            return [fetch_one(url) for url in urls]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            return list(executor.map(fetch_one, urls))
+
+    def fetch_all(self, urls, return_exceptions=False):
+        """
+        Download several pages concurrently. The pages failing with a transient error are put in a queue and
+        downloaded once more after the others, once the circuits of their hosts let requests through again.
+
+            Args:
+                urls (list): urls of the pages
+                return_exceptions (bool): if True, a failed download puts its exception in the output instead of
+                                          raising it
+
+            Outputs:
+                bodies (list): raw content of the pages, in the same order as urls
+        """
+        urls = list(urls)
+        bodies = self._fetch_concurrently(urls)
+        queue = [n for n, body in enumerate(bodies) if isinstance(body, Exception) and is_transient(body)]
+        if queue:
+            hosts = {urlsplit(urls[n])[:2] for n in queue}
+            time.sleep(max(self._pool(*host).breaker.retry_in() for host in hosts))
+            for n, body in zip(queue, self._fetch_concurrently([urls[n] for n in queue])):
+                bodies[n] = body
+        with self._lock:
+            for url, body in zip(urls, bodies):
+                if isinstance(body, Exception):
+                    self.failed_urls[url] = body
+                else:
+                    self.failed_urls.pop(url, None)
+        if not return_exceptions:
+            for body in bodies:
+                if isinstance(body, Exception):
+                    raise body
+        return bodies
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.close()
+
+
+_default_fetcher = None
+
+
+def get_fetcher():
+    """
+    Return the fetcher shared by the scrapers (created on first use).
+    """
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = Fetcher()
+    return _default_fetcher
+
+
+def set_fetcher(fetcher):
+    """
+    Replace the fetcher shared by the scrapers (for example to change the concurrency limits).
+
+        Args:
+            fetcher (Fetcher): new shared fetcher
+
+        Outputs:
+            previous (Fetcher): fetcher that was used before
+    """
+    global _default_fetcher
+    previous, _default_fetcher = _default_fetcher, fetcher
+    return previous
+
+
+def fetch(url):
+    """
+    Download a page with the shared fetcher.
+
+        Args:
+            url (str): url of the page
+
+        Outputs:
+            body (bytes): raw content of the page
+    """
+    return get_fetcher().fetch(url)
+
+
+def fetch_all(urls, return_exceptions=False):
+    """
+    Download several pages concurrently with the shared fetcher.
+
+        Args:
+            urls (list): urls of the pages
+            return_exceptions (bool): if True, failed downloads are returned as exceptions instead of raised
+
+        Outputs:
+            bodies (list): raw content of the pages, in the same order as urls
+    """
+    return get_fetcher().fetch_all(urls, return_exceptions=return_exceptions)
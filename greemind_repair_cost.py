@@ -4,11 +4,44 @@
 # PURPOSE: This file contains the code to scrap the repair cost of phones from https://greenmind.dk/
 
 
-from urllib.request import urlopen
-from bs4 import BeautifulSoup
-import numpy as np
-import pandas as pd
-import re
+from metrics import record_filter, track_stage
+from phone_names import compile_pipeline, lookup, remove_duplicated_words
+from prices import keep_most_expensive, parse_price, parse_prices
+from repair_types import greenmind_classifier
+from shop_engine import Cells, compile_spec, Links, ShopSpec
+from streaming import RepairRow
+import os
+
+
+# Specification of the brand names that appear in the url
+BRANDS = ["samsung", "priser-apple/apple-iphone", "oneplus", "huawei", "lg", "sony", "nokia", "htc"]
+
+# match of phone names with the names used on https://www.gsmarena.com/
+MANUAL_MATCHING = {"HTC One M8": "HTC One (M8)",
+                   "Huawei Honor U8860": "Honor U8860",
+                   "LG Nexus 4": "LG Nexus 4 E960",
+                   "LG Optimus 2X P990": "LG Optimus 2X",
+                   "LG Optimus 4X HD": "LG Optimus 4X HD P880",
+                   "Samsung Galaxy Nexus": "Samsung Galaxy Nexus I9250",
+                   "Samsung Galaxy Note": "Samsung Galaxy Note T879",
+                   "Samsung Galaxy Note 10.1": "Samsung Galaxy Note 10.1 N8000",
+                   "Samsung Galaxy Note 2": "Samsung Galaxy Note II N7100",
+                   "Samsung Galaxy R": "Samsung I9103 Galaxy R",
+                   "Samsung Galaxy S2": "Samsung I9100 Galaxy S II",
+                   "Samsung Galaxy S2 Plus": "Samsung I9105 Galaxy S II Plus",
+                   "Samsung Galaxy S3": "Samsung I9300 Galaxy S III",
+                   "Samsung Galaxy S3 Mini": "Samsung I8190 Galaxy S III mini",
+                   "Samsung Galaxy S4": "Samsung I9500 Galaxy S4",
+                   "Samsung Galaxy S4 Mini": "Samsung I9190 Galaxy S4 mini",
+                   "Samsung Galaxy S8 Plus": "Samsung Galaxy S8+",
+                   "Sony Xperia Z Tablet": "Sony Xperia Tablet Z LTE",
+                   "Sony Xperia Z2 Tablet": "Sony Xperia Z2 Tablet LTE"}
+
+# normalization of the phone names: remove duplicated words (such as OnePlus OnePlus 3 for example), rename iphone SE
+# first and second generation and manual adjustments
+normalize_phone_names = compile_pipeline(remove_duplicated_words,
+                                         lambda x: x.replace("(1. gen.)", "").replace("(2. gen.)", "(2020)"),
+                                         lookup(MANUAL_MATCHING))
 
 
 def extract_phone_repair_cost():
@@ -21,41 +54,40 @@ def extract_phone_repair_cost():
             df : DataFrame containing the phone names and the repair cost for all types of reparations
 
     """
-    # Initialization of the dataframe
-    df = pd.DataFrame(columns=["phone_name", "reparation", "cost"])
-
-    # Specification of the brand names that appear in the url
-    brands = ["samsung", "priser-apple/apple-iphone", "oneplus", "huawei", "lg", "sony", "nokia", "htc"]
-
-    for brand in brands:
-        # we scrap the data brand by brand
-        url = "https://greenmind.dk/reparation/" + brand
-        html = urlopen(url)
-        soup = BeautifulSoup(html, "html.parser")
-        print("extracting data from {} ...".format(url))
-        # we extract the urls corresponding to each of the phones on the page of the brand
-        phones_urls = soup.find_all("a", class_="vc_general vc_btn3 vc_btn3-size-lg vc_btn3-shape-square vc_btn3-style-flat vc_btn3-block vc_btn3-color-grey")
-        phones_urls = [x.get('href') for x in phones_urls]
-
-        for phones_url in phones_urls:
-            # we scrap the data phone by phone for each brand
-            try:
-                html = urlopen(phones_url)
-                soup = BeautifulSoup(html, "html.parser")
-
-                table = soup.find_all("td", style="")
-                table = [x.contents[0] for x in table]
-                table = np.reshape(table, [int(len(table) / 4), 4])
-
-                for n, new_entry in enumerate(table):
-                    new_row = {'phone_name': new_entry[0] + " " + new_entry[1], 'reparation': new_entry[2],
-                           'cost': new_entry[3]}
-                    # print("extracting data for {} ...".format(new_row["phone_name"]))
-                    df = df.append(new_row, ignore_index=True)
-            except:
-                print("Impossible to extract data from {} ...".format(phones_url))
+    import pandas as pd
 
-    return df
+    # the rows are collected in a list and the dataframe is built once at the end
+    rows = [row for _, page_rows in iter_pages() for row in page_rows]
+    return pd.DataFrame(rows, columns=RepairRow._fields)[["phone_name", "reparation", "cost"]]
+
+
+def iter_pages(skip_urls=()):
+    """
+    This function extracts the repair cost from https://greenmind.dk/ phone page by phone page
+
+        Args:
+            skip_urls (set): urls of the phone pages that are not extracted (already extracted by a previous run)
+
+        Output:
+            pages (generator): (phone_url, rows) tuples, rows being a list of RepairRow
+
+    """
+    return PLAN.iter_pages(skip_urls)
+
+
+def screen_stages(rows):
+    """
+    Streaming stages of the rows of a page: keep the screen reparations, convert the price and normalize the phone
+    name.
+
+        Args:
+            rows (iterable): RepairRow extracted from a page
+
+        Output:
+            rows (generator): RepairRow of the screen reparations with a known price
+
+    """
+    return PLAN.screen_stages(rows)
 
 
 def filter_screen_reparation(df):
@@ -63,52 +95,54 @@ def filter_screen_reparation(df):
     This function keep only the rows correponding to screen reparation
 
         Args:
-            df : DataFrame containing all reparations type and cost for available data on https://greenmind.dk/
+            df : DataFrame containing all reparations type and cost (float) for available data on
+                 https://greenmind.dk/
 
         Output:
             df : DataFrame containing only screen reparation cost for available data on https://greenmind.dk/
 
     """
-    # we find the indexes where the name of the reparation type contains skærm or glas
-    index = []
-    vals = df["reparation"].values
-    for val in vals:
-        if (re.match("skærm", val.lower()) is not None) | (re.match("glas", val.lower()) is not None):
-            index.append(True)
-        else:
-            index.append(False)
+    # we find the indexes where the name of the reparation type starts with skærm or glas
+    index = (greenmind_classifier.classify_column(df["reparation"]) == "screen").values
     # we extract the relevant rows
     # we remove the duplicates for which a phone have several screen options (we keep the most expensive one that
     # correspond to a replacement with an original screen
-    df = df.iloc[index].sort_values(by=["phone_name", "cost"]).drop_duplicates(subset="phone_name", keep='last')
-    return df
+    return keep_most_expensive(df.iloc[index], ["phone_name"])
 
 
 def convert_price(price):
     """
-    This function convert a price in a str format ("? kr.") into float.
+    This function convert a price in a str format ("1.299 kr." or "Kontakt os for pris") into float.
 
         Args:
             price: price in a string format ( ?? kr.)
         Output:
-            price: Transformed price in an float format
+            price: Transformed price in an float format, None if the price is unknown
 
     """
-    price = price.replace("Kontakt os for pris", "")[:-4]
-    if price == "":
-        return None
-    else:
-        return float(price)
+    return parse_price(price)
+
 
+# the brand pages link to the phone pages, whose price table has 4 cells per row: brand, model, reparation and cost
+SPEC = ShopSpec(shop="greenmind",
+                start=["https://greenmind.dk/reparation/" + brand for brand in BRANDS],
+                levels=[Links(select=("a", {"class": "vc_general vc_btn3 vc_btn3-size-lg vc_btn3-shape-square "
+                                                     "vc_btn3-style-flat vc_btn3-block vc_btn3-color-grey"}))],
+                cells=Cells(select=("td", {"style": ""}), size=4, row=("{0} {1}", "{2}", "{3}")),
+                names=normalize_phone_names,
+                classifier=greenmind_classifier,
+                output="greenmind_reparations_cost.pkl")
+PLAN = compile_spec(SPEC)
 
-def get_screen_repair_cost_greenmind():
+
+def get_screen_repair_cost_greenmind(output_dir="../data"):
     """
     Main function that extract and preprocess data extracted from https://greenmind.dk/
     It scraps the data from the website, filter reparations that correspond to screen repair price, and preprocess the
     data to save a DataFrame containing name of phones and corresponding screen repair cost.
 
         Args:
-            None
+            output_dir (str): directory where the DataFrame is saved
 
         Output:
             df: DataFrame containing name of phones and corresponding screen repair cost
@@ -119,30 +153,22 @@ def get_screen_repair_cost_greenmind():
 
     df = extract_phone_repair_cost()
 
-    # we keep only the screen reparations cost
-    df = filter_screen_reparation(df)
-
-    # conversion of price from str to float
-    df["cost"] = df["cost"].apply(convert_price)
-
-    # remove duplicated words in the names of phone (such as OnePlus OnePlus 3 for example)
-    df["phone_name"] = df["phone_name"].apply(lambda x: " ".join(list(dict.fromkeys(x.split()))))
+    # conversion of price from str to float, before the most expensive screen option of a phone is chosen
+    df["cost"] = parse_prices(df["cost"])
 
-    # rename iphone SE first and second generation
-    df["phone_name"] = df["phone_name"].apply(lambda x: x.replace("(1. gen.)", "").replace("(2. gen.)", "(2020)"))
-
-    # we remove the reparation type as they all are screen repair
-    df = df[["phone_name", "cost"]]
-
-    # reset index
-    df = df.reset_index().drop("index", axis=1)
+    # we keep only the screen reparations cost, the reparation type is removed as they all are screen repair
+    n_rows = len(df)
+    df = filter_screen_reparation(df)
+    record_filter("greenmind", "screen", n_rows, len(df))
 
-    # manual_adjustments:
-    df["phone_name"] = df["phone_name"].apply(lambda x: manual_match(x))
+    # remove duplicated words, rename iphone SE generations and manual adjustments of the phone names
+    with track_stage("greenmind", "normalize"):
+        df["phone_name"] = normalize_phone_names(df["phone_name"])
 
-    df.to_pickle("../data/greenmind_reparations_cost.pkl")
+    output_path = os.path.join(output_dir, "greenmind_reparations_cost.pkl")
+    df.to_pickle(output_path)
 
-    print("Data saved in ../data/greenmind_reparations_cost.pkl")
+    print("Data saved in {}".format(output_path))
     return df
 
 
@@ -156,31 +182,7 @@ def manual_match(phone_name):
         Outputs:
             phone_name (str): modified name of the phone that matches on gsmarena
     """
-    manual_matching = {"HTC One M8": "HTC One (M8)",
-                       "Huawei Honor U8860": "Honor U8860",
-                       "LG Nexus 4": "LG Nexus 4 E960",
-                       "LG Optimus 2X P990": "LG Optimus 2X",
-                       "LG Optimus 4X HD": "LG Optimus 4X HD P880",
-                       "Samsung Galaxy Nexus": "Samsung Galaxy Nexus I9250",
-                       "Samsung Galaxy Note": "Samsung Galaxy Note T879",
-                       "Samsung Galaxy Note 10.1": "Samsung Galaxy Note 10.1 N8000",
-                       "Samsung Galaxy Note 2": "Samsung Galaxy Note II N7100",
-                       "Samsung Galaxy R": "Samsung I9103 Galaxy R",
-                       "Samsung Galaxy S2": "Samsung I9100 Galaxy S II",
-                       "Samsung Galaxy S2 Plus": "Samsung I9105 Galaxy S II Plus",
-                       "Samsung Galaxy S3": "Samsung I9300 Galaxy S III",
-                       "Samsung Galaxy S3 Mini": "Samsung I8190 Galaxy S III mini",
-                       "Samsung Galaxy S4": "Samsung I9500 Galaxy S4",
-                       "Samsung Galaxy S4 Mini": "Samsung I9190 Galaxy S4 mini",
-                       "Samsung Galaxy S8 Plus": "Samsung Galaxy S8+",
-                       "Sony Xperia Z Tablet": "Sony Xperia Tablet Z LTE",
-                       "Sony Xperia Z2 Tablet": "Sony Xperia Z2 Tablet LTE"}
-
-    if phone_name in manual_matching.keys():
-        phone_name = manual_matching[phone_name]
-    else:
-        pass
-    return phone_name
+    return MANUAL_MATCHING.get(phone_name, phone_name)
 
 
 #if __name__ == '__main__':
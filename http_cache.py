@@ -0,0 +1,302 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the on-disk cache of the downloaded pages. Pages are stored by content hash, keyed by
+#          url, and revalidated with conditional GET requests (ETag / Last-Modified). The rows parsed from a page are
+#          stored next to it, so an unchanged page is neither downloaded nor parsed again.
+
+
+from email.utils import formatdate
+import hashlib
+import json
+import os
+import threading
+import time
+
+from fetcher import Fetcher, get_fetcher, set_fetcher
+
+
+CACHE_DIR = "../data/http_cache"
+# pages younger than TTL are used without contacting the site, older pages are revalidated
+TTL = 12 * 3600
+MAX_BYTES = 500 * 1024 * 1024
+
+
+def _digest(content):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def _write_atomic(path, content):
+    tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class ResponseCache:
+    """
+    On-disk cache of pages with a time to live, a size cap and least recently used eviction.
+
+    Layout of the cache directory:
+        entries/<sha256 of url>.json : url, ETag, Last-Modified, fetch and access times, digest of the body
+        bodies/<sha256 of body>      : raw content of the page
+        rows/<sha256 of body>.<hash of key>.json : rows parsed from the page by the parser named key
+
+        Args:
+            directory (str): cache directory
+            ttl (float): number of seconds during which a page is used without revalidation
+            max_bytes (int): maximum size of the bodies and rows stored in the cache
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=TTL, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        for sub_directory in ["entries", "bodies", "rows"]:
+            os.makedirs(os.path.join(directory, sub_directory), exist_ok=True)
+        self._entries = {}
+        for name in os.listdir(os.path.join(directory, "entries")):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, "entries", name), "rb") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if os.path.exists(self._body_path(entry["digest"])):
+                self._entries[entry["url"]] = entry
+        self._size = self.size()
+
+    def _entry_path(self, url):
+        return os.path.join(self.directory, "entries", _digest(url) + ".json")
+
+    def _body_path(self, digest):
+        return os.path.join(self.directory, "bodies", digest)
+
+    def _rows_path(self, digest, key):
+        return os.path.join(self.directory, "rows", "{}.{}.json".format(digest, _digest(key)[:16]))
+
+    def _save_entry(self, entry):
+        _write_atomic(self._entry_path(entry["url"]), json.dumps(entry).encode("utf-8"))
+
+    def get(self, url):
+        """
+        Return the cache entry of a url.
+
+            Args:
+                url (str): url of the page
+
+            Outputs:
+                entry (dict): url, etag, last_modified, fetched_at, accessed_at, digest and size, or None
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            return dict(entry) if entry is not None else None
+
+    def is_fresh(self, entry):
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def read_body(self, entry):
+        """
+        Read the cached content of a page and mark the entry as recently used.
+        """
+        with open(self._body_path(entry["digest"]), "rb") as f:
+            body = f.read()
+        self.touch(entry["url"])
+        return body
+
+    def touch(self, url, revalidated=False):
+        """
+        Mark an entry as recently used. A revalidated entry is fresh again.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return
+            entry["accessed_at"] = time.time()
+            if revalidated:
+                entry["fetched_at"] = entry["accessed_at"]
+            self._save_entry(entry)
+
+    def put(self, url, body, headers):
+        """
+        Store a downloaded page.
+
+            Args:
+                url (str): url of the page
+                body (bytes): content of the page
+                headers (http.client.HTTPMessage or dict): response headers
+        """
+        digest = _digest(body)
+        now = time.time()
+        entry = {"url": url, "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified"),
+                 "fetched_at": now, "accessed_at": now, "digest": digest, "size": len(body)}
+        with self._lock:
+            body_path = self._body_path(digest)
+            if not os.path.exists(body_path):
+                _write_atomic(body_path, body)
+                self._size += len(body)
+            previous = self._entries.get(url)
+            self._entries[url] = entry
+            self._save_entry(entry)
+            if previous is not None and previous["digest"] != digest:
+                self._remove_content(previous["digest"])
+            self.evict()
+
+    def conditional_headers(self, entry):
+        """
+        Build the headers asking the site to answer 304 Not Modified if the page has not changed.
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        elif not headers:
+            headers["If-Modified-Since"] = formatdate(entry["fetched_at"], usegmt=True)
+        return headers
+
+    def get_rows(self, body, key):
+        """
+        Return the rows parsed from a page by the parser named key, or None if they are not cached.
+        """
+        try:
+            with open(self._rows_path(_digest(body), key), "rb") as f:
+                return [tuple(row) for row in json.load(f)]
+        except (OSError, ValueError):
+            return None
+
+    def put_rows(self, body, key, rows):
+        """
+        Store the rows parsed from a page by the parser named key. Rows must contain str, int, float or None.
+        """
+        content = json.dumps([list(row) for row in rows]).encode("utf-8")
+        path = self._rows_path(_digest(body), key)
+        with self._lock:
+            if os.path.exists(path):
+                self._size -= os.path.getsize(path)
+            _write_atomic(path, content)
+            self._size += len(content)
+            self.evict()
+
+    def size(self):
+        """
+        Size in bytes of the bodies and parsed rows stored in the cache.
+        """
+        total = 0
+        for sub_directory in ["bodies", "rows"]:
+            path = os.path.join(self.directory, sub_directory)
+            for name in os.listdir(path):
+                try:
+                    total += os.path.getsize(os.path.join(path, name))
+                except OSError:
+                    pass
+        return total
+
+    def _remove_content(self, digest):
+        # a body can be shared by several urls, it is only removed when no entry references it anymore
+        if any(entry["digest"] == digest for entry in self._entries.values()):
+            return
+        rows_directory = os.path.join(self.directory, "rows")
+        paths = [self._body_path(digest)] + [os.path.join(rows_directory, name) for name in os.listdir(rows_directory)
+                                              if name.startswith(digest + ".")]
+        for path in paths:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
+
+    def remove(self, url):
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry is None:
+                return
+            try:
+                os.remove(self._entry_path(url))
+            except OSError:
+                pass
+            self._remove_content(entry["digest"])
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is smaller than max_bytes.
+        """
+        with self._lock:
+            if self._size <= self.max_bytes:
+                return
+            for entry in sorted(self._entries.values(), key=lambda x: x["accessed_at"]):
+                if self._size <= self.max_bytes:
+                    break
+                self.remove(entry["url"])
+
+
+class CachingFetcher(Fetcher):
+    """
+    Fetcher serving the pages from a ResponseCache. Fresh pages are read from disk, stale pages are revalidated
+    with a conditional GET and only downloaded again if they have changed.
+
+        Args:
+            cache (ResponseCache): cache of the pages
+            **kwargs: arguments of Fetcher
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def fetch(self, url):
+        entry = self.cache.get(url)
+        if entry is not None and self.cache.is_fresh(entry):
+            return self.cache.read_body(entry)
+        headers = self.cache.conditional_headers(entry) if entry is not None else None
+        status, response_headers, body = self.request(url, headers)
+        if status == 304 and entry is not None:
+            self.cache.touch(url, revalidated=True)
+            return self.cache.read_body(entry)
+        self.cache.put(url, body, response_headers)
+        return body
+
+
+def enable_cache(directory=CACHE_DIR, ttl=TTL, max_bytes=MAX_BYTES):
+    """
+    Make the scrapers use an on-disk cache of the pages.
+
+        Args:
+            directory (str): cache directory
+            ttl (float): number of seconds during which a page is used without revalidation
+            max_bytes (int): maximum size of the cache in bytes
+
+        Outputs:
+            fetcher (CachingFetcher): new shared fetcher
+    """
+    current = get_fetcher()
+    fetcher = CachingFetcher(ResponseCache(directory, ttl, max_bytes), **current.settings())
+    set_fetcher(fetcher)
+    return fetcher
+
+
+def cached_rows(html, key, parse):
+    """
+    Parse a page, reusing the rows stored in the cache if the same page has already been parsed.
+
+        Args:
+            html (bytes): content of the page
+            key (str): name of the parser, change it when the parser output changes
+            parse (callable): function returning the list of rows of a page
+
+        Outputs:
+            rows (list): list of tuples
+    """
+    cache = getattr(get_fetcher(), "cache", None)
+    if cache is None:
+        return parse(html)
+    rows = cache.get_rows(html, key)
+    if rows is None:
+        rows = parse(html)
+        cache.put_rows(html, key, rows)
+    return rows
@@ -0,0 +1,244 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the code to scrap the repair cost of phones from https://ihero.dk/ (port of
+#          Ihero.ipynb). The site is a tree of pages: price index -> brands -> series (Samsung) or phones -> phones.
+#          It is crawled breadth-first: the pages of a level are downloaded concurrently, the links they contain form
+#          the next level and a url already seen is not crawled twice.
+
+
+from collections import namedtuple
+
+from metrics import record_filter, record_rows, track_page, track_stage
+from parsing import parsed_page, Strainer
+from phone_names import compile_pipeline, remove_duplicated_words
+from prices import keep_most_expensive, parse_price, parse_prices
+from repair_types import ihero_classifier
+from shop_engine import run_units
+from streaming import RepairRow
+import os
+import re
+
+
+MAIN_URL = "https://ihero.dk/priser/"
+
+# parts of the pages used by the scraper: the boxes linking to the pages of the next level and the price tables
+PAGE_STRAINER = Strainer(["a", "td"])
+
+# brand names used by the price index for the Apple products and computers
+BRAND_NAMES = {"iPhones": "Apple", "iPads": "Apple", "Mac": "Apple", "PCer": "PC"}
+
+# words of the reparation names of the series pages that are not part of the phone name
+SERIE_REPARATION_REGEX = re.compile(r"Komplet (?:S|s)kærm (?:U|u)dskiftning|LCD Udskiftning|Glas Udskiftning")
+
+normalize_phone_names = compile_pipeline(lambda x: " ".join(x.split()), remove_duplicated_words)
+
+# page of the crawl: kind is "index", "brand", "serie" or "phone", name is the serie or phone name
+Node = namedtuple("Node", ["url", "kind", "brand", "name"])
+
+
+def extract_page(html):
+    """
+    Extract the links to the pages of the next level and the price table of a page.
+
+        Args:
+            html (bytes): content of the page
+
+        Outputs:
+            rows (list): ("box", title, url) tuples for the links and ("price", reparation_name, price) tuples for
+                         the rows of the price table
+    """
+    rows = []
+    with parsed_page(html, PAGE_STRAINER) as soup:
+        for box in soup.find_all("a", class_="brand-box"):
+            title = box.find("span", class_="brand-box-title")
+            if title is not None and box.get("href"):
+                rows.append(("box", title.get_text().strip(), box["href"]))
+        reparation_names = [x.get_text().strip() for x in soup.find_all("td", class_="rep-title")]
+        prices = [x.get_text().strip() for x in soup.find_all("td", class_="tilbuds-pris")]
+    rows += [("price", reparation_name, price) for reparation_name, price in zip(reparation_names, prices)]
+    return rows
+
+
+def child_node(node, title, url):
+    """
+    Build the node of a page linked from another page, None if the link is not followed.
+    """
+    if node.kind == "index":
+        brand = title.replace("Reparation af", "").strip()
+        return Node(url, "brand", BRAND_NAMES.get(brand, brand), None)
+    if node.kind == "brand" and (node.brand == "Samsung" or title.endswith("-Serien")):
+        return Node(url, "serie", node.brand, title.replace("-Serien", "").strip())
+    if node.kind in ("brand", "serie"):
+        return Node(url, "phone", node.brand, node.brand + " " + title)
+    return None
+
+
+def split_serie_line(brand, serie_name, reparation_name):
+    """
+    Find the phones and the reparation of a line of a series page. A line is either a reparation followed by several
+    models of the series ("Skærm Galaxy S7, S7 Edge") or a phone name with the reparation ("Galaxy A5 LCD
+    Udskiftning").
+
+        Args:
+            brand (str): brand of the series
+            serie_name (str): name of the series
+            reparation_name (str): name of the line
+
+        Outputs:
+            phones (list): (phone_name, reparation_name) tuples
+    """
+    if serie_name != "Diverse Modeller":
+        before, found, after = reparation_name.partition(serie_name)
+        if found and before.strip():
+            phone_names = [(serie_name + x.strip()).replace(serie_name[-1] + serie_name[-1], serie_name[-1])
+                           for x in after.split(",") if x.strip()]
+            return [((brand + " " + phone_name).strip(), before.strip()) for phone_name in phone_names]
+    match = SERIE_REPARATION_REGEX.search(reparation_name)
+    phone_name = SERIE_REPARATION_REGEX.sub("", reparation_name).strip()
+    return [((brand + " " + phone_name).strip(), match.group(0) if match else reparation_name)]
+
+
+def page_rows(node, prices):
+    """
+    Build the (phone_name, reparation, price) rows of the price table of a serie or phone page.
+    """
+    if node.kind == "phone":
+        return [(node.name, reparation_name, price) for reparation_name, price in prices]
+    if node.kind == "serie":
+        return [(phone_name, reparation, price) for reparation_name, price in prices
+                for phone_name, reparation in split_serie_line(node.brand, node.name, reparation_name)]
+    return []
+
+
+def iter_pages(skip_urls=()):
+    """
+    Crawl https://ihero.dk/ level by level and extract the repair costs of the serie and phone pages.
+
+        Args:
+            skip_urls (set): urls of the serie and phone pages whose rows are not extracted again (already extracted
+                             by a previous run); the phones of a skipped serie page are still crawled
+
+        Outputs:
+            pages (generator): (url, rows) tuples, rows being a list of RepairRow
+    """
+    from http_cache import cached_rows
+    from urllib.parse import urljoin
+
+    def parse(url, node, html):
+        # the content of a page that has already been parsed is read from the cache
+        with track_page("ihero", url):
+            return cached_rows(html, "ihero.page", extract_page)
+
+    seen = {MAIN_URL}
+    frontier = [Node(MAIN_URL, "index", None, None)]
+    depth = 0
+    while frontier:
+        print("extracting data from {} pages of https://ihero.dk/ ...".format(len(frontier)))
+        # each page is a work unit of the journal, a page still failing after the retries is skipped
+        next_frontier = []
+        for _, node, content in run_units("ihero", [(node.url, node) for node in frontier], depth, parse):
+            for kind, title, href in content:
+                if kind != "box":
+                    continue
+                child = child_node(node, title, urljoin(node.url, href))
+                # a phone page has no link, a skipped one is not downloaded
+                if child is None or child.url in seen or (child.kind == "phone" and child.url in skip_urls):
+                    continue
+                seen.add(child.url)
+                next_frontier.append(child)
+            if node.kind in ("serie", "phone") and node.url not in skip_urls:
+                rows = page_rows(node, [(name, price) for kind, name, price in content if kind == "price"])
+                record_rows("ihero", node.url, len(rows))
+                yield node.url, [RepairRow("ihero", node.url, *row) for row in rows]
+        frontier = next_frontier
+        depth += 1
+
+
+def convert_price(price):
+    """
+    Convert a price ("1.299,-", "GRATIS" or "IKKE PÅ LAGER") into float.
+
+        Args:
+            price (str): raw price extracted
+
+        Outputs:
+            price (float): price of the reparation, None if it is unknown
+    """
+    return parse_price(price)
+
+
+def screen_stages(rows):
+    """
+    Streaming stages of the rows of a page: keep the screen reparations, convert the price and normalize the phone
+    name.
+
+        Args:
+            rows (iterable): RepairRow extracted from a page
+
+        Outputs:
+            rows (generator): RepairRow of the screen reparations with a known price
+    """
+    for row in rows:
+        if ihero_classifier.classify(row.reparation) != "screen":
+            continue
+        cost = convert_price(row.cost)
+        if cost is None:
+            continue
+        yield row._replace(phone_name=normalize_phone_names.normalize_name(row.phone_name), cost=cost)
+
+
+def get_repair_cost_ihero():
+    """
+    Extract the costs of all the reparations from https://ihero.dk/
+
+        Outputs:
+            df (pd.DataFrame): phone_name, repair_type (category of repair_types.IHERO_RULES) and cost columns, one
+                               row per phone and repair type keeping the most expensive reparation
+    """
+    import pandas as pd
+
+    rows = [row for _, page_rows in iter_pages() for row in page_rows]
+    df = pd.DataFrame(rows, columns=RepairRow._fields)
+
+    df["repair_type"] = ihero_classifier.classify_column(df["reparation"])
+    df["cost"] = parse_prices(df["cost"])
+
+    # drop reparations for which cost is unknown
+    n_rows = len(df)
+    df = df.dropna(subset=["cost"])
+    record_filter("ihero", "dropna", n_rows, len(df))
+
+    with track_stage("ihero", "normalize"):
+        df["phone_name"] = normalize_phone_names(df["phone_name"])
+
+    # a phone can have several reparations of a type (for example original and copy screens), we keep the most
+    # expensive one
+    n_rows = len(df)
+    df = keep_most_expensive(df, ["phone_name", "repair_type"])
+    record_filter("ihero", "duplicates", n_rows, len(df))
+    return df[["phone_name", "repair_type", "cost"]]
+
+
+def get_screen_repair_cost_ihero(output_dir="../data"):
+    """
+    Extract the screen repair costs from https://ihero.dk/
+
+        Args:
+            output_dir (str): directory where the DataFrame is saved
+
+        Outputs:
+            df (pd.DataFrame): dataframe containing the screen repair costs for all phone models available.
+    """
+    print("Starting extraction of the repair cost from https://ihero.dk/")
+    df = get_repair_cost_ihero()
+
+    n_rows = len(df)
+    df = df[df["repair_type"] == "screen"][["phone_name", "cost"]].reset_index(drop=True)
+    record_filter("ihero", "screen", n_rows, len(df))
+
+    output_path = os.path.join(output_dir, "ihero_reparations_cost.pkl")
+    df.to_pickle(output_path)
+    print("Data saved in {}".format(output_path))
+
+    return df
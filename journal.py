@@ -0,0 +1,188 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the journal of the work units of a refresh. A work unit is a page of a shop (brand page,
+#          phone page, ...): when its page has been downloaded and parsed, the parsed output (links to the next pages
+#          or rows) is appended to the journal, and a page failing after the retries of the fetcher is recorded as
+#          failed. A run restarted with the same journal reads the finished units from disk and only downloads the
+#          failed and unfinished ones, concurrently like the other pages of their level.
+#          Usage: python journal.py <journal.jsonl> (status of the units of a journal)
+
+
+from contextlib import contextmanager
+import json
+import os
+import sys
+import time
+
+
+# a journal older than this number of seconds belongs to an old run and is started again
+JOURNAL_TTL = 24 * 3600
+
+
+class WorkJournal:
+    """
+    Append-only JSON lines journal of the work units of a run. The first line holds the creation time of the journal,
+    each following line the state of a unit; the last line of a unit wins.
+
+        Args:
+            path (str): path of the file
+            ttl (float): a journal created more than ttl seconds ago is discarded, None to keep it whatever its age
+    """
+
+    def __init__(self, path, ttl=JOURNAL_TTL):
+        self.path = path
+        self.units = {}
+        self.created_at = None
+        self.resumed = 0
+        if os.path.exists(path):
+            self._load(ttl)
+        if self.created_at is None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.created_at = time.time()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"created_at": self.created_at}) + "\n")
+        self.resumed = sum(unit["status"] == "done" for unit in self.units.values())
+
+    def _load(self, ttl):
+        end_of_complete_lines = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # line cut by a crash, the unit is done again
+                    break
+                end_of_complete_lines = f.tell()
+                if "created_at" in record:
+                    self.created_at = record["created_at"]
+                else:
+                    self.units[(record["shop"], record["url"])] = record
+        if self.created_at is None or (ttl is not None and time.time() - self.created_at > ttl):
+            self.units = {}
+            self.created_at = None
+        elif end_of_complete_lines < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(end_of_complete_lines)
+
+    def _append(self, record):
+        self.units[(record["shop"], record["url"])] = record
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def output(self, shop, url):
+        """
+        Return the parsed output of a finished unit, None if the unit has not been done.
+        """
+        unit = self.units.get((shop, url))
+        return unit["output"] if unit is not None and unit["status"] == "done" else None
+
+    def record_done(self, shop, url, level, output):
+        """
+        Record a unit whose page has been downloaded and parsed.
+
+            Args:
+                shop (str): name of the shop
+                url (str): url of the page
+                level (int or str): level of the page in the crawl of the shop
+                output (list): parsed output of the page, made of str, int, float, None, lists and dicts
+        """
+        self._append({"shop": shop, "url": url, "level": level, "status": "done", "output": output})
+
+    def record_failed(self, shop, url, level, error):
+        """
+        Record a unit whose page could not be downloaded after the retries of the fetcher.
+        """
+        self._append({"shop": shop, "url": url, "level": level, "status": "failed",
+                      "error": "{}: {}".format(type(error).__name__, error)})
+
+    def failed(self, shop=None):
+        """
+        Return the failed units (dicts of shop, url, level and error), of a shop or of all the shops.
+        """
+        return [unit for (unit_shop, _), unit in self.units.items()
+                if unit["status"] == "failed" and shop in (None, unit_shop)]
+
+    def counts(self):
+        """
+        Number of units by status.
+        """
+        counts = {"done": 0, "failed": 0}
+        for unit in self.units.values():
+            counts[unit["status"]] += 1
+        return counts
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+_journal = None
+
+
+def get_journal():
+    """
+    Return the journal of the work units of the process, None if the units are not journaled.
+    """
+    return _journal
+
+
+def set_journal(journal):
+    """
+    Replace the journal of the work units of the process.
+
+        Args:
+            journal (WorkJournal): new journal, None to stop journaling
+
+        Outputs:
+            previous (WorkJournal): journal used before
+    """
+    global _journal
+    previous, _journal = _journal, journal
+    return previous
+
+
+@contextmanager
+def journaling(path, ttl=JOURNAL_TTL):
+    """
+    Journal the work units of the scrapers inside the with block. The journal is kept on disk when the block ends,
+    the caller removes it once the results of the run are saved.
+
+        Args:
+            path (str): path of the journal, resumed if it exists and is younger than ttl
+            ttl (float): maximum age in seconds of a journal that is resumed
+
+        Outputs:
+            journal (WorkJournal): journal used inside the with block
+    """
+    journal = WorkJournal(path, ttl)
+    previous = set_journal(journal)
+    try:
+        yield journal
+    finally:
+        set_journal(previous)
+
+
+def main(argv):
+    if len(argv) != 1:
+        print("usage: python journal.py <journal.jsonl>")
+        return 2
+    if not os.path.exists(argv[0]):
+        print("{} does not exist".format(argv[0]))
+        return 1
+    journal = WorkJournal(argv[0], ttl=None)
+    counts = journal.counts()
+    print("{}: created {}, {} units done, {} failed".format(
+        argv[0], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(journal.created_at)), counts["done"],
+        counts["failed"]))
+    for unit in journal.failed():
+        print("  failed {} {} (level {}): {}".format(unit["shop"], unit["url"], unit["level"], unit["error"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,257 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the instrumentation of the scrapers. The fetcher records the network timings (DNS,
+#          connect, time to first byte, download) and size of every response, the parser records the BeautifulSoup
+#          time of the page being extracted, and the shops record the rows yielded by each page, the time of their
+#          stages and the rows dropped by each filter. The metrics are exported as JSON or Prometheus text, or printed
+#          as a summary table telling whether a shop is network-bound or parse-bound.
+
+
+from collections import defaultdict
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+
+NETWORK_TIMINGS = ["dns", "connect", "ttfb", "download"]
+
+
+def _new_page():
+    return {"shop": None, "status": None, "requests": 0, "bytes": 0, "dns": 0.0, "connect": 0.0, "ttfb": 0.0,
+            "download": 0.0, "parse": 0.0, "extract": 0.0, "rows": None}
+
+
+class Metrics:
+    """
+    Metrics of a scraping run: one record per url, the time of the stages and the rows kept by the filters of each
+    shop. The times are in seconds.
+    """
+
+    def __init__(self):
+        self.pages = defaultdict(_new_page)
+        self.stages = defaultdict(float)
+        self.filters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record_request(self, url, status, n_bytes, **timings):
+        """
+        Record a request sent to a host (a page retried or redirected gets several requests).
+
+            Args:
+                url (str): url of the request
+                status (int): HTTP status
+                n_bytes (int): size of the body
+                **timings: dns, connect, ttfb and download times
+        """
+        with self._lock:
+            page = self.pages[url]
+            page["status"] = status
+            page["requests"] += 1
+            page["bytes"] += n_bytes
+            for name, seconds in timings.items():
+                page[name] += seconds
+
+    @contextmanager
+    def page(self, shop, url):
+        """
+        Context of the extraction of a page: its time is recorded as the extract time of the page, and the parse time
+        of the pages parsed inside the context is added to the page.
+        """
+        previous = getattr(self._local, "page", None)
+        self._local.page = (shop, url)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._local.page = previous
+            with self._lock:
+                self.pages[url]["shop"] = shop
+                self.pages[url]["extract"] += seconds
+                self.stages[(shop, "extract")] += seconds
+
+    def record_parse(self, seconds):
+        """
+        Record the BeautifulSoup time of a page, added to the page being extracted by the thread.
+        """
+        shop, url = getattr(self._local, "page", None) or (None, None)
+        with self._lock:
+            if url is not None:
+                self.pages[url]["parse"] += seconds
+            self.stages[(shop, "parse")] += seconds
+
+    def record_rows(self, shop, url, n_rows):
+        with self._lock:
+            page = self.pages[url]
+            page["shop"] = shop
+            page["rows"] = (page["rows"] or 0) + n_rows
+
+    @contextmanager
+    def stage(self, shop, name):
+        """
+        Add the time spent in the context to a stage of a shop (for example "normalize").
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[(shop, name)] += time.perf_counter() - start
+
+    def record_filter(self, shop, name, rows_in, rows_out):
+        """
+        Record the number of rows entering and leaving a filter of a shop (for example "screen" or "dropna").
+        """
+        with self._lock:
+            counts = self.filters.setdefault((shop, name), [0, 0])
+            counts[0] += rows_in
+            counts[1] += rows_out
+
+    def shop_totals(self):
+        """
+        Aggregate the pages of each shop.
+
+            Outputs:
+                totals (dict): shop -> dict of pages, requests, bytes, rows, zero-row pages and stage times
+        """
+        totals = {}
+        with self._lock:
+            for url, page in self.pages.items():
+                total = totals.setdefault(page["shop"], defaultdict(float))
+                total["pages"] += 1
+                total["requests"] += page["requests"]
+                total["bytes"] += page["bytes"]
+                total["rows"] += page["rows"] or 0
+                total["zero_row_pages"] += page["rows"] == 0
+                total["network"] += sum(page[name] for name in NETWORK_TIMINGS)
+                for name in NETWORK_TIMINGS:
+                    total[name] += page[name]
+            for (shop, name), seconds in self.stages.items():
+                totals.setdefault(shop, defaultdict(float))[name] += seconds
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            return {"pages": {url: dict(page) for url, page in self.pages.items()},
+                    "stages": [{"shop": shop, "stage": name, "seconds": seconds}
+                               for (shop, name), seconds in sorted(self.stages.items(), key=str)],
+                    "filters": [{"shop": shop, "filter": name, "rows_in": rows_in, "rows_out": rows_out}
+                                for (shop, name), (rows_in, rows_out) in sorted(self.filters.items(), key=str)]}
+
+    def export_json(self, path):
+        import json
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1, ensure_ascii=False)
+
+    def export_prometheus(self, path):
+        """
+        Write the totals of the shops in the Prometheus text format (the per-url records are only in the JSON).
+        """
+        def label(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+        lines = []
+        totals = self.shop_totals()
+        for metric, key, help_text in [("scrape_pages_total", "pages", "Pages downloaded or extracted"),
+                                       ("scrape_requests_total", "requests", "HTTP requests sent"),
+                                       ("scrape_response_bytes_total", "bytes", "Bytes of the response bodies"),
+                                       ("scrape_rows_total", "rows", "Rows yielded by the pages"),
+                                       ("scrape_zero_row_pages_total", "zero_row_pages", "Pages yielding no row")]:
+            lines += ["# HELP {} {}".format(metric, help_text), "# TYPE {} counter".format(metric)]
+            lines += ['{}{{shop="{}"}} {}'.format(metric, label(shop), int(total[key]))
+                      for shop, total in sorted(totals.items(), key=str)]
+        lines += ["# HELP scrape_stage_seconds_total Time spent in each stage",
+                  "# TYPE scrape_stage_seconds_total counter"]
+        for shop, total in sorted(totals.items(), key=str):
+            for name in NETWORK_TIMINGS + sorted({name for _, name in self.stages}):
+                lines.append('scrape_stage_seconds_total{{shop="{}",stage="{}"}} {:.6f}'.format(
+                    label(shop), name, total.get(name, 0.0)))
+        lines += ["# HELP scrape_filter_rows_total Rows entering (in) and leaving (out) each filter",
+                  "# TYPE scrape_filter_rows_total counter"]
+        with self._lock:
+            filters = sorted(self.filters.items(), key=str)
+        for (shop, name), (rows_in, rows_out) in filters:
+            for direction, count in [("in", rows_in), ("out", rows_out)]:
+                lines.append('scrape_filter_rows_total{{shop="{}",filter="{}",direction="{}"}} {}'.format(
+                    label(shop), label(name), direction, count))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def export(self, path):
+        """
+        Export the metrics as Prometheus text if the path ends with .prom, else as JSON.
+        """
+        if os.path.splitext(path)[1] == ".prom":
+            self.export_prometheus(path)
+        else:
+            self.export_json(path)
+
+    def summary(self, max_zero_row_pages=10):
+        """
+        Summary table of the shops, the filters and the pages yielding no row.
+        """
+        lines = ["{:<20} {:>6} {:>8} {:>8} {:>9} {:>8} {:>9} {:>10} {:>7} {:>6}".format(
+            "shop", "pages", "requests", "MB", "network", "parse", "extract", "normalize", "rows", "empty")]
+        for shop, total in sorted(self.shop_totals().items(), key=str):
+            lines.append("{:<20} {:>6} {:>8} {:>8.2f} {:>8.2f}s {:>7.2f}s {:>8.2f}s {:>9.2f}s {:>7} {:>6}".format(
+                str(shop or "-"), int(total["pages"]), int(total["requests"]), total["bytes"] / 1e6,
+                total["network"], total["parse"], total["extract"], total["normalize"], int(total["rows"]),
+                int(total["zero_row_pages"])))
+        with self._lock:
+            filters = sorted(self.filters.items(), key=str)
+            empty = sorted(url for url, page in self.pages.items() if page["rows"] == 0)
+        if filters:
+            lines.append("")
+            lines.append("{:<20} {:<14} {:>8} {:>8} {:>8}".format("shop", "filter", "in", "out", "dropped"))
+            for (shop, name), (rows_in, rows_out) in filters:
+                lines.append("{:<20} {:<14} {:>8} {:>8} {:>8}".format(str(shop), name, rows_in, rows_out,
+                                                                       rows_in - rows_out))
+        if empty:
+            lines.append("")
+            lines.append("pages yielding no row:")
+            lines += ["  " + url for url in empty[:max_zero_row_pages]]
+            if len(empty) > max_zero_row_pages:
+                lines.append("  ... and {} more".format(len(empty) - max_zero_row_pages))
+        return "\n".join(lines)
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """
+    Return the metrics recorded by the scrapers of the process.
+    """
+    return _metrics
+
+
+def reset_metrics():
+    """
+    Start recording new metrics.
+
+        Outputs:
+            previous (Metrics): metrics recorded until now
+    """
+    global _metrics
+    previous, _metrics = _metrics, Metrics()
+    return previous
+
+
+def track_page(shop, url):
+    return get_metrics().page(shop, url)
+
+
+def track_stage(shop, name):
+    return get_metrics().stage(shop, name)
+
+
+def record_rows(shop, url, n_rows):
+    get_metrics().record_rows(shop, url, n_rows)
+
+
+def record_filter(shop, name, rows_in, rows_out):
+    get_metrics().record_filter(shop, name, rows_in, rows_out)
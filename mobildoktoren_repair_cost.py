@@ -0,0 +1,114 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the code to scrap the repair cost of phones from https://mobildoktoren.dk (port of
+#          mobildoktoren.ipynb). The shop is described by a spec run by shop_engine: the brand grid of the home page
+#          is parsed once, the brand pages are downloaded concurrently and the phone pages of all the brands are
+#          downloaded in concurrent batches.
+
+
+from phone_names import compile_pipeline, remove_duplicated_words
+from prices import parse_price
+from repair_types import mobildoktoren_classifier
+from shop_engine import Cells, compile_spec, Links, ShopSpec
+import re
+
+
+MAIN_URL = "https://mobildoktoren.dk"
+
+normalize_phone_names = compile_pipeline(lambda x: " ".join(x.split()), remove_duplicated_words)
+
+
+def brand_name(_, alt):
+    """
+    Name of a brand from the alt text of its image in the brand grid ("Apple reparationer" -> "Apple").
+    """
+    return alt.replace("reparationer", "").strip()
+
+
+def phone_name(brand, title):
+    """
+    Name of a phone from its brand and the title of its link ("iPhone 11 reparation" -> "Apple iPhone 11").
+    """
+    return (brand + " " + title).replace("reparation", "").strip()
+
+
+def iter_pages(skip_urls=()):
+    """
+    Extract the repair costs phone page by phone page.
+
+        Args:
+            skip_urls (set): urls of the phone pages that are not extracted (already extracted by a previous run)
+
+        Outputs:
+            pages (generator): (phone_url, rows) tuples, rows being a list of RepairRow
+    """
+    return PLAN.iter_pages(skip_urls)
+
+
+def convert_price(price):
+    """
+    Convert a price ("1.299 kr.") into float.
+
+        Args:
+            price (str): raw price extracted
+
+        Outputs:
+            price (float): price of the reparation, None if it is unknown
+    """
+    return parse_price(price)
+
+
+# the brand grid of the home page links to the brand pages (the url is in the onclick attribute of the brand), the
+# brand pages link to the phone pages whose price table has 3 cells per row: reparation, price and order button (an
+# empty order button does not end the table since it is not read)
+SPEC = ShopSpec(shop="mobildoktoren",
+                start=[MAIN_URL],
+                levels=[Links(select=("div", {"onclick": re.compile(r"href='")}), href="@onclick", name="img@alt",
+                              rename=brand_name, pattern=r"href='(.*)';$"),
+                        Links(select=("div", {"class": "tlf"}), href="a@href", name="a@title", rename=phone_name)],
+                cells=Cells(select=("b", {}), size=3, row=("{name}", "{0}", "{1}"),
+                            within=("table", {"id": "repprodukter"}), value="text"),
+                names=normalize_phone_names,
+                classifier=mobildoktoren_classifier,
+                output="mobildoktoren_reparations_cost.pkl")
+PLAN = compile_spec(SPEC)
+
+
+def screen_stages(rows):
+    """
+    Streaming stages of the rows of a page: keep the screen reparations, convert the price and normalize the phone
+    name.
+
+        Args:
+            rows (iterable): RepairRow extracted from a page
+
+        Outputs:
+            rows (generator): RepairRow of the screen reparations with a known price
+    """
+    return PLAN.screen_stages(rows)
+
+
+def get_repair_cost_mobildoktoren():
+    """
+    Extract the costs of all the reparations from https://mobildoktoren.dk
+
+        Outputs:
+            df (pd.DataFrame): phone_name, repair_type (category of repair_types.MOBILDOKTOREN_RULES) and cost
+                               columns, one row per phone and repair type keeping the most expensive reparation
+    """
+    return PLAN.repair_cost()
+
+
+def get_screen_repair_cost_mobildoktoren(output_dir="../data"):
+    """
+    Extract the screen repair costs from https://mobildoktoren.dk
+
+        Args:
+            output_dir (str): directory where the DataFrame is saved
+
+        Outputs:
+            df (pd.DataFrame): dataframe containing the screen repair costs for all phone models available.
+    """
+    print("Starting extraction of the repair cost from https://mobildoktoren.dk")
+    return PLAN.screen_repair_cost(output_dir)
@@ -0,0 +1,197 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the matching of the phone names used by the shops with the canonical model names used
+#          on https://www.gsmarena.com/. The catalog of canonical names is indexed once (blocking by brand and inverted
+#          index of the tokens) so that each name is only compared with the few models sharing its rarest tokens.
+
+
+from collections import defaultdict
+import math
+import re
+
+
+CATALOG_PATH = "../data/gsmarena_models.txt"
+MIN_SCORE = 0.8
+UNKNOWN_TOKEN_WEIGHT = 0.1
+
+TOKEN_REGEX = re.compile(r"[a-z0-9]+|\+")
+# model codes such as I9500 or N7100 are often missing from the shop names, they are not required for a match
+MODEL_CODE_REGEX = re.compile(r"^[a-z]{1,3}\d{3,}[a-z]?$")
+
+
+def tokenize(phone_name):
+    """
+    Split a phone name into lowercase tokens ("+" is read as "plus"). A word followed by a number is merged with it,
+    so that "Note 10" and "Note10" give the same token.
+
+        Args:
+            phone_name (str):
+
+        Outputs:
+            tokens (list): tokens of the name, the first one is the brand
+    """
+    tokens = []
+    for n, token in enumerate(TOKEN_REGEX.findall(phone_name.lower())):
+        if token == "+":
+            token = "plus"
+        if n > 1 and token.isdigit() and tokens[-1].isalpha() and tokens[-1] != "plus":
+            tokens[-1] += token
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def load_catalog(path=CATALOG_PATH):
+    """
+    Read the catalog of canonical model names (one name per line, lines starting with # are ignored).
+
+        Args:
+            path (str): path of the catalog file
+
+        Outputs:
+            names (list): canonical model names
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+class ModelIndex:
+    """
+    Index of canonical model names for fuzzy matching.
+
+    The score of a candidate is the F-measure of the weighted recall (part of the weight of the query tokens found in
+    the candidate) and of the weighted precision (part of the weight of the candidate tokens, model codes excluded,
+    found in the query). Tokens are weighted by their inverse document frequency within the brand, tokens absent from
+    the brand get a small weight.
+
+        Args:
+            names (list): canonical model names
+            overrides (dict): shop name -> canonical name, used before the fuzzy matching (score 1)
+            min_score (float): minimum score of a match
+    """
+
+    def __init__(self, names, overrides=None, min_score=MIN_SCORE):
+        self.names = list(names)
+        self.overrides = dict(overrides or {})
+        self.min_score = min_score
+        self._exact = {}
+        self._tokens = []
+        self._brand = []
+        # (brand, token) -> ids of the names of the brand containing the token
+        self._postings = defaultdict(list)
+        brand_sizes = defaultdict(int)
+        for n, name in enumerate(self.names):
+            tokens = tokenize(name)
+            brand = tokens[0] if tokens else ""
+            self._tokens.append(frozenset(tokens[1:]))
+            self._brand.append(brand)
+            self._exact.setdefault(" ".join(tokens), n)
+            brand_sizes[brand] += 1
+            for token in self._tokens[n]:
+                self._postings[(brand, token)].append(n)
+        self._weights = {key: math.log(1 + brand_sizes[key[0]] / len(ids)) for key, ids in self._postings.items()}
+        self._brand_sizes = dict(brand_sizes)
+
+    def _weight(self, brand, token):
+        # a token absent from the catalog of the brand (such as "Duos" or "4G") cannot tell the models apart
+        return self._weights.get((brand, token), UNKNOWN_TOKEN_WEIGHT)
+
+    def match(self, phone_name):
+        """
+        Find the canonical name of a phone.
+
+            Args:
+                phone_name (str): name used by a shop
+
+            Outputs:
+                canonical_name (str or None), score (float between 0 and 1)
+        """
+        if phone_name in self.overrides:
+            return self.overrides[phone_name], 1.0
+        tokens = tokenize(phone_name)
+        exact = self._exact.get(" ".join(tokens))
+        if exact is not None:
+            return self.names[exact], 1.0
+        if len(tokens) < 2 or tokens[0] not in self._brand_sizes:
+            return None, 0.0
+        brand = tokens[0]
+        query = set(tokens[1:])
+        weights = {token: self._weight(brand, token) for token in query}
+        total = sum(weights.values())
+
+        # a candidate scoring above min_score has a recall above min_score / (2 - min_score), so it must share at
+        # least one of the rarest tokens whose weight exceeds the remaining part of the total
+        min_recall = self.min_score / (2 - self.min_score)
+        candidates = set()
+        prefix_weight = 0.0
+        for token in sorted(query, key=lambda x: -weights[x]):
+            candidates.update(self._postings.get((brand, token), ()))
+            prefix_weight += weights[token]
+            if prefix_weight > (1 - min_recall) * total:
+                break
+
+        best_name, best_score = None, 0.0
+        for n in candidates:
+            shared = sum(weights[token] for token in query & self._tokens[n])
+            candidate_weight = sum(self._weight(brand, token) for token in self._tokens[n]
+                                   if token in query or not MODEL_CODE_REGEX.match(token))
+            recall = shared / total
+            precision = shared / candidate_weight if candidate_weight else 0.0
+            score = 2 * precision * recall / (precision + recall) if shared else 0.0
+            if score > best_score or (score == best_score and best_name is not None
+                                      and len(self.names[n]) < len(best_name)):
+                best_name, best_score = self.names[n], score
+        if best_score < self.min_score:
+            return None, best_score
+        return best_name, best_score
+
+    def match_all(self, phone_names):
+        """
+        Find the canonical names of a batch of phones, each distinct name is matched once.
+
+            Args:
+                phone_names (iterable): names used by the shops
+
+            Outputs:
+                matches (list): (canonical_name, score) tuples in the same order as phone_names
+        """
+        phone_names = list(phone_names)
+        matches = {name: self.match(name) for name in set(phone_names)}
+        return [matches[name] for name in phone_names]
+
+
+def shop_overrides():
+    """
+    Gather the manual tables of the shops, used as overrides of the fuzzy matching.
+
+        Outputs:
+            overrides (dict): shop name -> canonical name
+    """
+    import danishphonerepair_repair_cost
+    import greemind_repair_cost
+    import phone_rep_repair_cost
+    overrides = {}
+    for module in [danishphonerepair_repair_cost, greemind_repair_cost, phone_rep_repair_cost]:
+        overrides.update(module.MANUAL_MATCHING)
+    return overrides
+
+
+def match_phone_names(phone_names, catalog_path=CATALOG_PATH, min_score=MIN_SCORE):
+    """
+    Match a column of shop phone names with the canonical names of a catalog file.
+
+        Args:
+            phone_names (pd.Series): names used by a shop
+            catalog_path (str): path of the catalog file
+            min_score (float): minimum score of a match
+
+        Outputs:
+            df (pd.DataFrame): phone_name, model_name (None when no match is found) and score columns
+    """
+    import pandas as pd
+    index = ModelIndex(load_catalog(catalog_path), shop_overrides(), min_score)
+    matches = index.match_all(phone_names)
+    return pd.DataFrame({"phone_name": list(phone_names),
+                         "model_name": [match[0] for match in matches],
+                         "score": [match[1] for match in matches]})
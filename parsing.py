@@ -0,0 +1,111 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the HTML parsing backend shared by the scrapers. Each scraper declares the part of the
+#          page it needs (a SoupStrainer) and only this part of the tree is built. bs4 is only imported when the
+#          first page is parsed, so the scrapers can be imported without it. The tree of a page is freed as soon as
+#          its rows are extracted, the rows being plain str that do not reference the tree.
+
+
+from contextlib import contextmanager
+import os
+import time
+
+from metrics import get_metrics
+
+
+# parser used by BeautifulSoup: "html.parser" (always available) or "lxml" (faster, needs the lxml package)
+PARSER = os.environ.get("PHONE_PRICES_PARSER", "html.parser")
+# if False, the whole tree is built whatever the strainer (used to check that strained parsing gives the same output)
+STRAIN = True
+# if False, the trees are left to the garbage collector instead of being freed by parsed_page (used to measure the
+# memory held by the trees)
+RELEASE = True
+
+
+def set_parser(parser):
+    """
+    Choose the parser used by the scrapers.
+
+        Args:
+            parser (str): "html.parser" or "lxml"
+
+        Outputs:
+            previous (str): parser used before
+    """
+    global PARSER
+    if parser == "lxml":
+        # raise ImportError now rather than on the first page
+        import lxml  # noqa: F401
+    elif parser != "html.parser":
+        raise ValueError("Unknown parser {}, use html.parser or lxml".format(parser))
+    previous, PARSER = PARSER, parser
+    return previous
+
+
+class Strainer:
+    """
+    SoupStrainer declared by a scraper and built on first use.
+
+        Args:
+            *args, **kwargs: arguments of bs4.SoupStrainer
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self._strainer = None
+
+    def get(self):
+        if self._strainer is None:
+            from bs4 import SoupStrainer
+            self._strainer = SoupStrainer(*self.args, **self.kwargs)
+        return self._strainer
+
+
+def make_soup(html, parse_only=None):
+    """
+    Parse a page. The parse time is recorded in the metrics of the page being extracted.
+
+        Args:
+            html (bytes or str): content of the page
+            parse_only (Strainer or SoupStrainer): part of the page to keep, None to keep the whole page
+
+        Outputs:
+            soup (BeautifulSoup): parsed page
+    """
+    from bs4 import BeautifulSoup
+
+    if isinstance(parse_only, Strainer):
+        parse_only = parse_only.get()
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, PARSER, parse_only=parse_only if STRAIN else None)
+    get_metrics().record_parse(time.perf_counter() - start)
+    return soup
+
+
+@contextmanager
+def parsed_page(html, parse_only=None):
+    """
+    Parse a page for the time of a with block and free its tree at the end of the block. The tree is made of
+    reference cycles (parents, siblings, next elements), so without decompose it stays in memory until a full
+    collection of the garbage collector. The values kept after the block must be converted to str first (a
+    NavigableString references its tree).
+
+        Args:
+            html (bytes or str): content of the page
+            parse_only (Strainer or SoupStrainer): part of the page to keep, None to keep the whole page
+
+        Outputs:
+            soup (BeautifulSoup): parsed page, decomposed when the with block ends
+    """
+    soup = make_soup(html, parse_only)
+    try:
+        yield soup
+    finally:
+        if RELEASE:
+            # the walk of decompose follows next_element, which is None on the BeautifulSoup object itself: the top
+            # level elements are decomposed one by one
+            for element in list(soup.contents):
+                element.decompose()
+            soup.decompose()
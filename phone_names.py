@@ -0,0 +1,80 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the phone name normalization shared by the scrapers. The normalization steps of a shop
+#          are compiled into a single pipeline that runs once per distinct name of a column, the result is then mapped
+#          on the whole column.
+
+
+import re
+
+
+YEAR_REGEX = re.compile(r"\d{4}")
+
+
+def remove_duplicated_words(phone_name):
+    """
+    Remove the duplicated words of a phone name (such as OnePlus OnePlus 3 for example)
+
+        Args:
+            phone_name (str):
+
+        Outputs:
+            phone_name (str):
+    """
+    return " ".join(dict.fromkeys(phone_name.split()))
+
+
+def modify_year(phone_name):
+    """
+    Put some parenthesis around year in the phone name
+
+        Args:
+            phone name (str):
+
+        Outputs:
+            phone_name (str):
+    """
+    try:
+        year = YEAR_REGEX.search(phone_name).group(0)
+        phone_name = phone_name.replace(year, "(" + year + ")")
+    except (AttributeError, TypeError):
+        pass
+    return phone_name
+
+
+def compile_pipeline(*steps):
+    """
+    Compile normalization steps into a function normalizing a whole column of phone names.
+
+        Args:
+            *steps (callable): functions str -> str applied one after the other to each name
+
+        Outputs:
+            normalize (callable): function taking a pd.Series of phone names and returning the normalized pd.Series
+    """
+    def normalize_name(phone_name):
+        for step in steps:
+            phone_name = step(phone_name)
+        return phone_name
+
+    def normalize(phone_names):
+        # the same names appear many times, each distinct name is normalized once
+        distinct_names = phone_names.unique()
+        return phone_names.map(dict(zip(distinct_names, map(normalize_name, distinct_names))))
+
+    normalize.normalize_name = normalize_name
+    return normalize
+
+
+def lookup(table):
+    """
+    Build a normalization step replacing the names found in a table and keeping the others unchanged.
+
+        Args:
+            table (dict): phone name -> replacement name
+
+        Outputs:
+            step (callable): function str -> str
+    """
+    return lambda phone_name: table.get(phone_name, phone_name)
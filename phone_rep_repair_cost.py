@@ -4,99 +4,183 @@
 # PURPOSE: This file contains the code to scrap the repair cost of phones from https://www.phone-rep.dk/
 
 
-from urllib.request import urlopen
-from bs4 import BeautifulSoup
-import pandas as pd
+from metrics import record_filter, track_stage
+from phone_names import compile_pipeline, lookup, remove_duplicated_words
+from prices import keep_most_expensive, parse_price, parse_prices
+from shop_engine import Cells, compile_spec, ShopSpec
+from streaming import RepairRow
+import os
+import re
+
+
+# brand name, url and tablepress id of the brand pages, in the order in which the brand tables are concatenated
+BRAND_PAGES = [("Huawei", "https://www.phone-rep.dk/reparation-af-huawei/", "6"),
+               ("Samsung", "https://www.phone-rep.dk/reparation-af-samsung/", "1"),
+               ("Sony", "https://www.phone-rep.dk/reparation-af-sony/", "26"),
+               ("LG", "https://www.phone-rep.dk/reparation-af-lg/", "3"),
+               ("OnePlus", "https://www.phone-rep.dk/reparation-af-one-plus/", "5"),
+               ("Nokia", "https://www.phone-rep.dk/reparation-af-nokia/", "4"),
+               ("Motorola", "https://www.phone-rep.dk/reparation-af-motorola/", "7")]
+
+# match of phone names with the names used on https://www.gsmarena.com/
+MANUAL_MATCHING = {"Honor 5": "Huawei Y5II",
+                   "Huawei Ascend Mate 7": "Huawei Ascend Mate7",
+                   "Huawei P Smart Plus": "Huawei P Smart+ 2019",
+                   "Huawei P8 Lite": "Huawei P8 Lite (2017)",
+                   "Huawei P8 Max": "Huawei P8max",
+                   "Huawei Y5 (2018)": "Huawei Y5 Prime (2018)",
+                   "Huawei Y5II 3G Honor 5": "Huawei Y5II",
+                   "Huawei Y6 4G": "Huawei Y6 (2019)",
+                   "Huawei Y6 Pro 4G": "Huawei Y6 Pro (2019)",
+                   "Samsung Galaxy A3 (2015)": "Samsung Galaxy A3 (2016)",
+                   "Samsung Galaxy A5 (2015)": "Samsung Galaxy A5 (2016)",
+                   "Samsung Galaxy A5 (2018)": "Samsung Galaxy A5 (2017)",
+                   "Samsung Galaxy A7 (2015)": "Samsung Galaxy A7 (2016)",
+                   "Samsung Galaxy A8 Plus (2018)": "Samsung Galaxy A8+ (2018)",
+                   "Samsung Galaxy J1 (2015)": "Samsung Galaxy J1",
+                   "Samsung Galaxy J4 Plus (2018)": "Samsung Galaxy J4+",
+                   "Samsung Galaxy J6 (2018)": "Samsung Galaxy J6",
+                   "Samsung Galaxy J6 Plus (2018)": "Samsung Galaxy J6+",
+                   "Samsung Galaxy Note 10": "Samsung Galaxy Note10",
+                   "Samsung Galaxy Note 10 Plus": "Samsung Galaxy Note10+",
+                   "Samsung Galaxy Note 8": "Samsung Galaxy Note8",
+                   "Samsung Galaxy Note 9": "Samsung Galaxy Note9",
+                   "Samsung Galaxy S10 Plus": "Samsung Galaxy S10+",
+                   "Samsung Galaxy S20 Plus": "Samsung Galaxy S20+",
+                   "Samsung Galaxy S4": "Samsung I9500 Galaxy S4",
+                   "Samsung Galaxy S4 Mini": "Samsung I9190 Galaxy S4 mini",
+                   "Samsung Galaxy S6 Edge Plus": "Samsung Galaxy S6 edge+",
+                   "Samsung Galaxy S8 Plus": "Samsung Galaxy S8+",
+                   "Samsung Galaxy S9 Plus": "Samsung Galaxy S9+",
+                   "Sony Xperia M4 Aqua + Dualsim": "Sony Xperia M4 Aqua Dual"
+                   }
+
+# cleaning of the phone names: remove the repair details from the names and the duplicated words (such as OnePlus
+# OnePlus 3 for example)
+clean_phone_names = compile_pipeline(lambda x: x.replace("(Original)", "")
+                                                .replace("Skærm", "")
+                                                .replace("/ ", "")
+                                                .replace("()", "")
+                                                .replace("One Plus", "OnePlus")
+                                                .replace("& ", "")
+                                                .strip(),
+                                     remove_duplicated_words)
+
+# manual adjustment of the phone names
+match_phone_names = compile_pipeline(lambda x: x.replace("Huawei Honor", "Honor"), lookup(MANUAL_MATCHING))
+
+
+def convert_cost(cost):
+    """
+    Convert the cost of the screen reparation into float
+
+        Args:
+            cost (str): raw cost extracted ("1.299 kr", "TBA" or "Ring til os")
+
+        Outputs:
+            cost (float): cost of the reparation, None if it is unknown
+    """
+    cost = parse_price(cost)
+    # a screen sold for 0 kr is a placeholder of an unknown price
+    return cost if cost else None
 
 
-def get_brand_df(brand, url, tablepress_id):
+def iter_pages(skip_urls=()):
     """
-    Get the urls of each brands
+    Extract the screen repair costs brand page by brand page.
 
         Args:
-            brand (str): brand name
-            url (str): url
-            tablepress_id (int): number corresponding to the desired table-id when we scrap the data
+            skip_urls (set): urls of the brand pages that are not extracted (already extracted by a previous run)
 
         Outputs:
-            df (pd.DataFrame): dataframe containing the phone repair cost of a brand
+            pages (generator): (url, rows) tuples, rows being a list of RepairRow
+    """
+    return PLAN.iter_pages(skip_urls)
+
 
+def screen_stages(rows):
     """
-    print("extracting data from {} ...".format(url))
-    html = urlopen(url)
-    soup = BeautifulSoup(html, "html.parser")
-    df = pd.DataFrame()
-    df["phone_name"] = [x.contents[0] for x in
-                        soup.find("table", id="tablepress-" + tablepress_id).find_all("td", class_="column-1")]
-    df["cost"] = [x.contents[0] for x in
-                          soup.find("table", id="tablepress-" + tablepress_id).find_all("td", class_="column-3")]
-    df["cost"] = df["cost"].apply(
-        lambda x: int(x.replace("TBA", "0 kr").replace("Ring til os", "0 kr").replace(".", "")[:-3]))
-    df = df.replace(0, float("NaN"))
-    df["phone_name"] = df["phone_name"].apply(lambda x: brand + " " + x)
-    return df
+    Streaming stages of the rows of a page: convert the cost and clean the phone name.
 
+        Args:
+            rows (iterable): RepairRow extracted from a page
 
-def get_screen_repair_cost_phonerep():
+        Outputs:
+            rows (generator): RepairRow with a known cost
+    """
+    for row in rows:
+        cost = convert_cost(row.cost)
+        if cost is None:
+            continue
+        phone_name = clean_phone_names.normalize_name(str(row.phone_name))
+        # the screen of the Lumia 630 and 635 is sold on a single line
+        phone_names = ["Nokia Lumia 630", "Nokia Lumia 635"] if phone_name == "Nokia Lumia 630 635" else [phone_name]
+        for phone_name in phone_names:
+            yield row._replace(phone_name=match_phone_names.normalize_name(phone_name), reparation=str(row.reparation),
+                               cost=cost)
+
+
+# each brand page has a tablepress table whose column-1 cells are the phone names and column-3 cells the screen costs
+SPEC = ShopSpec(shop="phone-rep",
+                start=[(url, {"brand": brand, "tablepress_id": tablepress_id})
+                       for brand, url, tablepress_id in BRAND_PAGES],
+                levels=[],
+                cells=Cells(select=("td", {"class": re.compile(r"\bcolumn-[13]\b")}), size=2,
+                            row=("{brand} {0}", "skærm", "{1}"),
+                            within=("table", {"id": "tablepress-{tablepress_id}"})),
+                names=clean_phone_names,
+                output="repair_cost_phone_republic.pkl")
+PLAN = compile_spec(SPEC)
+
+
+def get_screen_repair_cost_phonerep(output_dir="../data"):
     """
     Extract the repair costs from https://www.phone-rep.dk/
 
         Args:
-            None
+            output_dir (str): directory where the DataFrame is saved
 
         Outputs:
             df (pd.DataFrame): dataframe containing the screen repair costs for all phone models available.
 
     """
-    print("Starting extraction of the repair cost from https://www.phone-rep.dk/")
-
-    df_samsung = get_brand_df(brand="Samsung", url="https://www.phone-rep.dk/reparation-af-samsung/", tablepress_id="1")
-    df_huawei = get_brand_df(brand="Huawei", url="https://www.phone-rep.dk/reparation-af-huawei/", tablepress_id="6")
-    df_sony = get_brand_df(brand="Sony", url="https://www.phone-rep.dk/reparation-af-sony/", tablepress_id="26")
-    df_lg = get_brand_df(brand="LG", url="https://www.phone-rep.dk/reparation-af-lg/", tablepress_id="3")
-    df_oneplus = get_brand_df(brand="OnePlus", url="https://www.phone-rep.dk/reparation-af-one-plus/",
-                              tablepress_id="5")
-    df_nokia = get_brand_df(brand="Nokia", url="https://www.phone-rep.dk/reparation-af-nokia/", tablepress_id="4")
-    df_motorola = get_brand_df(brand="Motorola", url="https://www.phone-rep.dk/reparation-af-motorola/",
-                               tablepress_id="7")
-
-    df = pd.DataFrame()
+    import pandas as pd
 
-    # df_lg["name"] = df_lg["name"].apply(lambda x: x.replace("LG LG", "LG"))
-
-    # df_oneplus["name"] = df_oneplus["name"].apply(lambda x: x.replace(" Skærm", ""))
-    # df_oneplus.drop(11, inplace=True)
-    # df_oneplus.drop(12, inplace=True)
-
-    df = df.append([df_huawei, df_samsung, df_sony, df_lg, df_oneplus, df_nokia, df_motorola], ignore_index=True)
+    print("Starting extraction of the repair cost from https://www.phone-rep.dk/")
 
-    df["phone_name"] = df["phone_name"].apply(lambda x: x.replace("(Original)", "")
-                                              .replace("Skærm", "")
-                                              .replace("/ ", "")
-                                              .replace("()", "")
-                                              .replace("One Plus", "OnePlus")
-                                              .replace("& ", "")
-                                              .strip())
+    # the rows of the brand pages are gathered in the order of BRAND_PAGES and the dataframe is built once
+    rows = [row for _, page_rows in iter_pages() for row in page_rows]
+    df = pd.DataFrame(rows, columns=RepairRow._fields)[["phone_name", "cost"]]
+    df["cost"] = parse_prices(df["cost"]).replace(0, float("NaN"))
 
-    # remove duplicated words in the names of phone (such as OnePlus OnePlus 3 for example)
-    df["phone_name"] = df["phone_name"].apply(lambda x: " ".join(list(dict.fromkeys(x.split()))))
+    # remove the repair details and the duplicated words in the names of phone
+    with track_stage("phone-rep", "normalize"):
+        df["phone_name"] = clean_phone_names(df["phone_name"])
 
+    n_rows = len(df)
     df = df.dropna(subset=["cost"], axis=0)
-    df = df.drop([199, 200])
+    record_filter("phone-rep", "dropna", n_rows, len(df))
+
+    # the screen of the Lumia 630 and 635 is sold on a single line
+    lumia = df["phone_name"] == "Nokia Lumia 630 635"
+    if lumia.any():
+        screen_price = df.loc[lumia, "cost"].iloc[0]
+        df = pd.concat([df[~lumia], pd.DataFrame({"phone_name": ["Nokia Lumia 630", "Nokia Lumia 635"],
+                                                  "cost": [screen_price, screen_price]})], ignore_index=True)
 
-    screen_price = df[df["phone_name"] == "Nokia Lumia 630 635"]["cost"].values[0]
-    df.append(pd.Series({"phone_name": "Nokia Lumia 630", "cost": screen_price}),
-              ignore_index=True)
-    df = df.append(pd.Series({"phone_name": "Nokia Lumia 635", "cost": screen_price}),
-                   ignore_index=True)
-    df = df.drop(df[df["phone_name"] == "Nokia Lumia 630 635"].index, axis=0)
+    # a phone listed on several lines (for example original and copy screens, whose names are the same once the repair
+    # details are removed) keeps the most expensive screen
+    n_rows = len(df)
+    df = keep_most_expensive(df, ["phone_name"])
+    record_filter("phone-rep", "duplicates", n_rows, len(df))
 
     # manual adjustment
-    df["phone_name"] = df["phone_name"].apply(lambda x: x.replace("Huawei Honor", "Honor"))
-    df["phone_name"] = df["phone_name"].apply(lambda x: manual_match(x))
+    with track_stage("phone-rep", "normalize"):
+        df["phone_name"] = match_phone_names(df["phone_name"])
 
-    df.to_pickle("../data/repair_cost_phone_republic.pkl")
-    print("Data saved in ../data/repair_cost_phone_republic.pkl")
+    output_path = os.path.join(output_dir, "repair_cost_phone_republic.pkl")
+    df.to_pickle(output_path)
+    print("Data saved in {}".format(output_path))
 
     return df
 
@@ -112,40 +196,4 @@ def manual_match(phone_name):
         Output:
             phone_name (str):
     """
-    manual_matching = {"Honor 5": "Huawei Y5II",
-                       "Huawei Ascend Mate 7": "Huawei Ascend Mate7",
-                       "Huawei P Smart Plus": "Huawei P Smart+ 2019",
-                       "Huawei P8 Lite": "Huawei P8 Lite (2017)",
-                       "Huawei P8 Max": "Huawei P8max",
-                       "Huawei Y5 (2018)": "Huawei Y5 Prime (2018)",
-                       "Huawei Y5II 3G Honor 5": "Huawei Y5II",
-                       "Huawei Y6 4G": "Huawei Y6 (2019)",
-                       "Huawei Y6 Pro 4G": "Huawei Y6 Pro (2019)",
-                       "Samsung Galaxy A3 (2015)": "Samsung Galaxy A3 (2016)",
-                       "Samsung Galaxy A5 (2015)": "Samsung Galaxy A5 (2016)",
-                       "Samsung Galaxy A5 (2018)": "Samsung Galaxy A5 (2017)",
-                       "Samsung Galaxy A7 (2015)": "Samsung Galaxy A7 (2016)",
-                       "Samsung Galaxy A8 Plus (2018)": "Samsung Galaxy A8+ (2018)",
-                       "Samsung Galaxy J1 (2015)": "Samsung Galaxy J1",
-                       "Samsung Galaxy J4 Plus (2018)": "Samsung Galaxy J4+",
-                       "Samsung Galaxy J6 (2018)": "Samsung Galaxy J6",
-                       "Samsung Galaxy J6 Plus (2018)": "Samsung Galaxy J6+",
-                       "Samsung Galaxy Note 10": "Samsung Galaxy Note10",
-                       "Samsung Galaxy Note 10 Plus": "Samsung Galaxy Note10+",
-                       "Samsung Galaxy Note 8": "Samsung Galaxy Note8",
-                       "Samsung Galaxy Note 9": "Samsung Galaxy Note9",
-                       "Samsung Galaxy S10 Plus": "Samsung Galaxy S10+",
-                       "Samsung Galaxy S20 Plus": "Samsung Galaxy S20+",
-                       "Samsung Galaxy S4": "Samsung I9500 Galaxy S4",
-                       "Samsung Galaxy S4 Mini": "Samsung I9190 Galaxy S4 mini",
-                       "Samsung Galaxy S6 Edge Plus": "Samsung Galaxy S6 edge+",
-                       "Samsung Galaxy S8 Plus": "Samsung Galaxy S8+",
-                       "Samsung Galaxy S9 Plus": "Samsung Galaxy S9+",
-                       "Sony Xperia M4 Aqua + Dualsim": "Sony Xperia M4 Aqua Dual"
-                       }
-
-    if phone_name in manual_matching.keys():
-        phone_name = manual_matching[phone_name]
-    else:
-        pass
-    return phone_name
+    return MANUAL_MATCHING.get(phone_name, phone_name)
@@ -0,0 +1,250 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the SQLite history of the repair prices. Each scrape of a shop is ingested in one
+#          transaction; a price is only stored again when it changes, so the history holds one validity interval per
+#          (shop, phone, repair, price) instead of one row per nightly snapshot. The intervals are indexed by phone and
+#          by date, which answers "price of a phone at a shop on a date" and "changes of the last run" directly.
+
+
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta, timezone
+import sqlite3
+
+from price_store import cost_to_ore, to_utc
+
+
+HISTORY_PATH = "../data/price_history.sqlite"
+
+# a price interval is valid from valid_from (included) to valid_to (excluded), valid_to is NULL while it is current;
+# the times are UTC "YYYY-MM-DD HH:MM:SS" strings, their order is the order of the strings
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    shop TEXT NOT NULL,
+    repair_type TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    n_rows INTEGER NOT NULL,
+    n_changes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_shop ON runs (shop, repair_type, scraped_at);
+CREATE TABLE IF NOT EXISTS prices (
+    shop TEXT NOT NULL,
+    phone_name TEXT NOT NULL,
+    repair_type TEXT NOT NULL,
+    price_ore INTEGER,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT
+);
+CREATE INDEX IF NOT EXISTS prices_phone ON prices (phone_name, shop, repair_type, valid_from);
+CREATE INDEX IF NOT EXISTS prices_from ON prices (valid_from);
+CREATE INDEX IF NOT EXISTS prices_to ON prices (valid_to);
+CREATE INDEX IF NOT EXISTS prices_current ON prices (shop, repair_type, phone_name) WHERE valid_to IS NULL;
+"""
+
+# change of price between two runs, old_price_ore is None for a new phone and new_price_ore for a removed phone
+PriceChange = namedtuple("PriceChange", ["shop", "phone_name", "repair_type", "old_price_ore", "new_price_ore",
+                                         "changed_at"])
+
+
+def parse_time(value):
+    """
+    Read an ISO string as a date if it has no time part ("2026-10-17"), else as a datetime.
+    """
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
+def to_timestamp(value):
+    """
+    Convert a datetime (naive datetimes are UTC, see price_store.to_utc), a date (its midnight) or an ISO string
+    (read by parse_time) into a history time string.
+    """
+    if isinstance(value, str):
+        value = parse_time(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time())
+    return to_utc(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class PriceHistory:
+    """
+    History of the repair prices of the shops, stored in a SQLite file.
+
+        Args:
+            path (str): path of the database file, ":memory:" for a temporary database
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        # isolation_level=None: the transactions are opened explicitly, each ingest is one transaction
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def ingest(self, df, shop, scraped_at=None, repair_type="screen"):
+        """
+        Add the result of a scrape: the intervals of the changed and removed phones are closed and new intervals are
+        opened for the changed and new phones, unchanged prices are left as they are.
+
+            Args:
+                df (pd.DataFrame): phone_name and cost (in kr) columns, one row per phone
+                shop (str): name of the shop
+                scraped_at (datetime): scrape time, now by default; must be later than the previous run of the shop
+                repair_type (str): repair type of the costs
+
+            Outputs:
+                n_changes (int): number of new, changed and removed prices
+        """
+        scraped_at = to_timestamp(scraped_at or datetime.now(timezone.utc))
+        rows = [(str(name), cost_to_ore(cost)) for name, cost in zip(df["phone_name"], df["cost"])]
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            last_run = cursor.execute("SELECT MAX(scraped_at) FROM runs WHERE shop = ? AND repair_type = ?",
+                                      (shop, repair_type)).fetchone()[0]
+            if last_run is not None and scraped_at <= last_run:
+                raise ValueError("scrape of {} at {} is not later than the last run ({})".format(shop, scraped_at,
+                                                                                            last_run))
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS scrape (phone_name TEXT PRIMARY KEY, price_ore INTEGER)")
+            cursor.execute("DELETE FROM scrape")
+            cursor.executemany("INSERT OR REPLACE INTO scrape VALUES (?, ?)", rows)
+            n_removed = cursor.execute("""SELECT COUNT(*) FROM prices
+                                          WHERE shop = ? AND repair_type = ? AND valid_to IS NULL AND NOT EXISTS (
+                                              SELECT 1 FROM scrape WHERE scrape.phone_name = prices.phone_name)""",
+                                       (shop, repair_type)).fetchone()[0]
+            # close the current intervals whose phone is missing from the scrape or has another price
+            cursor.execute("""UPDATE prices SET valid_to = ?
+                              WHERE shop = ? AND repair_type = ? AND valid_to IS NULL AND NOT EXISTS (
+                                  SELECT 1 FROM scrape WHERE scrape.phone_name = prices.phone_name
+                                  AND scrape.price_ore IS prices.price_ore)""",
+                           (scraped_at, shop, repair_type))
+            # open an interval for the phones left without a current interval
+            cursor.execute("""INSERT INTO prices (shop, phone_name, repair_type, price_ore, valid_from)
+                              SELECT ?, phone_name, ?, price_ore, ? FROM scrape WHERE NOT EXISTS (
+                                  SELECT 1 FROM prices
+                                  WHERE prices.shop = ? AND prices.repair_type = ? AND prices.valid_to IS NULL
+                                  AND prices.phone_name = scrape.phone_name)""",
+                           (shop, repair_type, scraped_at, shop, repair_type))
+            n_changes = cursor.rowcount + n_removed
+            cursor.execute("INSERT INTO runs (shop, repair_type, scraped_at, n_rows, n_changes) "
+                           "VALUES (?, ?, ?, ?, ?)", (shop, repair_type, scraped_at, len(rows), n_changes))
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        return n_changes
+
+    def price_at(self, phone_name, shop, when, repair_type="screen"):
+        """
+        Find the price of a phone at a shop at a given time.
+
+            Args:
+                phone_name (str): name of the phone
+                shop (str): name of the shop
+                when (datetime, date or str): time of the price; for a date or an ISO string without time, the last
+                                              price of the day
+                repair_type (str): repair type
+
+            Outputs:
+                price_ore (int): price in øre, None if the phone was not sold at that time
+        """
+        if isinstance(when, str):
+            when = parse_time(when)
+        if isinstance(when, date) and not isinstance(when, datetime):
+            when = when + timedelta(days=1)
+            strict = True
+        else:
+            strict = False
+        when = to_timestamp(when)
+        row = self.connection.execute(
+            """SELECT price_ore FROM prices
+               WHERE phone_name = ? AND shop = ? AND repair_type = ? AND valid_from {} ?
+               AND (valid_to IS NULL OR valid_to {} ?)
+               ORDER BY valid_from DESC LIMIT 1""".format("<" if strict else "<=", ">=" if strict else ">"),
+            (phone_name, shop, repair_type, when, when)).fetchone()
+        return row[0] if row is not None else None
+
+    def price_series(self, phone_name, shop=None, repair_type="screen"):
+        """
+        Return the validity intervals of the prices of a phone.
+
+            Args:
+                phone_name (str): name of the phone
+                shop (str): name of the shop, None for all the shops
+                repair_type (str): repair type
+
+            Outputs:
+                intervals (list): (shop, price_ore, valid_from, valid_to) tuples ordered by shop and time
+        """
+        query = "SELECT shop, price_ore, valid_from, valid_to FROM prices WHERE phone_name = ? AND repair_type = ?"
+        parameters = [phone_name, repair_type]
+        if shop is not None:
+            query += " AND shop = ?"
+            parameters.append(shop)
+        return self.connection.execute(query + " ORDER BY shop, valid_from", parameters).fetchall()
+
+    def changes_since(self, since, shop=None):
+        """
+        List the price changes made by the runs after a given time.
+
+            Args:
+                since (datetime, date or str): changes made strictly after this time are listed, None for all
+                shop (str): name of the shop, None for all the shops
+
+            Outputs:
+                changes (list): PriceChange ordered by time, shop and phone
+        """
+        since = "" if since is None else to_timestamp(since)
+        shop_condition = "" if shop is None else " AND {}.shop = :shop"
+        rows = self.connection.execute(
+            """SELECT new.shop, new.phone_name, new.repair_type, old.price_ore, new.price_ore, new.valid_from
+               FROM prices AS new LEFT JOIN prices AS old
+               ON old.phone_name = new.phone_name AND old.shop = new.shop AND old.repair_type = new.repair_type
+               AND old.valid_to = new.valid_from
+               WHERE new.valid_from > :since""" + shop_condition.format("new") + """
+               UNION ALL
+               SELECT old.shop, old.phone_name, old.repair_type, old.price_ore, NULL, old.valid_to
+               FROM prices AS old
+               WHERE old.valid_to > :since""" + shop_condition.format("old") + """ AND NOT EXISTS (
+                   SELECT 1 FROM prices AS new
+                   WHERE new.phone_name = old.phone_name AND new.shop = old.shop AND new.repair_type = old.repair_type
+                   AND new.valid_from = old.valid_to)
+               ORDER BY 6, 1, 2""",
+            {"since": since, "shop": shop}).fetchall()
+        return [PriceChange(*row) for row in rows]
+
+    def last_run_changes(self, shop=None):
+        """
+        List the price changes made by the last run of each shop, compared with the run before it.
+
+            Args:
+                shop (str): name of the shop, None for all the shops
+
+            Outputs:
+                changes (list): PriceChange ordered by shop, time and phone
+        """
+        query = "SELECT DISTINCT shop FROM runs" if shop is None else "SELECT ?"
+        shops = [row[0] for row in self.connection.execute(query, () if shop is None else (shop,))]
+        changes = []
+        for shop in sorted(shops):
+            runs = self.connection.execute("SELECT scraped_at FROM runs WHERE shop = ? "
+                                           "ORDER BY scraped_at DESC LIMIT 2", (shop,)).fetchall()
+            if not runs:
+                continue
+            # all the phones of a first run are new
+            since = runs[1][0] if len(runs) > 1 else None
+            changes += self.changes_since(since, shop)
+        return changes
@@ -0,0 +1,346 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the in-memory index of the latest prices of all the shops. The latest result of each
+#          shop is loaded once, its phone names are matched with the canonical model names and the prices of every
+#          (model, repair type) are gathered with their cheapest shop and median, so a price query is a dictionary
+#          lookup. Only the shops whose result file changed are loaded again. The index can be served over HTTP.
+#          Usage: python price_index.py serve [--port PORT] [--output-dir DIR] [--store-dir DIR]
+#                 python price_index.py query <model> [model ...] [--repair-type TYPE]
+
+
+import argparse
+from collections import namedtuple
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import glob
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from model_matching import CATALOG_PATH, ModelIndex, load_catalog, shop_overrides, tokenize
+from price_store import cost_to_ore, FORMATS, read_file
+from prices import most_expensive
+
+
+# result file of each shop in the output directory of the get_screen_repair_cost_* functions
+RESULT_FILES = {"greenmind": "greenmind_reparations_cost.pkl",
+                "danishphonerepair": "danishphonerepair_reparations_cost.pkl",
+                "phone-rep": "repair_cost_phone_republic.pkl",
+                "ihero": "ihero_reparations_cost.pkl",
+                "mobildoktoren": "mobildoktoren_reparations_cost.pkl"}
+PORT = 8765
+RELOAD_INTERVAL = 10
+# number of names of queries whose canonical name is kept, the names of the shops are always kept
+QUERY_CACHE_SIZE = 10000
+
+# prices of a (model, repair type): shop -> price in øre, with the cheapest shop and the median price (rounded to an
+# integer number of øre) precomputed
+PriceEntry = namedtuple("PriceEntry", ["prices", "cheapest_shop", "cheapest_price_ore", "median_price_ore"])
+
+
+def make_entry(prices):
+    cheapest_shop = min(prices, key=lambda shop: (prices[shop], shop))
+    # the median of an even number of shops can fall between two øre
+    return PriceEntry(prices, cheapest_shop, prices[cheapest_shop], int(round(statistics.median(prices.values()))))
+
+
+def read_result(path):
+    """
+    Read a result file (pickle of a get_screen_repair_cost_* function or file of the price store).
+
+        Args:
+            path (str): path of the file
+
+        Outputs:
+            rows (list): (phone_name, repair_type, price_ore) tuples
+    """
+    if path.endswith(".pkl"):
+        import pandas as pd
+        df = pd.read_pickle(path)
+        repair_types = df["repair_type"] if "repair_type" in df.columns else ["screen"] * len(df)
+        return [(str(name), repair_type, cost_to_ore(cost))
+                for name, repair_type, cost in zip(df["phone_name"], repair_types, df["cost"])]
+    columns = read_file(path, ["phone_name", "repair_type", "price_ore"]).to_pydict()
+    return list(zip(columns["phone_name"], columns["repair_type"], columns["price_ore"]))
+
+
+class PriceIndex:
+    """
+    Index of the latest prices of the shops by canonical model name and repair type.
+
+        Args:
+            output_dir (str): directory of the result pickles of the shops (see RESULT_FILES)
+            store_dir (str): directory of the price store, used instead of the pickles when given
+            catalog_path (str): catalog of the canonical model names, the names are only normalized (case, spaces,
+                                "+") when the file does not exist
+    """
+
+    def __init__(self, output_dir="../data", store_dir=None, catalog_path=CATALOG_PATH):
+        self.output_dir = output_dir
+        self.store_dir = store_dir
+        if os.path.exists(catalog_path):
+            self.model_index = ModelIndex(load_catalog(catalog_path), shop_overrides())
+        else:
+            self.model_index = None
+        self._models = {}
+        # the names sent to the endpoint are chosen by the clients, their cache is bounded
+        self._query_models = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._match)
+        self._sources = {}
+        self._shop_prices = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        self.reload()
+
+    def _match(self, phone_name):
+        model = None
+        if self.model_index is not None:
+            model = self.model_index.match(phone_name)[0]
+        if model is None:
+            model = " ".join(tokenize(phone_name))
+        return model
+
+    def shop_model_name(self, phone_name):
+        """
+        Canonical model name of a phone name used by a shop, kept for the next loads of the result files.
+        """
+        try:
+            return self._models[phone_name]
+        except KeyError:
+            pass
+        model = self._models[phone_name] = self._match(phone_name)
+        return model
+
+    def model_name(self, phone_name):
+        """
+        Canonical model name of a phone name used by a shop or by a query.
+        """
+        try:
+            return self._models[phone_name]
+        except KeyError:
+            return self._query_models(phone_name)
+
+    def latest_files(self):
+        """
+        Find the latest result file of each shop.
+
+            Outputs:
+                files (dict): shop -> (path, modification time)
+        """
+        files = {}
+        if self.store_dir is not None:
+            for directory in glob.glob(os.path.join(self.store_dir, "shop=*")):
+                paths = [path for extension in FORMATS.values()
+                         for path in glob.glob(os.path.join(directory, "date=*", "*" + extension))]
+                if paths:
+                    # the dates and times in the paths sort in chronological order
+                    path = max(paths, key=lambda x: (os.path.basename(os.path.dirname(x)), os.path.basename(x)))
+                    files[os.path.basename(directory)[len("shop="):]] = (path, os.path.getmtime(path))
+        else:
+            for shop, file_name in RESULT_FILES.items():
+                path = os.path.join(self.output_dir, file_name)
+                if os.path.exists(path):
+                    files[shop] = (path, os.path.getmtime(path))
+        return files
+
+    def reload(self):
+        """
+        Load the result files that appeared or changed since the last load and update the prices of their models.
+
+            Outputs:
+                shops (list): shops whose prices were loaded again
+        """
+        with self._lock:
+            files = self.latest_files()
+            changed = [shop for shop in files if self._sources.get(shop) != files[shop]]
+            removed = [shop for shop in self._sources if shop not in files]
+            touched = set()
+            for shop in changed + removed:
+                touched.update(self._shop_prices.pop(shop, {}))
+            for shop in changed:
+                prices = {}
+                for phone_name, repair_type, price_ore in read_result(files[shop][0]):
+                    if price_ore is None:
+                        continue
+                    key = (self.shop_model_name(phone_name), repair_type)
+                    # several names of a shop can be the same model, the most expensive price is kept as in the
+                    # merged tables of prices.merge_shop_prices
+                    prices[key] = most_expensive(price_ore, prices.get(key))
+                self._shop_prices[shop] = prices
+                touched.update(prices)
+            # queries keep reading the previous entries until the new ones are complete
+            entries = dict(self._entries)
+            for key in touched:
+                prices = {shop: shop_prices[key] for shop, shop_prices in self._shop_prices.items()
+                          if key in shop_prices}
+                if prices:
+                    entries[key] = make_entry(prices)
+                else:
+                    entries.pop(key, None)
+            self._entries = entries
+            self._sources = files
+            self.loaded_at = time.time()
+            return changed + removed
+
+    def entry(self, model, repair_type="screen"):
+        """
+        Prices of a model.
+
+            Args:
+                model (str): model name, canonical or as written by a shop
+                repair_type (str): repair type
+
+            Outputs:
+                entry (PriceEntry): prices by shop (most expensive price of each shop), cheapest shop and price,
+                                    median price; None if no shop has a price
+        """
+        return self._entries.get((self.model_name(model), repair_type))
+
+    def shop_prices(self, model, repair_type="screen"):
+        entry = self.entry(model, repair_type)
+        return dict(entry.prices) if entry is not None else {}
+
+    def cheapest(self, model, repair_type="screen"):
+        """
+        Return (shop, price in øre) of the cheapest shop, None if no shop has a price.
+        """
+        entry = self.entry(model, repair_type)
+        return (entry.cheapest_shop, entry.cheapest_price_ore) if entry is not None else None
+
+    def median(self, model, repair_type="screen"):
+        """
+        Return the median price in øre of the shops (rounded to an integer), None if no shop has a price.
+        """
+        entry = self.entry(model, repair_type)
+        return entry.median_price_ore if entry is not None else None
+
+    def quote(self, models, repair_type="screen"):
+        """
+        Prices of a batch of models.
+
+            Args:
+                models (list): model names, canonical or as written by a shop
+                repair_type (str): repair type
+
+            Outputs:
+                quotes (list): one dict per model with its canonical name, the prices by shop, the cheapest shop and
+                               price and the median price (prices in øre, None when no shop has a price)
+        """
+        quotes = []
+        for model in models:
+            canonical = self.model_name(model)
+            entry = self._entries.get((canonical, repair_type))
+            quote = {"model": model, "model_name": canonical, "repair_type": repair_type, "prices": {},
+                     "cheapest_shop": None, "cheapest_price_ore": None, "median_price_ore": None}
+            if entry is not None:
+                quote.update(prices=dict(entry.prices), cheapest_shop=entry.cheapest_shop,
+                             cheapest_price_ore=entry.cheapest_price_ore, median_price_ore=entry.median_price_ore)
+            quotes.append(quote)
+        return quotes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def make_handler(index, reload_interval=RELOAD_INTERVAL):
+    """
+    Build the request handler of the HTTP endpoint:
+        GET  /quote?model=<name>&model=<name>&repair_type=<type>
+        POST /quote with a JSON body {"models": [...], "repair_type": ...}
+        GET  /health
+    The result files are checked for changes at most every reload_interval seconds.
+    """
+
+    class PriceIndexHandler(BaseHTTPRequestHandler):
+
+        def _send(self, status, content):
+            body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _quote(self, models, repair_type):
+            if time.time() - index.loaded_at > reload_interval:
+                index.reload()
+            if not models:
+                self._send(400, {"error": "no model given"})
+            else:
+                self._send(200, index.quote(models, repair_type or "screen"))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/health":
+                self._send(200, {"models": len(index), "loaded_at": index.loaded_at})
+            elif url.path == "/quote":
+                self._quote(query.get("model", []), query.get("repair_type", [None])[0])
+            else:
+                self._send(404, {"error": "unknown path"})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/quote":
+                self._send(404, {"error": "unknown path"})
+                return
+            try:
+                content = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                models, repair_type = content.get("models", []), content.get("repair_type")
+            except (ValueError, AttributeError, TypeError):
+                self._send(400, {"error": "invalid JSON body"})
+                return
+            # a string would be quoted character by character
+            if not isinstance(models, list) or not all(isinstance(model, str) for model in models) \
+                    or not isinstance(repair_type, (str, type(None))):
+                self._send(400, {"error": "models must be a list of strings and repair_type a string"})
+                return
+            self._quote(models, repair_type)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PriceIndexHandler
+
+
+def serve(index, host="127.0.0.1", port=PORT, reload_interval=RELOAD_INTERVAL):
+    """
+    Serve the index over HTTP until interrupted.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(index, reload_interval))
+    print("serving {} models on http://{}:{}/quote".format(len(index), host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the latest repair prices of the shops.")
+    parser.add_argument("command", choices=["serve", "query"])
+    parser.add_argument("models", nargs="*", help="models to query")
+    parser.add_argument("--repair-type", default="screen", help="repair type of the query")
+    parser.add_argument("--output-dir", default="../data", help="directory of the result pickles")
+    parser.add_argument("--store-dir", default=None, help="directory of the price store, instead of the pickles")
+    parser.add_argument("--catalog", default=CATALOG_PATH, help="catalog of the canonical model names")
+    parser.add_argument("--host", default="127.0.0.1", help="address of the HTTP endpoint")
+    parser.add_argument("--port", type=int, default=PORT, help="port of the HTTP endpoint")
+    args = parser.parse_args(argv)
+
+    index = PriceIndex(args.output_dir, args.store_dir, args.catalog)
+    if args.command == "serve":
+        serve(index, args.host, args.port)
+    else:
+        for quote in index.quote(args.models, args.repair_type):
+            print(json.dumps(quote, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
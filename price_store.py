@@ -0,0 +1,169 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the columnar storage of the scraped prices. Each shop result is written as a Parquet
+#          (or Arrow IPC) file partitioned by shop and scrape date, with dictionary encoded brand and repair type
+#          columns, the price as an int32 number of øre and the scrape timestamp. Needs the pyarrow package.
+#          Layout: <root>/shop=<shop>/date=<YYYY-MM-DD>/<HHMMSS>.parquet
+
+
+from datetime import datetime, timezone
+import math
+import os
+
+
+STORE_DIR = "../data/store"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.feather
+        import pyarrow.fs
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("the price store needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def cost_to_ore(cost):
+    """
+    Convert a cost in kr into an integer number of øre, None for a missing cost.
+    """
+    if cost is None or (isinstance(cost, float) and math.isnan(cost)):
+        return None
+    return int(round(cost * 100))
+
+
+def to_utc(value):
+    """
+    Convert a datetime into an aware UTC datetime, a naive datetime is UTC (as in the price history).
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def schema():
+    """
+    Schema of the files of the store (shop and date come from the partition directories).
+    """
+    pa = _pyarrow()
+    return pa.schema([("brand", pa.dictionary(pa.int16(), pa.string())),
+                      ("phone_name", pa.string()),
+                      ("repair_type", pa.dictionary(pa.int8(), pa.string())),
+                      ("price_ore", pa.int32()),
+                      ("scraped_at", pa.timestamp("ms", tz="UTC"))])
+
+
+def to_table(df, repair_type="screen", scraped_at=None):
+    """
+    Convert the result of a get_screen_repair_cost_* function into an Arrow table.
+
+        Args:
+            df (pd.DataFrame): phone_name and cost (in kr) columns
+            repair_type (str): repair type of the costs
+            scraped_at (datetime): scrape time (naive datetimes are UTC), now by default
+
+        Outputs:
+            table (pyarrow.Table): table with the schema of the store
+    """
+    pa = _pyarrow()
+    scraped_at = to_utc(scraped_at or datetime.now(timezone.utc))
+    phone_names = [str(name) for name in df["phone_name"]]
+    prices = [cost_to_ore(cost) for cost in df["cost"]]
+    columns = {"brand": [name.split(" ")[0] for name in phone_names],
+               "phone_name": phone_names,
+               "repair_type": [repair_type] * len(phone_names),
+               "price_ore": prices,
+               "scraped_at": [scraped_at] * len(phone_names)}
+    return pa.Table.from_pydict(columns, schema=schema())
+
+
+def write_result(df, shop, root=STORE_DIR, repair_type="screen", scraped_at=None, file_format="parquet"):
+    """
+    Write the result of a shop in the store.
+
+        Args:
+            df (pd.DataFrame): phone_name and cost (in kr) columns
+            shop (str): name of the shop
+            root (str): directory of the store
+            repair_type (str): repair type of the costs
+            scraped_at (datetime): scrape time (naive datetimes are UTC), now by default
+            file_format (str): "parquet" or "arrow" (Arrow IPC file, can be memory-mapped)
+
+        Outputs:
+            path (str): path of the written file
+    """
+    pa = _pyarrow()
+    scraped_at = to_utc(scraped_at or datetime.now(timezone.utc))
+    table = to_table(df, repair_type, scraped_at)
+    directory = os.path.join(root, "shop=" + shop, "date=" + scraped_at.strftime("%Y-%m-%d"))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, scraped_at.strftime("%H%M%S") + FORMATS[file_format])
+    tmp_path = path + ".tmp"
+    if file_format == "parquet":
+        pa.parquet.write_table(table, tmp_path, compression="zstd")
+    else:
+        pa.feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_file(path, columns=None):
+    """
+    Read one file of the store (Arrow files are memory-mapped).
+
+        Args:
+            path (str): path of a .parquet or .arrow file
+            columns (list): columns to read, all by default
+
+        Outputs:
+            table (pyarrow.Table): content of the file
+    """
+    pa = _pyarrow()
+    if path.endswith(FORMATS["arrow"]):
+        return pa.feather.read_table(path, columns=columns, memory_map=True)
+    return pa.parquet.read_table(path, columns=columns)
+
+
+def dataset(root=STORE_DIR, file_format="parquet"):
+    """
+    Open the store as a pyarrow dataset (files are only read when the data is requested, Arrow files are
+    memory-mapped).
+    """
+    pa = _pyarrow()
+    partition_type = pa.dictionary(pa.int32(), pa.string())
+    partitioning = pa.dataset.partitioning(pa.schema([("shop", partition_type), ("date", partition_type)]),
+                                           flavor="hive", dictionaries="infer")
+    file_format = "ipc" if file_format == "arrow" else file_format
+    return pa.dataset.dataset(root, format=file_format, partitioning=partitioning, exclude_invalid_files=True,
+                              filesystem=pa.fs.LocalFileSystem(use_mmap=True))
+
+
+def read_prices(root=STORE_DIR, columns=None, shops=None, dates=None, file_format="parquet"):
+    """
+    Read prices from the store, only reading the requested columns and partitions.
+
+        Args:
+            root (str): directory of the store
+            columns (list): columns to read (all by default), among shop, date and the columns of schema()
+            shops (list): shops to read (all by default)
+            dates (list): scrape dates "YYYY-MM-DD" to read (all by default)
+            file_format (str): "parquet" or "arrow"
+
+        Outputs:
+            df (pd.DataFrame): prices
+    """
+    pa = _pyarrow()
+    data = dataset(root, file_format)
+    condition = None
+    for field, values in [("shop", shops), ("date", dates)]:
+        if values:
+            clause = pa.dataset.field(field).isin(list(values))
+            condition = clause if condition is None else condition & clause
+    import pandas as pd
+    # the int32 prices stay integers when some of them are missing
+    return data.to_table(columns=columns, filter=condition).to_pandas(types_mapper={pa.int32(): pd.Int32Dtype()}.get)
@@ -0,0 +1,191 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the parsing of the prices written by the Danish shops ("1.299 kr.", "999,-", "1.299,50
+#          kr", "GRATIS", "Ring til os", ...) and the merge of the results of all the shops into a single price table.
+#          A column of prices is parsed with one compiled regex applied to its distinct strings only, so the cost of a
+#          column depends on the number of different prices rather than on the number of rows. The merge maps the
+#          phone names to model names once per distinct name and gathers the prices of every (model, repair type) by
+#          shop in a single groupby.
+#          Usage: python prices.py [--output-dir DIR] [--catalog PATH] [--csv PATH]
+
+
+import os
+import re
+import sys
+
+from model_matching import CATALOG_PATH, load_catalog, ModelIndex, shop_overrides, tokenize
+
+
+# a price is "GRATIS" (free) or an amount whose thousands are separated by dots and whose decimals follow a comma;
+# the currency ("kr.", "kr", ",-") and the words around it ("Fra", "ca.") are ignored, a text without amount
+# ("Kontakt os for pris", "Ring til os", "TBA", "IKKE PÅ LAGER") is an unknown price
+PRICE_REGEX = re.compile(r"(?P<free>GRATIS|[Gg]ratis)|(?P<units>\d{1,3}(?:\.\d{3})+|\d+)(?:,(?P<decimals>\d{1,2}))?")
+
+
+def parse_price(price):
+    """
+    Convert a price written by a shop into float.
+
+        Args:
+            price (str): raw price extracted ("1.299 kr.", "999,-", "GRATIS", "Ring til os", ...)
+
+        Outputs:
+            price (float): price of the reparation, None if it is unknown
+    """
+    match = PRICE_REGEX.search(str(price)) if price is not None else None
+    if match is None:
+        return None
+    if match.group("free"):
+        return 0.0
+    return float(match.group("units").replace(".", "") + "." + (match.group("decimals") or "0"))
+
+
+def parse_prices(prices):
+    """
+    Convert a column of prices written by the shops into float, as parse_price does for a single price. The regex is
+    applied once to each distinct string of the column.
+
+        Args:
+            prices (pd.Series): raw prices extracted
+
+        Outputs:
+            prices (pd.Series): prices of the reparations (float64), NaN if unknown, with the index of prices
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(prices)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(PRICE_REGEX)
+    values = (parts["units"].str.replace(".", "", regex=False) + "." + parts["decimals"].fillna("0")).astype(float)
+    values = np.where(parts["free"].notna(), 0.0, values.to_numpy())
+    # the missing prices have the code -1, read from the NaN appended after the distinct prices
+    return pd.Series(np.append(values, np.nan)[codes], index=prices.index, name=prices.name)
+
+
+def most_expensive(price, other):
+    """
+    Price kept when a shop has two prices for the same (model, repair type), for example several names of the model or
+    original and copy screens: the most expensive one, as in keep_most_expensive and merge_shop_prices.
+
+        Args:
+            price (int or float): price
+            other (int or float): other price, None if there is no other price
+
+        Outputs:
+            price (int or float): most expensive price
+    """
+    return price if other is None or price >= other else other
+
+
+def keep_most_expensive(df, keys):
+    """
+    Keep one price per group of rows: a phone can have several reparations of a type (for example original and copy
+    screens), the most expensive one is kept (see most_expensive).
+
+        Args:
+            df (pd.DataFrame): rows with the keys columns and a float cost column
+            keys (list): columns identifying a group
+
+        Outputs:
+            df (pd.DataFrame): keys and cost columns, one row per group sorted by keys
+    """
+    return df.groupby(keys, sort=True, dropna=False)["cost"].max().reset_index()
+
+
+def default_model_name(phone_name):
+    """
+    Model name of a phone name without catalog: lowercase tokens of the name ("iPhone 11 Pro" -> "iphone 11 pro").
+    """
+    return " ".join(tokenize(phone_name))
+
+
+def merge_shop_prices(results, model_name=default_model_name, how="max"):
+    """
+    Merge the results of several shops into a table of the prices of every (model, repair type) by shop.
+
+        Args:
+            results (dict): shop -> DataFrame of phone_name, cost (raw strings or numbers) and optionally repair_type
+                            ("screen" if missing) columns
+            model_name (callable): function phone name -> canonical model name (None if unknown), called once per
+                                   distinct phone name
+            how (str): aggregation of the prices of a shop for a (model, repair type) whose several names or
+                       reparations match: "max" (most expensive, the price kept by most_expensive and by the price
+                       index) or "min"
+
+        Outputs:
+            df (pd.DataFrame): one row per (model, repair_type) sorted index, one column of prices (float, NaN when
+                               the shop has no price) per shop in the order of results
+    """
+    import pandas as pd
+
+    frames = []
+    for shop, df in results.items():
+        frames.append(pd.DataFrame({"shop": shop,
+                                    "phone_name": df["phone_name"].to_numpy(),
+                                    "repair_type": df["repair_type"].to_numpy() if "repair_type" in df.columns
+                                    else "screen",
+                                    "cost": df["cost"].to_numpy()}))
+    rows = pd.concat(frames, ignore_index=True)
+    if rows.empty:
+        return pd.DataFrame(columns=list(results), index=pd.MultiIndex.from_tuples([], names=["model", "repair_type"]))
+    if not pd.api.types.is_numeric_dtype(rows["cost"]):
+        rows["cost"] = parse_prices(rows["cost"])
+
+    codes, uniques = pd.factorize(rows["phone_name"].astype(str))
+    models = pd.Series([model_name(name) for name in uniques], dtype=object)
+    rows["model"] = models.to_numpy()[codes]
+    rows["shop"] = pd.Categorical(rows["shop"], categories=list(results))
+    rows = rows.dropna(subset=["model", "cost"])
+
+    table = rows.groupby(["model", "repair_type", "shop"], observed=True, sort=True)["cost"].agg(how)
+    table = table.unstack("shop").reindex(columns=list(results))
+    table.columns = list(table.columns)
+    return table
+
+
+def load_results(output_dir="../data"):
+    """
+    Read the latest result file of each shop (see price_index.RESULT_FILES) found in the output directory.
+    """
+    import pandas as pd
+    from price_index import RESULT_FILES
+
+    return {shop: pd.read_pickle(os.path.join(output_dir, file_name)) for shop, file_name in RESULT_FILES.items()
+            if os.path.exists(os.path.join(output_dir, file_name))}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Merge the prices of the shops into a single table.")
+    parser.add_argument("--output-dir", default="../data", help="directory of the result files of the shops")
+    parser.add_argument("--catalog", default=CATALOG_PATH,
+                        help="catalog of the canonical model names (the names are only normalized if it is missing)")
+    parser.add_argument("--csv", default=None, help="CSV file where the table is saved")
+    args = parser.parse_args(argv)
+
+    results = load_results(args.output_dir)
+    if not results:
+        print("no result file in {}".format(args.output_dir))
+        return 1
+    model_name = default_model_name
+    # the names missing from the catalog keep their normalized name
+    if os.path.exists(args.catalog):
+        index = ModelIndex(load_catalog(args.catalog), shop_overrides())
+
+        def catalog_model_name(phone_name):
+            return index.match(phone_name)[0] or default_model_name(phone_name)
+        model_name = catalog_model_name
+
+    table = merge_shop_prices(results, model_name)
+    if args.csv is not None:
+        table.to_csv(args.csv)
+        print("{} prices saved in {}".format(len(table), args.csv))
+    else:
+        print(table.to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
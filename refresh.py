@@ -0,0 +1,181 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: Command line runner refreshing the repair costs of several shops in parallel. Each shop runs in its own
+#          worker process, so a full refresh takes about as long as the slowest shop. With a journal directory the
+#          pages done by each shop are journaled: a run interrupted or with failed pages is resumed by running the
+#          same command again, only the failed and unfinished pages are downloaded.
+#          Usage: python refresh.py [shop ...] [--output-dir DIR] [--workers N] [--cache-dir DIR] [--parser lxml]
+#                                   [--journal-dir DIR]
+
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import contextlib
+import importlib
+import os
+import sys
+import time
+import traceback
+
+import metrics
+
+
+# module and main function of each shop
+SHOPS = {"greenmind": ("greemind_repair_cost", "get_screen_repair_cost_greenmind"),
+         "danishphonerepair": ("danishphonerepair_repair_cost", "get_screen_repair_cost_danishphonerepair"),
+         "phone-rep": ("phone_rep_repair_cost", "get_screen_repair_cost_phonerep"),
+         "ihero": ("ihero_repair_cost", "get_screen_repair_cost_ihero"),
+         "mobildoktoren": ("mobildoktoren_repair_cost", "get_screen_repair_cost_mobildoktoren")}
+
+
+def run_shop(shop, output_dir, cache_dir=None, parser=None, quiet=False, store_dir=None, store_format="parquet",
+             history_path=None, metrics_dir=None, journal_dir=None):
+    """
+    Refresh the repair costs of one shop (executed in a worker process).
+
+        Args:
+            shop (str): name of the shop in SHOPS
+            output_dir (str): directory where the results are saved
+            cache_dir (str): directory of the page cache, None to download every page
+            parser (str): HTML parser used by the scrapers, None for the default one
+            quiet (bool): if True, the messages printed by the scraper are hidden
+            store_dir (str): directory of the columnar price store, None to only save the pickle
+            store_format (str): "parquet" or "arrow"
+            history_path (str): path of the SQLite price history, None to keep no history
+            metrics_dir (str): directory where the metrics of the shop are exported (<shop>.json and <shop>.prom),
+                               None to not export them
+            journal_dir (str): directory of the journal of the pages of the shop (<shop>.jsonl), None to not journal
+                               them. The journal is removed once the results are saved without failed page.
+
+        Outputs:
+            result (dict): shop, number of rows, duration, error (traceback or None), summary of the metrics and,
+                           with a journal, the number of pages resumed from it and of failed pages
+    """
+    start = time.perf_counter()
+    # a worker process can refresh several shops, each one gets its own metrics
+    metrics.reset_metrics()
+    journal = None
+    try:
+        if parser is not None:
+            import parsing
+            parsing.set_parser(parser)
+        if cache_dir is not None:
+            import http_cache
+            http_cache.enable_cache(cache_dir)
+        module_name, function_name = SHOPS[shop]
+        function = getattr(importlib.import_module(module_name), function_name)
+        with contextlib.ExitStack() as stack:
+            if quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            if journal_dir is not None:
+                from journal import journaling
+                journal = stack.enter_context(journaling(os.path.join(journal_dir, shop + ".jsonl")))
+            df = function(output_dir=output_dir)
+        if store_dir is not None:
+            import price_store
+            price_store.write_result(df, shop, store_dir, file_format=store_format)
+        if history_path is not None:
+            from price_history import PriceHistory
+            with PriceHistory(history_path) as history:
+                history.ingest(df, shop)
+        result = {"shop": shop, "rows": len(df), "seconds": time.perf_counter() - start, "error": None}
+    except Exception:
+        result = {"shop": shop, "rows": 0, "seconds": time.perf_counter() - start, "error": traceback.format_exc()}
+    if journal is not None:
+        result["resumed"] = journal.resumed
+        result["failed_pages"] = len(journal.failed())
+        # the journal is kept for the next run while a page is missing from the results
+        if result["error"] is None and not result["failed_pages"]:
+            journal.remove()
+    result["metrics"] = metrics.get_metrics().summary()
+    if metrics_dir is not None:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for extension in [".json", ".prom"]:
+            metrics.get_metrics().export(os.path.join(metrics_dir, shop + extension))
+    return result
+
+
+def refresh(shops, output_dir="../data", workers=None, cache_dir=None, parser=None, quiet=False, store_dir=None,
+            store_format="parquet", history_path=None, metrics_dir=None, journal_dir=None):
+    """
+    Refresh several shops in parallel worker processes and report their progress.
+
+        Args:
+            shops (list): names of the shops to refresh
+            output_dir (str): directory where the results are saved
+            workers (int): number of worker processes, one per shop by default
+            cache_dir (str): directory of the page cache, None to download every page
+            parser (str): HTML parser used by the scrapers, None for the default one
+            quiet (bool): if True, the messages printed by the scrapers are hidden
+            store_dir (str): directory of the columnar price store, None to only save the pickles
+            store_format (str): "parquet" or "arrow"
+            history_path (str): path of the SQLite price history, None to keep no history
+            metrics_dir (str): directory where the metrics of each shop are exported, None to only print them
+            journal_dir (str): directory of the journals of the pages of the shops, None to not journal them
+
+        Outputs:
+            results (list): one result dict per shop (see run_shop)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or len(shops)) as executor:
+        futures = [executor.submit(run_shop, shop, output_dir, cache_dir, parser, quiet, store_dir,
+                                   store_format, history_path, metrics_dir, journal_dir) for shop in shops]
+        for n, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            status = "failed" if result["error"] else "{} rows".format(result["rows"])
+            if "resumed" in result:
+                status += " ({} pages resumed from the journal, {} failed pages)".format(result["resumed"],
+                                                                                       result["failed_pages"])
+            print("[{}/{}] {} finished in {:.1f} s: {}".format(n, len(shops), result["shop"], result["seconds"],
+                                                             status), flush=True)
+
+    print("\n{:<20} {:>8} {:>10}  {}".format("shop", "rows", "seconds", "status"))
+    for result in sorted(results, key=lambda x: x["shop"]):
+        print("{:<20} {:>8} {:>10.1f}  {}".format(result["shop"], result["rows"], result["seconds"],
+                                                  "FAILED" if result["error"] else "ok"))
+    print("total wall time: {:.1f} s".format(time.perf_counter() - start))
+    for result in sorted(results, key=lambda x: x["shop"]):
+        print("\nmetrics of {}:\n{}".format(result["shop"], result["metrics"]))
+    for result in results:
+        if result["error"]:
+            print("\n{} failed:\n{}".format(result["shop"], result["error"]), file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the repair costs of the shops in parallel.")
+    parser.add_argument("shops", nargs="*", metavar="shop",
+                        help="shops to refresh among {} (all by default)".format(", ".join(SHOPS)))
+    parser.add_argument("--output-dir", default="../data", help="directory where the results are saved")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--cache-dir", default=None, help="directory of the on-disk page cache (disabled if unset)")
+    parser.add_argument("--parser", default=None, choices=["html.parser", "lxml"], help="HTML parser")
+    parser.add_argument("--quiet", action="store_true", help="hide the messages printed by the scrapers")
+    parser.add_argument("--store-dir", default=None,
+                        help="directory of the columnar price store, partitioned by shop and date (disabled if unset)")
+    parser.add_argument("--store-format", default="parquet", choices=["parquet", "arrow"],
+                        help="file format of the price store")
+    parser.add_argument("--history-db", default=None,
+                        help="SQLite price history updated by each run (disabled if unset)")
+    parser.add_argument("--metrics-dir", default=None,
+                        help="directory where the metrics of each shop are exported as JSON and Prometheus text")
+    parser.add_argument("--journal-dir", default=None,
+                        help="directory of the journals of the pages done by each shop, an interrupted run is resumed "
+                             "from them (disabled if unset)")
+    args = parser.parse_args(argv)
+    unknown = [shop for shop in args.shops if shop not in SHOPS]
+    if unknown:
+        parser.error("unknown shop(s): {}".format(", ".join(unknown)))
+
+    results = refresh(args.shops or list(SHOPS), args.output_dir, args.workers, args.cache_dir, args.parser,
+                      args.quiet, args.store_dir, args.store_format, args.history_db,
+                      args.metrics_dir, args.journal_dir)
+    return 1 if any(result["error"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the classification of the reparation names of the shops into repair categories. The
+#          keywords of all the categories are compiled into a single regular expression that finds every category
+#          mentioned in a name in one pass; when several categories are found, the one with the highest priority wins.
+
+
+from functools import lru_cache
+import re
+
+
+# number of distinct reparation names whose category is kept by a classifier
+CACHE_SIZE = 4096
+
+
+def danish_letters(pattern):
+    """
+    Accept the Danish letters of a pattern both correctly decoded and decoded as latin-1 (such as Ã¦ for æ).
+    """
+    for letter in "æøåÆØÅ":
+        mojibake = letter.encode("utf-8").decode("latin-1")
+        pattern = pattern.replace(letter, "(?:{}|{})".format(letter, mojibake))
+    return pattern
+
+
+class RepairClassifier:
+    """
+    Classify reparation names into repair categories.
+
+        Args:
+            rules (list): (category, pattern) tuples by increasing priority: when a name matches several patterns, the
+                          category of the last one wins. A pattern matches anywhere in the name unless it starts with ^
+            lowercase (bool): if True, the names are lowercased before the classification
+            default (str): category of the names matching no pattern, None to keep the name itself
+    """
+
+    def __init__(self, rules, lowercase=False, default=None):
+        self.rules = list(rules)
+        self.lowercase = lowercase
+        self.default = default
+        # a lookahead is tried at every position of the name, so keywords overlapping each other are all found; the
+        # alternatives are ordered by decreasing priority since only the first one matching at a position is reported
+        alternatives = ["(?P<rule{}>{})".format(n, pattern) for n, (_, pattern) in reversed(list(enumerate(rules)))]
+        self.pattern = "(?=" + "|".join(alternatives) + ")"
+        self._regex = None
+        # the names are the product names written by the shops, their number is not bounded
+        self._cached_classify = lru_cache(maxsize=CACHE_SIZE)(self._classify)
+
+    @property
+    def regex(self):
+        # compiled on first use, so that importing the classifiers of the shops does not compile their patterns
+        if self._regex is None:
+            self._regex = re.compile(self.pattern)
+        return self._regex
+
+    def classify(self, reparation_name):
+        """
+        Find the category of a reparation name.
+
+            Args:
+                reparation_name (str): name of the reparation
+
+            Outputs:
+                category (str): category of the highest priority pattern found in the name
+        """
+        try:
+            return self._cached_classify(reparation_name)
+        except TypeError:
+            # unhashable value
+            return self.default
+
+    def _classify(self, reparation_name):
+        if not isinstance(reparation_name, str):
+            return self.default
+        text = reparation_name.lower() if self.lowercase else reparation_name
+        best = -1
+        for match in self.regex.finditer(text):
+            best = max(best, int(match.lastgroup[4:]))
+        if best >= 0:
+            category = self.rules[best][0]
+        else:
+            category = reparation_name if self.default is None else self.default
+        return category
+
+    def classify_column(self, reparation_names):
+        """
+        Classify a whole column of reparation names, each distinct name is classified once.
+
+            Args:
+                reparation_names (pd.Series): names of the reparations
+
+            Outputs:
+                categories (pd.Series): categories of the reparations
+        """
+        return reparation_names.map(self.classify)
+
+
+# reparation names of https://ihero.dk/
+IHERO_RULES = [("screen", r"Komplet (?:S|s)kærm|Glas/ ?LCD|LCD|(?:S|s)kærm"),
+               ("3G_4G", r"3G|Antenne"),
+               ("battery", r"Batteri"),
+               ("back_frame", r"BAGSIDE|Bagside|Bagcover|Bagglas"),
+               ("glass", r"GLAS|Glas"),
+               ("bluetooth", r"Bluetooth"),
+               ("wifi", r"WIFI"),
+               ("back_camera", r"BagKamera|Bagkamera"),
+               ("front_camera", r"Front (?:K|k)amera"),
+               ("diagnose", r"Diagnose"),
+               ("charging_socket", r"Ladestik"),
+               ("vibrator", r"Vibrator"),
+               ("power_cable", r"Tænd/(?:S|s)luk"),
+               ("volume_button", r"Volume/(?:L|l)ydløs|Lydløs"),
+               ("speaker", r"Bundhøjtaler|Højtaler|Ørehøjtaler"),
+               ("full_frame", r"Ramme"),
+               ("microphone", r"Mikrofon"),
+               ("camera_lens", r"Kameralinse"),
+               ("audio_port", r"audio|Jackstik"),
+               ("home_button", r"(?:H|h)ome (?:K|k)nap"),
+               ("other_button", r"Andre knapper")]
+
+# reparation names of https://mobildoktoren.dk
+MOBILDOKTOREN_RULES = [("data_transfer", r"^Data overførsel"),
+                       ("total_replacement", r"SWAP"),
+                       ("cleaning", r"Rensning"),
+                       ("SIM", r"SIM"),
+                       ("screen", r"skærm|LCD|display|skæ1rm|Skærm|skærn"),
+                       ("software", r"Softwareproblemer"),
+                       ("3G_4G", r"GPS"),
+                       ("bluetooth", r"Bluetooth"),
+                       ("wifi", r"(?:W|w)ifi"),
+                       ("back_frame", r"bagcover|bag Cover|bag ramme|bag cover"),
+                       ("usb", r"USB"),
+                       ("battery", r"batteri"),
+                       ("middle_frame", r"midtramme|midter ramme"),
+                       ("front_camera", r"front kamera|kamera.*front|kamera.*forside"),
+                       ("microphone", r"mikrofon"),
+                       ("home_button", r"home key|home knap"),
+                       ("camera_lens", r"linse"),
+                       ("back_camera", r"kamera.*(?:B|b)agside"),
+                       ("touch_screen", r"(?:T|t)ouch"),
+                       ("audio_port", r"audio|jack"),
+                       ("speaker", r"højtaler|speaker|microphone"),
+                       ("glass", r"glas"),
+                       ("charging_socket", r"ladestik|opladerstik"),
+                       ("charger", r"oplade"),
+                       ("volume_button", r"volume"),
+                       ("power_button", r"power|on/off"),
+                       ("full_frame", r"ramme"),
+                       ("vibrator", r"vibrator"),
+                       ("power_cable", r"tænd/sluk"),
+                       ("camera cover", r"kamera dæksel"),
+                       ("diagnose", r"Undersøgelse")]
+
+ihero_classifier = RepairClassifier([(category, danish_letters(pattern)) for category, pattern in IHERO_RULES])
+mobildoktoren_classifier = RepairClassifier([(category, danish_letters(pattern))
+                                             for category, pattern in MOBILDOKTOREN_RULES])
+# https://greenmind.dk/: screen reparations start with skærm or glas
+greenmind_classifier = RepairClassifier([("screen", r"^(?:skærm|glas)")], lowercase=True, default="other")
+# https://danishphonerepair.dk/: screen reparations contain skærm
+danishphonerepair_classifier = RepairClassifier([("screen", r"skærm")], lowercase=True, default="other")
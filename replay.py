@@ -0,0 +1,179 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 16/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the record and replay modes of the scrapers. In record mode every page downloaded by
+#          the shared fetcher is saved in a fixture archive (zip file). In replay mode the pages are served from the
+#          archive, so the scrapers can run and be measured without contacting the shops.
+#          Usage: python replay.py record <archive.zip> [shop ...]
+
+
+from contextlib import contextmanager
+from functools import partial
+import hashlib
+import importlib
+import json
+import sys
+import threading
+import zipfile
+
+from fetcher import Fetcher, FetchError, get_fetcher, set_fetcher
+from metrics import get_metrics
+from streaming import RepairRow, SHOP_MODULES
+
+
+def extract_pages(module_name):
+    """
+    Extraction step of a shop: downloads and parses the pages without post-processing nor saving the results.
+
+        Args:
+            module_name (str): module of the shop, defining iter_pages(skip_urls)
+
+        Outputs:
+            dfs (list): one DataFrame of RepairRow per page
+    """
+    import pandas as pd
+    shop = importlib.import_module(module_name)
+    return [pd.DataFrame(rows, columns=RepairRow._fields) for _, rows in shop.iter_pages()]
+
+
+# extraction step of each shop
+SHOP_EXTRACTORS = {shop: partial(extract_pages, module_name) for shop, module_name in SHOP_MODULES.items()}
+
+
+class FixtureArchive:
+    """
+    Zip archive of recorded pages: index.json maps each url to its status, headers and page file.
+
+        Args:
+            path (str): path of the zip file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        with zipfile.ZipFile(self.path) as archive:
+            self.index = json.loads(archive.read("index.json"))
+            self._pages = {url: archive.read(entry["file"]) for url, entry in self.index.items()}
+        return self
+
+    def add(self, url, status, headers, body):
+        name = "pages/" + hashlib.sha256(url.encode("utf-8")).hexdigest() + ".html"
+        with self._lock:
+            self.index[url] = {"file": name, "status": status, "headers": dict(headers.items())}
+            self._pages[url] = body
+
+    def get(self, url):
+        """
+        Return the recorded status, headers and body of a url, or None if the url has not been recorded.
+        """
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        return entry["status"], entry["headers"], self._pages[url]
+
+    def save(self):
+        with self._lock, zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("index.json", json.dumps(self.index, indent=1, sort_keys=True))
+            for url, entry in self.index.items():
+                archive.writestr(entry["file"], self._pages[url])
+
+    def __len__(self):
+        return len(self.index)
+
+
+class RecordingFetcher(Fetcher):
+    """
+    Fetcher downloading the pages from the shops and saving them in a FixtureArchive.
+    """
+
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def request(self, url, headers=None):
+        status, response_headers, body = super().request(url, headers)
+        if status == 200:
+            self.archive.add(url, status, response_headers, body)
+        return status, response_headers, body
+
+
+class ReplayFetcher(Fetcher):
+    """
+    Fetcher serving the pages recorded in a FixtureArchive. A url missing from the archive raises a 404 FetchError.
+    """
+
+    def __init__(self, archive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+        self.pages_served = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+
+    def request(self, url, headers=None):
+        recorded = self.archive.get(url)
+        if recorded is None:
+            raise FetchError(url, 404, "not recorded")
+        status, response_headers, body = recorded
+        with self._lock:
+            self.pages_served += 1
+            self.bytes_served += len(body)
+        # no network timings, only the size of the page
+        get_metrics().record_request(url, status, len(body))
+        return status, response_headers, body
+
+
+@contextmanager
+def recording(path):
+    """
+    Record in a fixture archive every page downloaded by the scrapers inside the with block.
+
+        Args:
+            path (str): path of the zip file to write
+    """
+    current = get_fetcher()
+    archive = FixtureArchive(path)
+    previous = set_fetcher(RecordingFetcher(archive, **current.settings()))
+    try:
+        yield archive
+    finally:
+        set_fetcher(previous)
+        archive.save()
+
+
+@contextmanager
+def replaying(path):
+    """
+    Serve the pages of a fixture archive to the scrapers inside the with block.
+
+        Args:
+            path (str): path of the zip file recorded with recording()
+
+        Outputs:
+            fetcher (ReplayFetcher): fetcher used inside the with block
+    """
+    fetcher = ReplayFetcher(FixtureArchive(path).load())
+    previous = set_fetcher(fetcher)
+    try:
+        yield fetcher
+    finally:
+        set_fetcher(previous)
+
+
+def main(argv):
+    if len(argv) < 2 or argv[0] != "record":
+        print("usage: python replay.py record <archive.zip> [{}]".format(" | ".join(SHOP_EXTRACTORS)))
+        return 2
+    shops = argv[2:] or list(SHOP_EXTRACTORS)
+    with recording(argv[1]) as archive:
+        for shop in shops:
+            SHOP_EXTRACTORS[shop]()
+    print("{} pages recorded in {}".format(len(archive), argv[1]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
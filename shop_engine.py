@@ -0,0 +1,453 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the scraping engine driven by declarative shop specs. A spec gives the first pages of a
+#          shop, the links followed from one level of pages to the next, the cells holding the repair costs and the
+#          rules converting the prices and the phone names. A spec is compiled once into an extraction plan
+#          (strainers, paths, row templates and cache keys) and every shop runs through the same loop: the pages of
+#          a level are downloaded concurrently, parsed through the page cache and recorded in the metrics. The
+#          fetcher, the page cache, bs4 and pandas are only imported when a shop is scraped.
+
+
+from collections import namedtuple
+from string import Formatter
+import os
+import re
+
+from metrics import record_filter, record_rows, track_page, track_stage
+from parsing import parsed_page, Strainer
+from prices import keep_most_expensive, parse_price, parse_prices
+from streaming import RepairRow
+
+
+# number of pages of a level downloaded concurrently before they are parsed
+BATCH_SIZE = 64
+
+# links followed from the pages of a level to the pages of the next level
+#   select: (tag, attrs) of the elements holding the links, as for BeautifulSoup.find_all
+#   href: path of the url in the element: "@href" for an attribute of the element, "a@href" for an attribute of its
+#         first a tag, "a@text" for the text of its first a tag
+#   name: path of the name of the linked page, None to keep the name of the current page
+#   rename: function (name of the current page, extracted name) -> name of the linked page
+#   pattern: regex whose first group is the url in the text found by href (for example in an onclick attribute)
+Links = namedtuple("Links", ["select", "href", "name", "rename", "pattern"], defaults=["@href", None, None, None])
+
+# cells holding the repair costs of the pages of the last level
+#   select: (tag, attrs) of the cells, read in the order of the page
+#   size: number of cells of a row of the price table
+#   row: templates of the phone name, reparation and cost of a row, formatted with the cells ({0}, {1}, ...) and the
+#        fields of the page ({name}, {heading} and the fields of the first pages)
+#   within: (tag, attrs) of the elements holding the cells, the attrs are formatted with the fields of the page;
+#           None to read the cells of the whole page
+#   heading: (tag, attrs) of the headings, the n-th heading names the cells of the n-th within element
+#   value: "first" for the first child of a cell or "text" for its stripped text
+# An empty cell of a column used by row ends the cells of its within element (of the page without within), an empty
+# cell of an unused column (for example an order button) is read as "", and an empty heading ends the page.
+Cells = namedtuple("Cells", ["select", "size", "row", "within", "heading", "value"],
+                   defaults=[None, None, "first"])
+
+# spec of a shop
+#   shop: name of the shop
+#   start: first pages, urls or (url, fields) tuples
+#   levels: Links followed from the first pages, the pages of the last level hold the cells
+#   cells: Cells of the pages of the last level
+#   price: function converting a raw cost into float (None if the cost is unknown), None for the Danish prices read by
+#          prices.parse_price (a whole column at once by prices.parse_prices)
+#   names: phone name normalizer built by phone_names.compile_pipeline
+#   classifier: RepairClassifier of the reparation names, None if all the rows are screen reparations
+#   output: file name of the screen repair costs in the output directory
+#   on_error: "skip" to skip a page failing after the retries of the fetcher, "raise" to stop the extraction
+ShopSpec = namedtuple("ShopSpec", ["shop", "start", "levels", "cells", "price", "names", "classifier", "output",
+                                   "on_error"], defaults=[None, None, None, None, "skip"])
+
+
+def _strainer_attrs(attrs):
+    # a string value of the strainer matches one of the values of a multi-valued attribute such as class, like it does
+    # in find_all; the elements kept by the strainer are then selected by find_all with the exact attrs
+    return {key: re.compile(r"(?:\A|\s){}(?:\s|\Z)".format(re.escape(value))) if isinstance(value, str) else value
+            for key, value in attrs.items()}
+
+
+def _compile_path(path):
+    """
+    Compile a path ("@href", "a@title", "img@alt", "@text") into a function element -> str or None.
+    """
+    child, _, attribute = path.partition("@")
+    if not attribute:
+        raise ValueError("Path {} has no @attribute".format(path))
+
+    def read(element):
+        if child:
+            element = element.find(child)
+            if element is None:
+                return None
+        if attribute == "text":
+            return element.get_text().strip()
+        value = element.get(attribute)
+        return " ".join(value) if isinstance(value, list) else value
+
+    return read
+
+
+def _check_template(template, size, fields):
+    for _, field, _, _ in Formatter().parse(template):
+        if field is None:
+            continue
+        if field.isdigit() and int(field) >= size:
+            raise ValueError("Template {} uses cell {} of a row of {} cells".format(template, field, size))
+        if not field.isdigit() and field not in fields:
+            raise ValueError("Template {} uses the unknown field {}".format(template, field))
+
+
+def _key(*parts):
+    # the page cache hashes the keys of the parsers, the selectors are described as they are
+    return repr(parts)
+
+
+def compile_spec(spec):
+    """
+    Compile a shop spec into an extraction plan.
+
+        Args:
+            spec (ShopSpec): spec of the shop
+
+        Outputs:
+            plan (ExtractionPlan): plan running the extraction of the shop
+    """
+    return ExtractionPlan(spec)
+
+
+def run_units(shop, pages, level, parse, on_error="skip"):
+    """
+    Run the work units of a level of a crawl: the pages are downloaded concurrently by batches and parsed, the units
+    already done by an interrupted run are read from the journal instead. A page failing to download or to parse is
+    recorded as failed and skipped, or stops the extraction.
+
+        Args:
+            shop (str): name of the shop
+            pages (list): (url, data) tuples of the level, data being passed to parse (the fields of the page)
+            level (int): level of the pages in the crawl
+            parse (callable): function (url, data, html) -> output of the page, a list
+            on_error (str): "skip" to skip a failing page, "raise" to stop the extraction
+
+        Outputs:
+            units (generator): (url, data, output) tuples in the order of pages
+    """
+    from fetcher import fetch_all
+    from journal import get_journal
+
+    journal = get_journal()
+    for start in range(0, len(pages), BATCH_SIZE):
+        batch = pages[start:start + BATCH_SIZE]
+        outputs = [journal.output(shop, url) if journal is not None else None for url, _ in batch]
+        urls = [url for (url, _), output in zip(batch, outputs) if output is None]
+        # a page still failing after the retries of the fetcher is returned as an exception
+        htmls = dict(zip(urls, fetch_all(urls, return_exceptions=True)))
+        for (url, data), output in zip(batch, outputs):
+            if output is None:
+                html = htmls[url]
+                try:
+                    if isinstance(html, Exception):
+                        raise html
+                    output = parse(url, data, html)
+                except Exception as error:
+                    # a page that cannot be downloaded or parsed is skipped like a missing page
+                    if journal is not None:
+                        journal.record_failed(shop, url, level, error)
+                    if on_error == "raise":
+                        raise
+                    print("Impossible to extract data from {} ... ({})".format(url, error))
+                    record_rows(shop, url, 0)
+                    continue
+                if journal is not None:
+                    journal.record_done(shop, url, level, output)
+            yield url, data, output
+
+
+class ExtractionPlan:
+    """
+    Compiled shop spec: the strainers, paths, templates and cache keys are built once and reused for every page.
+
+        Args:
+            spec (ShopSpec): spec of the shop
+    """
+
+    def __init__(self, spec):
+        if spec.on_error not in ("skip", "raise"):
+            raise ValueError("Unknown on_error {}, use skip or raise".format(spec.on_error))
+        if spec.cells.value not in ("first", "text"):
+            raise ValueError("Unknown cell value {}, use first or text".format(spec.cells.value))
+        self.spec = spec
+        self.shop = spec.shop
+        self.start = [(x, {}) if isinstance(x, str) else (x[0], dict(x[1])) for x in spec.start]
+
+        self.levels = []
+        for n, links in enumerate(spec.levels):
+            self.levels.append({"links": links,
+                                "strainer": Strainer(links.select[0], _strainer_attrs(links.select[1])),
+                                "href": _compile_path(links.href),
+                                "name": _compile_path(links.name) if links.name is not None else None,
+                                "key": "{}.links.{}.{}".format(self.shop, n,
+                                                               _key(links.select, links.href, links.name))})
+
+        cells = spec.cells
+        fields = {"name", "heading"}.union(*[page_fields for _, page_fields in self.start])
+        if len(cells.row) != 3:
+            raise ValueError("A row has 3 templates (phone name, reparation and cost), got {}".format(len(cells.row)))
+        for template in cells.row:
+            _check_template(template, cells.size, fields)
+        self.cells = cells
+        # columns of the cells read by the row templates
+        self._used_columns = {int(field) for template in cells.row for _, field, _, _ in Formatter().parse(template)
+                              if field is not None and field.isdigit()}
+        self._cells_key = "{}.cells.{}".format(self.shop, _key(cells.select, cells.size, cells.within, cells.heading,
+                                                               cells.value, sorted(self._used_columns)))
+        # str() copies a NavigableString into a plain str, the rows do not keep the tree of the page alive
+        self._read_cell = (lambda x: str(x.contents[0]) if x.contents else None) if cells.value == "first" else \
+            (lambda x: x.get_text().strip() or None)
+        # a strainer per formatting of the within attrs (for example one per table id)
+        self._strainers = {}
+
+    def _cells_strainer(self, within_attrs):
+        key = repr(within_attrs)
+        if key not in self._strainers:
+            if self.cells.within is not None and self.cells.heading is None:
+                strainer = Strainer(self.cells.within[0], _strainer_attrs(within_attrs))
+            else:
+                tags = [x[0] for x in [self.cells.heading, self.cells.within or self.cells.select] if x is not None]
+                strainer = Strainer(tags)
+            self._strainers[key] = strainer
+        return self._strainers[key]
+
+    def _within_attrs(self, fields):
+        if self.cells.within is None:
+            return None
+        return {key: value.format(**fields) if isinstance(value, str) else value
+                for key, value in self.cells.within[1].items()}
+
+    def extract_links(self, html, level):
+        """
+        Extract the links of a page of a level.
+
+            Args:
+                html (bytes): content of the page
+                level (int): level of the page
+
+            Outputs:
+                rows (list): (href, name) tuples, name being None if the level does not name the linked pages
+        """
+        plan = self.levels[level]
+        tag, attrs = plan["links"].select
+        rows = []
+        with parsed_page(html, plan["strainer"]) as soup:
+            for element in soup.find_all(tag, attrs):
+                href = plan["href"](element)
+                if href:
+                    rows.append((href, plan["name"](element) if plan["name"] is not None else None))
+        return rows
+
+    def extract_cells(self, soup, within_attrs=None):
+        """
+        Read the cells of a parsed page in a single walk.
+
+            Args:
+                soup (BeautifulSoup): parsed page
+                within_attrs (dict): attrs of the within elements, formatted with the fields of the page
+
+            Outputs:
+                rows (list): (heading, cell_0, cell_1, ...) tuples, heading being "" if the spec has no heading
+        """
+        cells = self.cells
+        tag, attrs = cells.select
+        if cells.within is None:
+            groups = [soup]
+        else:
+            groups = soup.find_all(cells.within[0], within_attrs)
+        if cells.heading is None:
+            headings = [""] * len(groups)
+        else:
+            headings = []
+            for heading in soup.find_all(*cells.heading):
+                heading = self._read_cell(heading)
+                if heading is None:
+                    # an empty heading ends the extraction of the page
+                    break
+                headings.append(heading)
+
+        rows = []
+        for heading, group in zip(headings, groups):
+            values = []
+            for cell in group.find_all(tag, attrs):
+                value = self._read_cell(cell)
+                if value is None:
+                    if len(values) % cells.size in self._used_columns:
+                        # an empty cell ends the extraction of the group
+                        break
+                    value = ""
+                values.append(value)
+            rows += [(heading, *values[n:n + cells.size])
+                     for n in range(0, len(values) - cells.size + 1, cells.size)]
+        return rows
+
+    def cell_rows(self, soup, fields):
+        """
+        Build the (phone_name, reparation, cost) rows of a parsed page of the last level.
+
+            Args:
+                soup (BeautifulSoup): parsed page
+                fields (dict): fields of the page
+
+            Outputs:
+                rows (list): (phone_name, reparation, cost) tuples
+        """
+        return self._format_rows(self.extract_cells(soup, self._within_attrs(fields)), fields)
+
+    def _format_rows(self, raw_rows, fields):
+        return [tuple(template.format(*raw[1:], heading=raw[0], **fields) for template in self.cells.row)
+                for raw in raw_rows]
+
+    def _page_rows(self, url, fields, html):
+        from http_cache import cached_rows
+
+        within_attrs = self._within_attrs(fields)
+        key = self._cells_key if within_attrs is None else "{}.{}".format(self._cells_key, _key(within_attrs))
+
+        def extract(html):
+            with parsed_page(html, self._cells_strainer(within_attrs)) as soup:
+                return self.extract_cells(soup, within_attrs)
+
+        with track_page(self.shop, url):
+            raw_rows = cached_rows(html, key, extract)
+        return self._format_rows(raw_rows, fields)
+
+    def _page_links(self, url, fields, html, level):
+        from http_cache import cached_rows
+        from urllib.parse import urljoin
+
+        print("extracting data from {} ...".format(url))
+        links = self.levels[level]["links"]
+        with track_page(self.shop, url):
+            rows = cached_rows(html, self.levels[level]["key"], lambda x: self.extract_links(x, level))
+        children = []
+        for href, name in rows:
+            if links.pattern is not None:
+                match = re.search(links.pattern, href)
+                if match is None:
+                    continue
+                href = match.group(1)
+            child_fields = dict(fields)
+            if name is not None:
+                child_fields["name"] = links.rename(fields.get("name"), name) if links.rename else name
+            children.append((urljoin(url, href), child_fields))
+        return children
+
+    def iter_pages(self, skip_urls=()):
+        """
+        Extract the repair costs of the shop page by page. Each page is a work unit of the journal of the process
+        (see journal.journaling), the units done by an interrupted run are not downloaded again.
+
+            Args:
+                skip_urls (set): urls of the pages of the last level that are not extracted (already extracted by a
+                                 previous run)
+
+            Outputs:
+                pages (generator): (url, rows) tuples, rows being a list of RepairRow
+        """
+        seen = set()
+        pages = []
+        for url, fields in self.start:
+            if url not in seen:
+                seen.add(url)
+                pages.append((url, fields))
+
+        for level in range(len(self.levels)):
+            next_pages = []
+            for _, _, children in run_units(
+                    self.shop, pages, level, lambda url, fields, html: self._page_links(url, fields, html, level),
+                    self.spec.on_error):
+                for child_url, child_fields in children:
+                    if child_url not in seen:
+                        seen.add(child_url)
+                        next_pages.append((child_url, child_fields))
+            pages = next_pages
+
+        pages = [(url, fields) for url, fields in pages if url not in skip_urls]
+        print("extracting data from {} pages of {} ...".format(len(pages), self.shop))
+        for url, _, rows in run_units(self.shop, pages, len(self.levels),
+                                      lambda url, fields, html: self._page_rows(url, fields, html), self.spec.on_error):
+            record_rows(self.shop, url, len(rows))
+            yield url, [RepairRow(self.shop, url, *row) for row in rows]
+
+    def screen_stages(self, rows):
+        """
+        Streaming stages of the rows of a page: keep the screen reparations, convert the price and normalize the phone
+        name.
+
+            Args:
+                rows (iterable): RepairRow extracted from a page
+
+            Outputs:
+                rows (generator): RepairRow of the screen reparations with a known price
+        """
+        classifier = self.spec.classifier
+        for row in rows:
+            if classifier is not None and classifier.classify(row.reparation) != "screen":
+                continue
+            cost = (self.spec.price or parse_price)(row.cost)
+            if cost is None:
+                continue
+            yield row._replace(phone_name=self.spec.names.normalize_name(str(row.phone_name)),
+                               reparation=str(row.reparation), cost=cost)
+
+    def repair_cost(self):
+        """
+        Extract the costs of all the reparations of the shop.
+
+            Outputs:
+                df (pd.DataFrame): phone_name, repair_type and cost columns, one row per phone and repair type keeping
+                                   the most expensive reparation
+        """
+        import pandas as pd
+
+        rows = [row for _, page_rows in self.iter_pages() for row in page_rows]
+        df = pd.DataFrame(rows, columns=RepairRow._fields)
+
+        df["repair_type"] = self.spec.classifier.classify_column(df["reparation"]) \
+            if self.spec.classifier is not None else "screen"
+        df["cost"] = parse_prices(df["cost"]) if self.spec.price is None else df["cost"].map(self.spec.price)
+
+        # drop reparations for which cost is unknown
+        n_rows = len(df)
+        df = df.dropna(subset=["cost"])
+        record_filter(self.shop, "dropna", n_rows, len(df))
+
+        with track_stage(self.shop, "normalize"):
+            df["phone_name"] = self.spec.names(df["phone_name"])
+
+        # a phone can have several reparations of a type, we keep the most expensive one
+        n_rows = len(df)
+        df = keep_most_expensive(df, ["phone_name", "repair_type"])
+        record_filter(self.shop, "duplicates", n_rows, len(df))
+        return df[["phone_name", "repair_type", "cost"]]
+
+    def screen_repair_cost(self, output_dir="../data"):
+        """
+        Extract the screen repair costs of the shop and save them in the output file of the spec.
+
+            Args:
+                output_dir (str): directory where the DataFrame is saved
+
+            Outputs:
+                df (pd.DataFrame): dataframe containing the screen repair costs for all phone models available.
+        """
+        df = self.repair_cost()
+
+        n_rows = len(df)
+        df = df[df["repair_type"] == "screen"][["phone_name", "cost"]].reset_index(drop=True)
+        record_filter(self.shop, "screen", n_rows, len(df))
+
+        output_path = os.path.join(output_dir, self.spec.output)
+        df.to_pickle(output_path)
+        print("Data saved in {}".format(output_path))
+
+        return df
@@ -0,0 +1,142 @@
+# PROGRAMMER: Olivier Gobron
+# DATE CREATED: 17/10/2026
+# REVISED DATE:
+# PURPOSE: This file contains the streaming extraction of the repair costs. Each shop yields its rows page by page,
+#          the rows go through the screen filtering, price conversion and name normalization stages of the shop and
+#          are appended to a JSON lines file as soon as a page is processed. An interrupted run is resumed from the
+#          pages already written, and the DataFrame is only built when the results are read.
+
+
+from collections import namedtuple
+import os
+
+from metrics import record_filter
+
+
+# row yielded by the extractors of the shops
+RepairRow = namedtuple("RepairRow", ["shop", "source_url", "phone_name", "reparation", "cost"])
+
+# module of each shop, the module defines iter_pages(skip_urls) and screen_stages(rows)
+SHOP_MODULES = {"greenmind": "greemind_repair_cost",
+                "danishphonerepair": "danishphonerepair_repair_cost",
+                "phone-rep": "phone_rep_repair_cost",
+                "ihero": "ihero_repair_cost",
+                "mobildoktoren": "mobildoktoren_repair_cost"}
+
+
+class JsonlSink:
+    """
+    Append-only JSON lines file of rows. The rows of a page are followed by a line {"page": url} marking the page as
+    complete; rows written after the last marker belong to an interrupted page and are discarded when resuming.
+
+        Args:
+            path (str): path of the file
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def completed_pages(self):
+        """
+        Return the urls of the complete pages and cut the rows of an interrupted page from the end of the file.
+        """
+        import json
+
+        pages = set()
+        if not os.path.exists(self.path):
+            return pages
+        end_of_complete_pages = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # line cut by a crash, nothing after it can be trusted
+                    break
+                if "page" in record:
+                    pages.add(record["page"])
+                    end_of_complete_pages = f.tell()
+        if end_of_complete_pages < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(end_of_complete_pages)
+        return pages
+
+    def write_page(self, url, rows):
+        """
+        Append the rows of a page followed by its completion marker.
+
+            Args:
+                url (str): url of the page
+                rows (iterable): RepairRow of the page
+        """
+        import json
+
+        lines = [json.dumps(row._asdict(), ensure_ascii=False) for row in rows]
+        lines.append(json.dumps({"page": url}, ensure_ascii=False))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __iter__(self):
+        import json
+
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if "page" not in record:
+                    yield RepairRow(**record)
+
+    def to_dataframe(self):
+        """
+        Read all the rows of the file into a DataFrame.
+        """
+        import pandas as pd
+        return pd.DataFrame(list(self), columns=RepairRow._fields)
+
+
+def stream_shop(shop, path, resume=True):
+    """
+    Extract the screen repair costs of a shop into a JSON lines file, page by page.
+
+        Args:
+            shop (str): name of the shop in SHOP_MODULES
+            path (str): path of the JSON lines file
+            resume (bool): if True, the pages already in the file are skipped, else the file is started again
+
+        Outputs:
+            sink (JsonlSink): file containing the rows
+    """
+    import importlib
+
+    module = importlib.import_module(SHOP_MODULES[shop])
+    sink = JsonlSink(path)
+    if not resume and os.path.exists(path):
+        os.remove(path)
+    done = sink.completed_pages()
+    for url, rows in module.iter_pages(skip_urls=done):
+        kept = list(module.screen_stages(rows))
+        record_filter(shop, "screen_stages", len(rows), len(kept))
+        sink.write_page(url, kept)
+    return sink
+
+
+def screen_repair_cost(sink):
+    """
+    Materialize the screen repair costs of a streamed shop: one row per phone, keeping the most expensive screen
+    reparation like the get_screen_repair_cost_* functions.
+
+        Args:
+            sink (JsonlSink): file written by stream_shop
+
+        Outputs:
+            df (pd.DataFrame): phone_name and cost columns
+    """
+    from prices import keep_most_expensive
+
+    return keep_most_expensive(sink.to_dataframe(), ["phone_name"])